@@ -0,0 +1,83 @@
+"""
+登录加密基准：1k 账号的用户名 / 密码加密。
+
+对比：
+- legacy: 旧实现，每次调用都新建 Cipher 和 PKCS7 padder；
+- cached_cipher: 复用同一个 Cipher，只新建 encryptor（当前的 AES_Encrypt）；
+- precomputed: 编译运行计划时 encrypt_credentials 一次性预加密，密文随配置保存，之后登录直接取用。
+
+运行：python -m benchmarks.bench_aes [--accounts 1000]
+"""
+
+import argparse
+import base64
+import time
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+from utils import encrypt
+
+
+def legacy_aes_encrypt(data):
+    """旧版 AES_Encrypt，仅用于对比。"""
+    key = b"u2oh6Vu^HWe4_AES"
+    iv = b"u2oh6Vu^HWe4_AES"
+    padder = padding.PKCS7(128).padder()
+    padded_data = padder.update(data.encode("utf-8")) + padder.finalize()
+    cipher = Cipher(algorithms.AES(key), modes.CBC(iv), backend=default_backend())
+    encryptor = cipher.encryptor()
+    encrypted_data = encryptor.update(padded_data) + encryptor.finalize()
+    return base64.b64encode(encrypted_data).decode("utf-8")
+
+
+def build_roster(accounts: int):
+    return [(f"1{n:010d}", f"pw-{n:06d}-secret") for n in range(accounts)]
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run(accounts: int = 1000, logins_per_account: int = 1):
+    roster = build_roster(accounts)
+    values = [v for pair in roster for v in pair] * logins_per_account
+
+    legacy = _timed(lambda: [legacy_aes_encrypt(v) for v in values])
+    cached_cipher = _timed(lambda: [encrypt.AES_Encrypt(v) for v in values])
+
+    stored = []
+    preload = _timed(lambda: stored.extend(encrypt.encrypt_credentials(roster)))
+    lookups = _timed(lambda: [pair for pair in stored for _ in range(logins_per_account)])
+
+    assert encrypt.encrypt_credentials(roster[:3]) == [
+        (legacy_aes_encrypt(u), legacy_aes_encrypt(p)) for u, p in roster[:3]
+    ]
+    return {
+        "accounts": accounts,
+        "encryptions": len(values),
+        "legacy": legacy,
+        "cached_cipher": cached_cipher,
+        "precompute": preload,
+        "login_lookups": lookups,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_aes")
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument(
+        "--logins", type=int, default=1,
+        help="logins per account, e.g. RELOGIN_EVERY_LOOP with several loops",
+    )
+    args = parser.parse_args()
+
+    result = run(args.accounts, args.logins)
+    print(f"accounts: {result['accounts']}, encryptions: {result['encryptions']}")
+    print(f"legacy (new Cipher per call)     {result['legacy'] * 1e3:8.2f} ms")
+    print(f"cached Cipher                    {result['cached_cipher'] * 1e3:8.2f} ms")
+    print(f"precompute at plan compile       {result['precompute'] * 1e3:8.2f} ms")
+    print(f"login-time lookups afterwards    {result['login_lookups'] * 1e3:8.2f} ms")
@@ -0,0 +1,248 @@
+"""
+抢座竞争基准：本地模拟服务器 + N 个模拟的竞争客户端，对同一个座位反复跑真实的 main()
+（策略首抢 strategic_first_attempt + 之后的重试循环），统计我方的胜率和我方提交到达服务器的时间
+相对实际开放时间的分布，让策略改动（首抢偏移、开放探测、对冲等）有可比较的数字。
+
+每一轮：
+- 实际开放时间 = 名义开放时间（target_dt）+ open_jitter 抽样；
+- 每个竞争客户端在名义开放时间 + offset 抽样时开始提交，每 retry_ms 重试一次，约到或座位被占后停止；
+- 我方和每个竞争客户端各有一个单程延迟分布（模拟服务器按账号在处理请求前等待），每个请求抽样一次；
+- 我方的会话预先登录，main() 照常从登录提前量开始运行，直到约到、座位被占或结束时间。
+
+分布写成 "const:MS"、"normal:MEAN:STD" 或 "uniform:LO:HI"（毫秒，延迟小于 0 时按 0）。
+
+策略参数用的是 main.py 的模块默认值，不读取 config.json：命令行只覆盖首抢偏移、开放探测和对冲，
+登录 / 验证码提前量固定为 1 / 0.5 秒（每轮只有几秒），不打滑块 / 选字验证码。
+结果里的 settings 是本次实际生效的参数，报告数字时一并给出。
+
+运行：python -m benchmarks.bench_contention [--trials 20] [--competitors 5]
+      [--our-latency normal:30:10] [--competitor-latency normal:20:10] [--competitor-offset uniform:0:150]
+      [--first-submit-offset-ms 200] [--open-detect] [--hedge]
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import logging
+import random
+import statistics
+import threading
+import time
+
+import requests
+
+import main as bot
+from utils import reserve, submit_result
+from utils.encrypt import verify_param
+from utils.mock_server import MockSeatServer
+from utils.open_detect import OPEN_DETECT
+from utils.pacer import HOST_BUDGET
+from utils.reserve import extract_submit_enc
+from utils.run_plan import compile_plan
+
+SEAT = "001"
+ROOM = "9928"
+TIMES = ["09:30", "22:00"]
+
+
+def parse_dist(spec: str, rng: random.Random):
+    """把分布描述解析成无参函数，返回秒。"""
+    kind, *params = spec.split(":")
+    values = [float(p) / 1000 for p in params]
+    if kind == "const" and len(values) == 1:
+        return lambda: values[0]
+    if kind == "normal" and len(values) == 2:
+        return lambda: rng.gauss(values[0], values[1])
+    if kind == "uniform" and len(values) == 2:
+        return lambda: rng.uniform(values[0], values[1])
+    raise ValueError(f"bad distribution {spec!r}, expected const:MS, normal:MEAN:STD or uniform:LO:HI")
+
+
+def _latency(dist):
+    return lambda: max(0.0, dist())
+
+
+class _Competitor(threading.Thread):
+    """别人的脚本：登录、提前取好 token，到点后按固定间隔提交同一个座位。"""
+
+    def __init__(self, mock, start_at: float, deadline: float, retry: float, day: str):
+        super().__init__(daemon=True)
+        self.mock = mock
+        self.start_at = start_at
+        self.deadline = deadline
+        self.retry = retry
+        self.day = day
+        self.won = False
+        self.http = requests.Session()
+        base = mock.base_url
+        self.http.post(f"{base}/fanyalogin")
+        self.uid = self.http.cookies.get("uid")
+        page = self.http.get(f"{base}/front/third/apps/seat/select?id={ROOM}&day={day}").text
+        self.token = extract_submit_enc(page)
+
+    def run(self):
+        while time.time() < self.start_at:
+            time.sleep(0.001)
+        form = {"roomId": ROOM, "startTime": TIMES[0], "endTime": TIMES[1], "day": self.day,
+                "seatNum": SEAT, "captcha": "", "wyToken": ""}
+        form["enc"] = verify_param(form, self.token)
+        while time.time() < self.deadline:
+            data = self.http.post(f"{self.mock.base_url}/data/apps/seat/submit", data=form).json()
+            category = submit_result.classify(data)
+            if category == submit_result.SUCCESS:
+                self.won = True
+                return
+            if category == submit_result.SEAT_TAKEN:
+                return
+            time.sleep(self.retry)
+
+
+LOGIN_LEAD_SECONDS = 1
+SLIDER_LEAD_SECONDS = 0.5
+
+
+def trial(n: int, rng: random.Random, competitors: int, our_latency, competitor_latency, competitor_offset,
+          retry: float, open_jitter, window: float, first_submit_offset_ms: float):
+    """跑一轮，返回 {"winner", "open_at", "our_arrivals", "winner_arrival"}。"""
+    target_dt = bot._beijing_now().replace(microsecond=0) + datetime.timedelta(seconds=2)
+    nominal = target_dt.timestamp()
+    open_at = nominal + open_jitter()
+    with MockSeatServer(open_at=open_at) as mock:
+        s = mock.attach(reserve(sleep_time=bot.SLEEPTIME, max_attempt=bot.MAX_ATTEMPT, reserve_next_day=True))
+        s.metrics_key = 0
+        s.get_login_status()
+        s.login(f"bench{n}", "x")
+        s.reset_window(nominal)
+        uid = s.requests.cookies.get("uid")
+        mock.client_latency[uid] = _latency(our_latency)
+
+        user = {"username": f"bench{n}", "password": "x", "times": TIMES, "roomid": ROOM, "seatid": [SEAT],
+                "daysofweek": [target_dt.strftime("%A")]}
+        end_hms = (target_dt + datetime.timedelta(seconds=window)).strftime("%H:%M:%S")
+        plan = compile_plan(
+            [user], True, target_dt, end_hms,
+            login_lead_seconds=LOGIN_LEAD_SECONDS, slider_lead_seconds=SLIDER_LEAD_SECONDS,
+            first_submit_offset_ms=first_submit_offset_ms,
+            credentials=[(f"bench{n}", "x")], page_url=s.url,
+        )
+        rivals = []
+        for _ in range(competitors):
+            rival = _Competitor(mock, nominal + competitor_offset(), nominal + window, retry, plan.day)
+            mock.client_latency[rival.uid] = _latency(competitor_latency)
+            rivals.append(rival)
+        for rival in rivals:
+            rival.start()
+        with contextlib.redirect_stdout(io.StringIO()):
+            success_list = bot.main([user], True, sessions=[s], strategic=True, plan=plan) or [False]
+        for rival in rivals:
+            rival.join()
+
+        owner = mock.bookings.get((ROOM, plan.day, TIMES[0], TIMES[1], SEAT))
+        winner = "us" if owner == uid else "rival" if owner else "nobody"
+        if success_list[0] and winner != "us":
+            logging.warning(f"[bench] trial {n}: main() reported success but the seat belongs to {winner}")
+        arrivals = [r["at"] - open_at for r in mock.submits if r["user"] == uid]
+        won = [r["at"] - open_at for r in mock.submits if owner and r["user"] == owner and r["at"] >= open_at]
+        return {
+            "winner": winner,
+            "open_offset_ms": (open_at - nominal) * 1000,
+            "our_arrivals": arrivals,
+            "winner_arrival": won[0] if won else None,
+        }
+
+
+def _quantiles(values):
+    values = sorted(values)
+    if not values:
+        return None
+    pick = lambda q: values[min(len(values) - 1, int(q * len(values)))] * 1000
+    return {"p10": pick(0.1), "p50": statistics.median(values) * 1000, "p90": pick(0.9)}
+
+
+def run(trials: int = 20, competitors: int = 5, our_latency: str = "normal:30:10",
+        competitor_latency: str = "normal:20:10", competitor_offset: str = "uniform:0:150",
+        retry_ms: float = 50, open_jitter: str = "const:0", window: float = 3.0,
+        first_submit_offset_ms: float = bot.FIRST_SUBMIT_OFFSET_MS, open_detect: bool = False,
+        hedge: bool = False, seed: int = 0):
+    """返回 {"trials", "wins", "win_rate", "first_arrival_ms", "winner_arrival_ms", "settings", "outcomes"}。
+
+    first_arrival_ms: 我方开放后第一个提交到达服务器的时间相对实际开放时间的分位数（毫秒）；
+    winner_arrival_ms: 约到座位的那一方开放后第一个提交的到达时间分位数。
+    """
+    rng = random.Random(seed)
+    dists = [parse_dist(spec, rng) for spec in (our_latency, competitor_latency, competitor_offset, open_jitter)]
+    # 只测抢座流程：不记运行指标、不探测真实端点、不打滑块
+    bot.METRICS_ENABLED = False
+    bot.ENDPOINT_PROBE = False
+    bot.ENABLE_SLIDER = bot.ENABLE_TEXTCLICK = False
+    bot.HEDGE_ENABLED = hedge
+    bot.OPEN_DETECT_ENABLED = open_detect
+    OPEN_DETECT.configure(open_detect)
+    HOST_BUDGET.configure(bot.HOST_RATE_PER_SECOND, bot.HOST_BURST)
+
+    outcomes = [
+        trial(n, rng, competitors, *dists[:3], retry_ms / 1000, dists[3], window, first_submit_offset_ms)
+        for n in range(trials)
+    ]
+    wins = sum(o["winner"] == "us" for o in outcomes)
+    first = [min((a for a in o["our_arrivals"] if a >= 0), default=None) for o in outcomes]
+    return {
+        "trials": trials,
+        "wins": wins,
+        "win_rate": wins / trials,
+        "first_arrival_ms": _quantiles([a for a in first if a is not None]),
+        "winner_arrival_ms": _quantiles([o["winner_arrival"] for o in outcomes if o["winner_arrival"] is not None]),
+        "early_submits": sum(sum(a < 0 for a in o["our_arrivals"]) for o in outcomes),
+        # main.py 模块默认值 + 本次覆盖的参数（config.json 不参与）
+        "settings": dict(
+            bot._strategy_settings(), first_submit_offset_ms=first_submit_offset_ms,
+            login_lead_seconds=LOGIN_LEAD_SECONDS, slider_lead_seconds=SLIDER_LEAD_SECONDS,
+        ),
+        "outcomes": outcomes,
+    }
+
+
+def _fmt(q):
+    return "-" if q is None else f"p10 {q['p10']:+7.1f}  p50 {q['p50']:+7.1f}  p90 {q['p90']:+7.1f} ms"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_contention")
+    parser.add_argument("--trials", type=int, default=20)
+    parser.add_argument("--competitors", type=int, default=5)
+    parser.add_argument("--our-latency", default="normal:30:10", help="our one-way latency distribution (ms)")
+    parser.add_argument("--competitor-latency", default="normal:20:10", help="competitor one-way latency (ms)")
+    parser.add_argument("--competitor-offset", default="uniform:0:150",
+                        help="when competitors start submitting, relative to the nominal open time (ms)")
+    parser.add_argument("--competitor-retry-ms", type=float, default=50)
+    parser.add_argument("--open-jitter", default="const:0", help="actual open time minus nominal open time (ms)")
+    parser.add_argument("--window", type=float, default=3.0, help="seconds after the nominal open time per trial")
+    parser.add_argument("--first-submit-offset-ms", type=float, default=bot.FIRST_SUBMIT_OFFSET_MS)
+    parser.add_argument("--open-detect", action="store_true", help="enable empirical open detection")
+    parser.add_argument("--hedge", action="store_true", help="enable the hedged first submit")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    result = run(
+        args.trials, args.competitors, args.our_latency, args.competitor_latency, args.competitor_offset,
+        args.competitor_retry_ms, args.open_jitter, args.window, args.first_submit_offset_ms,
+        args.open_detect, args.hedge, args.seed,
+    )
+    p = result["win_rate"]
+    margin = 1.96 * (p * (1 - p) / result["trials"]) ** 0.5
+    others = {k: sum(o["winner"] == k for o in result["outcomes"]) for k in ("rival", "nobody")}
+    print(f"trials {result['trials']}  competitors {args.competitors}")
+    settings = result["settings"]
+    print(
+        "strategy (main.py module defaults, config.json not applied): "
+        + ", ".join(f"{k} {settings[k]}" for k in (
+            "first_submit_offset_ms", "target_offset2_ms", "target_offset3_ms", "open_detect", "hedge_enabled",
+            "host_rate_per_second",
+        ))
+    )
+    print(f"win rate        {p:6.1%} ± {margin:.1%}  (rivals won {others['rival']}, nobody {others['nobody']})")
+    print(f"our first submit after open   {_fmt(result['first_arrival_ms'])}")
+    print(f"winning submit after open     {_fmt(result['winner_arrival_ms'])}")
+    print(f"our submits before open       {result['early_submits']}")
@@ -0,0 +1,99 @@
+"""
+日志管道基准：在本地模拟服务器上比较同步日志和队列日志对提交路径的影响。
+
+每轮模拟一次"到点 -> 取页面 token -> 计算 enc -> 提交"，记录：
+- fire_to_wire: 到点时刻到模拟服务器收到提交请求的时间；
+- cycle: 整个 token + submit 周期的耗时。
+
+运行：python -m benchmarks.bench_logging [--rounds 200]
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+import main as reserve_main
+from utils import reserve
+from utils.log_pipeline import start_queue_logging, stop_queue_logging
+from utils.mock_server import MockSeatServer
+from utils.pacer import HOST_BUDGET
+
+
+def _configure(mode: str, log_path: str | None):
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    # log_path 为 None 时写 stderr（和 Actions 中一样是管道），否则写文件
+    stream = open(log_path, "a", encoding="utf-8") if log_path else None
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(reserve_main._formatter)
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+    if mode == "queue":
+        start_queue_logging()
+
+
+def _run_mode(mode: str, rounds: int, log_path: str):
+    _configure(mode, log_path)
+    fire_to_wire, cycles = [], []
+    with MockSeatServer() as server:
+        s = server.attach(reserve(sleep_time=0, max_attempt=1))
+        s.get_login_status()
+        s.login("bench", "bench")
+        for n in range(rounds):
+            seat = f"{n % 500:03d}"
+            page_url = s.url.format(roomId="12884", day="2026-10-20", seatPageId="12884", fidEnc="")
+            fire = time.time()
+            start = time.perf_counter()
+            token, value = s._get_page_token(page_url, require_value=True)
+            s.get_submit(s.submit_url, times=["07:00", "13:00"], token=token, roomid="12884",
+                         seatid=seat, value=value)
+            cycles.append(time.perf_counter() - start)
+            fire_to_wire.append(server.submits[-1]["at"] - fire)
+    stop_queue_logging()
+    return fire_to_wire, cycles
+
+
+def _summary(values):
+    values = sorted(values)
+    return (
+        statistics.median(values) * 1000,
+        values[int(len(values) * 0.9)] * 1000,
+        values[int(len(values) * 0.99)] * 1000,
+    )
+
+
+def run(rounds: int = 200, sink: str = "file"):
+    # 只测客户端开销，关闭全局 host 速率预算
+    HOST_BUDGET.configure(0, 0)
+    result = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_path = os.path.join(tmpdir, "bench.log") if sink == "file" else None
+        # 先跑一轮热身，排除首次连接和导入的影响
+        _run_mode("sync", 10, log_path)
+        for mode in ("sync", "queue"):
+            result[mode] = _run_mode(mode, rounds, log_path)
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_logging")
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument(
+        "--sink", choices=["file", "stderr"], default="file",
+        help="where the log handler writes; use stderr with 2>&1 | cat to mimic the Actions pipe",
+    )
+    args = parser.parse_args()
+
+    result = run(args.rounds, args.sink)
+    print(f"rounds: {args.rounds} (mock server, zero server latency)")
+    for mode, (fire_to_wire, cycles) in result.items():
+        f50, f90, f99 = _summary(fire_to_wire)
+        c50, c90, c99 = _summary(cycles)
+        print(
+            f"{mode:<6} fire->wire p50/p90/p99 {f50:6.2f}/{f90:6.2f}/{f99:6.2f} ms   "
+            f"cycle p50/p90/p99 {c50:6.2f}/{c90:6.2f}/{c99:6.2f} ms"
+        )
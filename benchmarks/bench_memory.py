@@ -0,0 +1,124 @@
+"""
+会话内存基准：N 个账号各提交 M 次后，reserve 实例（含 requests.Session、请求头、提交记录）占用的内存。
+
+- compact: 现在的实现（__slots__、共享只读请求头模板、有界的结构化提交记录、共享连接池）；
+- legacy: 按旧实现的布局构造的对照组（每个实例一份请求头 dict、独立连接池、无限追加的格式化字符串）。
+
+不发网络请求：登录后的会话状态（请求头 / 几个 cookie）直接构造，提交结果从几种常见响应里轮流取。
+
+运行：python -m benchmarks.bench_memory [--accounts 1000] [--attempts 1000] [--mode both]
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from utils import reserve, submit_result
+from utils.reserve import HEADERS, LOGIN_HEADERS
+
+TIMES = ["09:30", "22:00"]
+RESPONSES = [
+    {"success": False, "msg": "当前时间不在可预约时间范围内"},
+    {"success": False, "msg": "操作过于频繁，请稍后再试"},
+    {"success": False, "msg": "该座位已被预约"},
+    {"success": False, "msg": "验证码错误"},
+]
+
+
+class _LegacySession:
+    """旧实现的内存布局：实例 __dict__、请求头副本、独立 Session、字符串列表。"""
+
+    def __init__(self):
+        self.token = ""
+        self.success_times = 0
+        self.fail_dict = []
+        self.submit_msg = []
+        self.requests = requests.session()
+        self.headers = dict(HEADERS)
+        self.login_headers = dict(LOGIN_HEADERS)
+        self.seats_taken = set()
+
+    def log_submit(self, sent_at, times, seatid, data, category, rtt):
+        self.submit_msg.append(times[0] + "~" + times[1] + ":  " + str(data))
+
+
+def _login_state(http: requests.Session, n: int):
+    http.cookies.set("fid", "1234", domain=".chaoxing.com")
+    http.cookies.set("_uid", str(100000 + n), domain=".chaoxing.com")
+    http.cookies.set("UID", str(100000 + n), domain=".chaoxing.com")
+    http.cookies.set("vc3", f"{n:032x}", domain=".chaoxing.com")
+
+
+def _build(mode: str, accounts: int):
+    sessions = []
+    for n in range(accounts):
+        if mode == "compact":
+            s = reserve(sleep_time=0, max_attempt=1)
+            s.requests.headers = CaseInsensitiveDict(LOGIN_HEADERS)
+            s.username = f"1380000{n:04d}"
+        else:
+            s = _LegacySession()
+            s.requests.headers = s.login_headers
+        s.requests.headers.update({"Host": "office.chaoxing.com"})
+        _login_state(s.requests, n)
+        sessions.append(s)
+    return sessions
+
+
+def _attempt(mode: str, s, n: int):
+    data = dict(RESPONSES[n % len(RESPONSES)])
+    seat = f"{n % 200:03d}"
+    category = submit_result.classify(data)
+    if mode == "compact":
+        s._log_submit(time.time(), TIMES, seat, data, category, 0.05)
+    else:
+        s.log_submit(time.time(), TIMES, seat, data, category, 0.05)
+
+
+def run(mode: str, accounts: int = 1000, attempts: int = 1000):
+    """返回 {"sessions_bytes", "after_attempts_bytes", "peak_bytes", "per_account_bytes", "seconds"}。"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    base = tracemalloc.get_traced_memory()[0]
+    sessions = _build(mode, accounts)
+    built = tracemalloc.get_traced_memory()[0] - base
+    for n in range(attempts):
+        for s in sessions:
+            _attempt(mode, s, n)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    seconds = time.perf_counter() - start
+    tracemalloc.stop()
+    del sessions
+    gc.collect()
+    return {
+        "sessions_bytes": built,
+        "after_attempts_bytes": current - base,
+        "peak_bytes": peak - base,
+        "per_account_bytes": (current - base) / max(accounts, 1),
+        "seconds": seconds,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_memory")
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--attempts", type=int, default=1000)
+    parser.add_argument("--mode", choices=["compact", "legacy", "both"], default="both")
+    args = parser.parse_args()
+
+    modes = ["compact", "legacy"] if args.mode == "both" else [args.mode]
+    print(f"accounts: {args.accounts}  attempts per account: {args.attempts}")
+    for mode in modes:
+        r = run(mode, args.accounts, args.attempts)
+        print(
+            f"{mode:<8} sessions {r['sessions_bytes'] / 2**20:8.1f} MiB   "
+            f"after attempts {r['after_attempts_bytes'] / 2**20:8.1f} MiB   "
+            f"peak {r['peak_bytes'] / 2**20:8.1f} MiB   "
+            f"per account {r['per_account_bytes'] / 1024:7.1f} KiB   {r['seconds']:6.1f}s"
+        )
@@ -0,0 +1,66 @@
+"""
+批量签名基准：verify_param_batch / enc_batch 对比逐个调用 verify_param / enc。
+
+运行：python -m benchmarks.bench_signing [--seats 100] [--slots 2]
+"""
+
+import argparse
+import timeit
+
+from utils.encrypt import enc, enc_batch, verify_param, verify_param_batch
+
+ALGORITHM_VALUE = "7c0b6f1b2a0d4e44a3b8c1f5d2e9a6b0"
+
+
+def build_params(seats: int, slots: int):
+    """构造与 get_submit 相同结构的提交参数：seats 个座位 × slots 个时间段。"""
+    times = [(f"{7 + 6 * i:02d}:00", f"{13 + 6 * i:02d}:00") for i in range(slots)]
+    return [
+        {
+            "roomId": "12884",
+            "startTime": start,
+            "endTime": end,
+            "day": "2026-10-20",
+            "seatNum": f"{seat:03d}",
+            "captcha": "",
+            "wyToken": "",
+        }
+        for seat in range(1, seats + 1)
+        for start, end in times
+    ]
+
+
+def _best(fn, number: int, repeat: int = 5) -> float:
+    """多次重复取最小值（秒 / 次），减少调度噪声。"""
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+
+
+def run(seats: int = 100, slots: int = 2, number: int = 200):
+    params = build_params(seats, slots)
+    assert verify_param_batch(params, ALGORITHM_VALUE) == [verify_param(p, ALGORITHM_VALUE) for p in params]
+    assert enc_batch(params) == [enc(p) for p in params]
+
+    return {
+        "payloads": len(params),
+        "verify_param_loop": _best(lambda: [verify_param(p, ALGORITHM_VALUE) for p in params], number),
+        "verify_param_batch": _best(lambda: verify_param_batch(params, ALGORITHM_VALUE), number),
+        "enc_loop": _best(lambda: [enc(p) for p in params], number),
+        "enc_batch": _best(lambda: enc_batch(params), number),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_signing")
+    parser.add_argument("--seats", type=int, default=100)
+    parser.add_argument("--slots", type=int, default=2)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    result = run(args.seats, args.slots, args.number)
+    print(f"payloads: {result['payloads']}")
+    for name in ("verify_param", "enc"):
+        loop, batch = result[f"{name}_loop"], result[f"{name}_batch"]
+        print(
+            f"{name:<13} loop {loop * 1e3:8.3f} ms   batch {batch * 1e3:8.3f} ms   "
+            f"speedup x{loop / batch:.2f}"
+        )
@@ -0,0 +1,156 @@
+"""
+滑块引擎对比：numpy（FFT 归一化互相关）vs cv2（Canny + matchTemplate）。
+
+语料：
+- captcha_debug 下 x_distance 保存的 bg_*.jpg / tp_*.png（没有标注，只比较两个引擎是否一致）；
+- 合成语料：带纹理的背景上挖出拼图形状的缺口（缺口变暗并带描边），滑块图与背景等高或只含滑块，
+  背景按 JPEG 压缩，缺口的真实 x 已知，用来比较准确率。
+
+运行：python -m benchmarks.bench_slider [--synthetic 200] [--tolerance 3]
+"""
+
+import argparse
+import glob
+import io
+import os
+import statistics
+import time
+
+import numpy as np
+from PIL import Image
+
+from utils import slide
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _texture(rng, height: int, width: int):
+    """平滑的明暗变化 + 色块和线条（模拟照片里的物体边缘）+ 噪声。"""
+    yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+    image = np.zeros((height, width, 3), np.float32)
+    image += rng.uniform(40, 200, 3) * (xx / width)[..., None] + rng.uniform(40, 120, 3) * (yy / height)[..., None]
+    for _ in range(rng.integers(6, 14)):
+        cx, cy, r = rng.uniform(0, width), rng.uniform(0, height), rng.uniform(10, 60)
+        blob = np.exp(-((xx - cx) ** 2 + (yy - cy) ** 2) / (2 * r * r))
+        image += blob[..., None] * rng.uniform(-90, 90, 3)
+    for _ in range(rng.integers(8, 20)):
+        x0, y0 = rng.integers(0, width), rng.integers(0, height)
+        w, h = rng.integers(4, 60), rng.integers(4, 40)
+        image[y0 : y0 + h, x0 : x0 + w] = image[y0 : y0 + h, x0 : x0 + w] * 0.5 + rng.uniform(0, 255, 3) * 0.5
+    for _ in range(rng.integers(2, 6)):
+        row = rng.integers(0, height)
+        image[row : row + rng.integers(1, 4)] += rng.uniform(-60, 60, 3)
+    image += rng.normal(0, 6, image.shape)
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+
+def _piece_mask(size: int, knob: int):
+    """拼图形状：方块加一个右侧凸起的圆。"""
+    total = size + knob
+    yy, xx = np.mgrid[0:total, 0:total]
+    mask = (xx < size) & (yy >= knob // 2) & (yy < knob // 2 + size)
+    cy, cx = knob // 2 + size // 2, size
+    mask |= (xx - cx) ** 2 + (yy - cy) ** 2 <= (knob // 2) ** 2
+    return mask
+
+
+def _encode(array, fmt: str, **kwargs) -> bytes:
+    buffer = io.BytesIO()
+    Image.fromarray(array).save(buffer, fmt, **kwargs)
+    return buffer.getvalue()
+
+
+def synthetic_case(seed: int, full_height: bool = True, height: int = 160, width: int = 320):
+    """返回 (背景 JPEG, 滑块 PNG, 真实 x)。"""
+    rng = np.random.default_rng(seed)
+    image = _texture(rng, height, width)
+    mask = _piece_mask(int(rng.integers(38, 50)), int(rng.integers(10, 16)))
+    ph, pw = mask.shape
+    x = int(rng.integers(pw + 20, width - pw - 2))
+    y = int(rng.integers(2, height - ph - 2))
+
+    edge = mask & ~(
+        np.pad(mask, 1)[2:, 1:-1] & np.pad(mask, 1)[:-2, 1:-1] & np.pad(mask, 1)[1:-1, 2:] & np.pad(mask, 1)[1:-1, :-2]
+    )
+    # 难度随机：缺口变暗程度、描边亮度、JPEG 质量
+    shade = rng.uniform(0.45, 0.85)
+    stroke = rng.uniform(0, 1)
+    # 滑块：缺口处的原图内容加浅色描边，透明处为黑色
+    piece = np.zeros((ph, pw, 4), np.uint8)
+    piece[..., :3] = np.where(mask[..., None], image[y : y + ph, x : x + pw], 0)
+    piece[edge, :3] = piece[edge, :3] * (1 - stroke) + 250 * stroke
+    piece[..., 3] = mask * 255
+
+    # 背景：缺口变暗并带描边
+    bg = image.astype(np.float32)
+    region = bg[y : y + ph, x : x + pw]
+    region[mask] = region[mask] * shade + 20
+    region[edge] = region[edge] * (1 - stroke) + 235 * stroke
+    bg = np.clip(bg, 0, 255).astype(np.uint8)
+
+    if full_height:
+        tp = np.zeros((height, pw + 10, 4), np.uint8)
+        tp[y : y + ph, 5 : 5 + pw] = piece
+    else:
+        tp = piece
+    return _encode(bg, "JPEG", quality=int(rng.integers(55, 92))), _encode(tp, "PNG"), x
+
+
+def saved_cases():
+    """captcha_debug 下成对保存的 (背景, 滑块)。"""
+    cases = []
+    for bg_path in sorted(glob.glob(os.path.join(ROOT, "captcha_debug", "bg_*.jpg"))):
+        tp_path = bg_path.replace("bg_", "tp_").replace(".jpg", ".png")
+        if os.path.exists(tp_path):
+            with open(bg_path, "rb") as f, open(tp_path, "rb") as g:
+                cases.append((f.read(), g.read(), None))
+    return cases
+
+
+def run(cases, engines=("numpy", "cv2"), tolerance: int = 3):
+    """返回 {引擎: {"correct", "labelled", "ms_p50", "ms_p90", "xs"}}。"""
+    result = {}
+    for engine in engines:
+        locate = slide._LOCATORS[engine]
+        locate(*cases[0][:2])
+        xs, timings, correct = [], [], 0
+        for bg, tp, truth in cases:
+            start = time.perf_counter()
+            x, _ = locate(bg, tp)
+            timings.append(time.perf_counter() - start)
+            xs.append(x)
+            correct += truth is not None and abs(x - truth) <= tolerance
+        timings.sort()
+        result[engine] = {
+            "correct": correct,
+            "labelled": sum(truth is not None for _, _, truth in cases),
+            "ms_p50": statistics.median(timings) * 1000,
+            "ms_p90": timings[int(len(timings) * 0.9)] * 1000,
+            "xs": xs,
+        }
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_slider")
+    parser.add_argument("--synthetic", type=int, default=200, help="number of synthetic cases")
+    parser.add_argument("--tolerance", type=int, default=3, help="pixels from the true x still counted as correct")
+    args = parser.parse_args()
+
+    engines = ["numpy"] + (["cv2"] if slide._has_cv2() else [])
+    corpora = {
+        "synthetic": [synthetic_case(n, full_height=n % 2 == 0) for n in range(args.synthetic)],
+        "captcha_debug": saved_cases(),
+    }
+    for name, cases in corpora.items():
+        if not cases:
+            print(f"{name}: no cases")
+            continue
+        result = run(cases, engines, args.tolerance)
+        print(f"{name}: {len(cases)} cases")
+        for engine, r in result.items():
+            accuracy = f"{r['correct']}/{r['labelled']} correct" if r["labelled"] else "unlabelled"
+            print(f"  {engine:<6} {accuracy:<18} p50 {r['ms_p50']:6.2f} ms   p90 {r['ms_p90']:6.2f} ms")
+        if len(result) == 2:
+            agree = sum(abs(a - b) <= args.tolerance for a, b in zip(result["numpy"]["xs"], result["cv2"]["xs"]))
+            print(f"  engines agree on {agree}/{len(cases)}")
@@ -1,17 +1,28 @@
-import json
 import time
+
+# 进程启动基准，用于 --profile-startup 统计各启动阶段耗时
+_STARTUP_ORIGIN = time.perf_counter()
+
+import json
+import atexit
 import argparse
+import threading
 import os
 import logging
 import datetime
 from zoneinfo import ZoneInfo
+from concurrent.futures import ThreadPoolExecutor
+
+# 时区对象只创建一次，日志格式化和抢座前的自旋等待都会频繁用到
+_BEIJING_TZ = ZoneInfo("Asia/Shanghai")
+
 
 # 统一日志时间为北京时间，方便在 GitHub Actions 日志中查看
 # 精确到毫秒，格式示例：2026-01-22 19:16:59.123 [Asia/Shanghai] - INFO - ...
 class BeijingFormatter(logging.Formatter):
     def formatTime(self, record, datefmt=None):
         """始终将日志时间格式化为北京时间。"""
-        dt = datetime.datetime.fromtimestamp(record.created, ZoneInfo("Asia/Shanghai"))
+        dt = datetime.datetime.fromtimestamp(record.created, _BEIJING_TZ)
         if datefmt:
             return dt.strftime(datefmt)
         return dt.isoformat()
@@ -29,10 +40,25 @@ logging.basicConfig(level=logging.INFO, handlers=[_handler])
 
 def _beijing_now() -> datetime.datetime:
     """获取北京时间（带时区信息）。"""
-    return datetime.datetime.now(ZoneInfo("Asia/Shanghai"))
-
-
-from utils import reserve, get_user_credentials
+    return datetime.datetime.now(_BEIJING_TZ)
+
+
+from utils import reserve, submit_result, textclick
+from utils.catalogue import RoomCatalogue, validate_users
+from utils.hedge import hedge_delay, hedged_call
+from utils.pacer import HOST_BUDGET
+from utils.metrics import METRICS
+from utils.verify import VERIFIER
+from utils.startup import StartupProfile, import_profile, warm_captcha_engine
+from utils.log_pipeline import start_queue_logging
+from utils.run_plan import PlanError, compile_plan
+from utils.deconflict import deconflict, log_changes
+from utils.slots import optimize_slots, share_extra_indices
+from utils.slide import SLIDE
+from utils.open_detect import OPEN_DETECT
+# 阶段标记在未开启 --profile 时是空操作，一直需要；可选模式（协调服务、端点探测、寿命模型、常驻、
+# 写分析报告）用到的模块只在启用时导入，不拖慢启动
+from utils.profiler import PROFILER
 
 
 def _now(action: bool) -> datetime.datetime:
@@ -54,11 +80,17 @@ get_hms = lambda action: _now(action).strftime("%H:%M:%S")
 get_current_dayofweek = lambda action: _now(action).strftime("%A")
 
 
-SLEEPTIME = 0.1  # 每次抢座的间隔（减少到0.05秒以加快速度）
+SLEEPTIME = 0.1  # 每次抢座的基础间隔，实际间隔由自适应 pacer 根据限流和 RTT 调整
 ENDTIME = "08:00:40"  # 根据学校的预约座位时间+1min即可
 
 ENABLE_SLIDER = False  # 是否有滑块验证（调试阶段先关闭）
+# 滑块引擎：numpy（只依赖 NumPy + Pillow，slim 安装可用）/ cv2 / auto（装了 OpenCV 用 cv2，否则 numpy）
+SLIDER_ENGINE = "auto"
 ENABLE_TEXTCLICK = False  # 是否有选字验证码（需要图灵云打码平台）
+# 选字验证码语料（python -m utils.textclick 对比匹配算法用）：默认不记录，文件超过上限后不再追加
+TEXTCLICK_CORPUS = False
+TEXTCLICK_CORPUS_PATH = ""
+TEXTCLICK_CORPUS_MAX_MB = 5.0
 MAX_ATTEMPT = 30  # 最大尝试次数（减少到30次，确保3个配置都能尝试）
 RESERVE_NEXT_DAY = True  # 预约明天而不是今天的
 
@@ -80,12 +112,139 @@ FIRST_SUBMIT_OFFSET_MS = 200
 # 例如：1200ms、1500ms
 TARGET_OFFSET2_MS = 257
 TARGET_OFFSET3_MS = 1102
-
-
-def _get_beijing_target_from_endtime() -> datetime.datetime:
+# 开放探测：目标时间前 OPEN_DETECT_LEAD_MS 开始用不带验证码的首选座位提交探测是否已开放，
+# 越接近目标时间越密（间隔 OPEN_DETECT_MAX_INTERVAL_MS 逐渐缩到 OPEN_DETECT_MIN_INTERVAL_MS），
+# 目标时间后继续探测 OPEN_DETECT_LATE_MS，最多 OPEN_DETECT_BUDGET 次；探测到开放时立即取 token 首抢，
+# 没探测到时仍在目标时间 + FIRST_SUBMIT_OFFSET_MS 首抢。探测是真实提交，默认关闭；
+# 开了滑块 / 选字验证码时开放后的探测只会返回验证码错误，说明不了是否开放，此时不探测
+OPEN_DETECT_ENABLED = False
+OPEN_DETECT_LEAD_MS = 1500
+OPEN_DETECT_MAX_INTERVAL_MS = 300
+OPEN_DETECT_MIN_INTERVAL_MS = 30
+OPEN_DETECT_BUDGET = 25
+OPEN_DETECT_LATE_MS = 3000
+
+# 房间 / 座位目录缓存（可在 config.json 的 catalogue 段覆盖）
+# CATALOGUE_PATH 为空时使用仓库根目录下的 room_catalogue.json
+CATALOGUE_PATH = ""
+CATALOGUE_TTL_HOURS = 168
+
+# 对冲提交：第一次提交在 HEDGE_PERCENTILE 分位的提交 RTT 内没有响应时，
+# 用另一条连接 + 预先准备好的独立 token/验证码再发一次，先成功者胜出。
+# 还没有 RTT 样本时使用 HEDGE_DEFAULT_DELAY_MS，等待时间不低于 HEDGE_MIN_DELAY_MS。
+HEDGE_ENABLED = False
+HEDGE_PERCENTILE = 90
+HEDGE_DEFAULT_DELAY_MS = 300
+HEDGE_MIN_DELAY_MS = 80
+
+# 全局按 host 的提交速率预算（所有账号共享），避免多个账号一起触发服务器限流
+# HOST_RATE_PER_SECOND <= 0 表示不限速
+HOST_RATE_PER_SECOND = 20
+HOST_BURST = 10
+
+# 运行指标：记录每次运行每个配置的首次提交时间、尝试次数、失败分类、验证码耗时、RTT 和结果，
+# 追加写入本地 SQLite（METRICS_PATH 为空时使用仓库根目录的 metrics.sqlite），
+# 用 python -m utils.metrics report 按周统计成功率和延迟分位数
+METRICS_ENABLED = True
+METRICS_PATH = ""
+
+# 常驻模式（-m daemon）：在（目标时间 - 登录提前量）之前 DAEMON_WAKE_MARGIN_SECONDS 秒唤醒，
+# 预导入依赖、登录并预连接，然后执行抢座；DAEMON_CONTROL_ADDRESS 为状态查询 socket
+# （"/path.sock" 为 Unix socket，"127.0.0.1:8765" 为本机 TCP）
+DAEMON_WAKE_MARGIN_SECONDS = 60
+DAEMON_CONTROL_ADDRESS = "/tmp/chaoxing-reserve.sock"
+
+# 日志模式："sync" 为原来的同步写 stderr；"queue" 时 logging 调用只入队，由后台线程格式化并写出
+# （目前测不出比 sync 快，默认不开）。queue 模式下 LOG_JSONL_PATH 非空时额外输出一份紧凑的 JSONL 日志
+LOG_MODE = "sync"
+LOG_JSONL_PATH = ""
+
+# 时段优化：同一账号、同一房间和座位的相邻 / 重叠时段先合并，再按服务器单次预约的最长时长
+# 拆成最少的提交请求（边界按 SLOT_GRANULARITY_MINUTES 对齐）。服务器的时长上限因学校而异，
+# 360 分钟只是常见值，默认关闭：确认过上限后在 config.json 的 slots 里打开并填 max_booking_minutes
+SLOT_OPTIMIZE = False
+SLOT_MAX_BOOKING_MINUTES = 360
+SLOT_GRANULARITY_MINUTES = 30
+# 各配置的策略首抢和重试并行执行（每个配置使用独立会话）；默认保持原来的按配置顺序执行
+PARALLEL_CONFIGS = False
+
+# 跨配置座位去冲突：同一房间时段重叠的配置分配不同的首选座位，互不抢同一个座位
+DECONFLICT_SEATS = True
+
+# 预约结果校验：提交返回 代码:302 / 已有预约 / 已被预约 时查询账号的预约记录确认，
+# 关闭时 302 按原来的偏好直接视为成功
+VERIFY_ENABLED = True
+
+# 凭据寿命模型（python -m utils.lifetime --target live 生成，LIFETIME_MODEL_PATH 为空时为仓库根目录的 lifetime_model.json，
+# 只采用 live 扫描得到的模型）。
+# 安全寿命取生存率不低于 1 - LIFETIME_RISK 的最大年龄；LIFETIME_ADJUST_LEADS 为 True 且模型里有数据时：
+# - 重试期间在 submit_enc 的安全寿命内复用页面 token，不再每次提交前都刷新选座页；
+# - 验证码预解提前量改为"验证码安全寿命 - TARGET_OFFSET3_MS"（不超过登录提前量）
+LIFETIME_MODEL_PATH = ""
+LIFETIME_RISK = 0.05
+LIFETIME_ADJUST_LEADS = True
+# 读取配置时 adjust_leads 为 True 才导入 utils.lifetime 并加载模型
+LIFETIME = None
+
+# 端点探测：窗口前解析各 host 的全部 A/AAAA 地址，测每个地址的 TCP/TLS 握手和小请求耗时，
+# 窗口内都连最快的健康地址（其余健康地址作后备），不再查 DNS；探测表写入运行指标。
+# 固定期间替换的是进程内的 socket.getaddrinfo，默认关闭
+ENDPOINT_PROBE = False
+ENDPOINT_HOSTS = []  # 为空时为 utils.endpoints.DEFAULT_HOSTS
+ENDPOINT_PROBE_SAMPLES = 3
+
+# 多节点协同：NODE_COUNT 个节点共用同一份配置，按 NODE_SPLIT 拆分（roster: 每个配置只由一个节点执行；
+# seats: 每个节点执行全部配置，候选座位轮转）。COORDINATOR_ADDRESS 不为空时窗口前与协调服务对时、
+# 登记首选座位，运行中发布 / 轮询各节点的结果，别的节点已约到的配置 / 座位不再提交。
+# NODE_INDEX / NODE_COUNT 可用同名环境变量覆盖（例如 Actions matrix）
+COORDINATOR_ADDRESS = ""
+NODE_INDEX = 0
+NODE_COUNT = 1
+NODE_SPLIT = "roster"
+COORDINATOR_POLL_MS = 200
+# 配置了协调服务地址时才导入 utils.coordinator
+COORDINATOR = None
+
+# 录制 / 回放：命令行 --record / --replay 时为 utils.cassette.Cassette，所有新建会话都接到它上面
+CASSETTE = None
+
+# 多窗口：同一天有多个放座时间时，在 config.json 的 "windows" 中为每个窗口配置
+# open_time（开放时间 HH:MM:SS）、可选 endtime / 提前量，以及包含的配置下标 configs；
+# 为空时只有一个由 ENDTIME 推算的窗口
+WINDOWS = []
+WINDOW_PREPARE_MARGIN_SECONDS = 30
+
+
+def _strategy_settings() -> dict:
+    """当前生效的策略参数快照，写入运行指标，用于比较不同参数的效果。"""
+    return {
+        "endtime": ENDTIME,
+        "sleeptime": SLEEPTIME,
+        "enable_slider": ENABLE_SLIDER,
+        "slider_engine": SLIDE.resolved_engine() if ENABLE_SLIDER else None,
+        "enable_textclick": ENABLE_TEXTCLICK,
+        "login_lead_seconds": STRATEGY_LOGIN_LEAD_SECONDS,
+        "slider_lead_seconds": STRATEGY_SLIDER_LEAD_SECONDS,
+        "first_submit_offset_ms": FIRST_SUBMIT_OFFSET_MS,
+        "open_detect": OPEN_DETECT_ENABLED,
+        "target_offset2_ms": TARGET_OFFSET2_MS,
+        "target_offset3_ms": TARGET_OFFSET3_MS,
+        "hedge_enabled": HEDGE_ENABLED,
+        "hedge_percentile": HEDGE_PERCENTILE,
+        "host_rate_per_second": HOST_RATE_PER_SECOND,
+        "deconflict_seats": DECONFLICT_SEATS,
+        "parallel_configs": PARALLEL_CONFIGS,
+        "slot_optimize": SLOT_OPTIMIZE,
+        "endpoint_probe": ENDPOINT_PROBE,
+        "node_count": NODE_COUNT,
+        "node_split": NODE_SPLIT,
+    }
+
+
+def _get_beijing_target_from_endtime(endtime: str | None = None) -> datetime.datetime:
     """根据 ENDTIME 计算目标时间（北京时间，当天 ENDTIME 减 40 秒）。"""
     today = _beijing_now().date()
-    h, m, s = map(int, ENDTIME.split(":"))
+    h, m, s = map(int, (endtime or ENDTIME).split(":"))
     end_dt = datetime.datetime(
         year=today.year,
         month=today.month,
@@ -93,19 +252,156 @@ def _get_beijing_target_from_endtime() -> datetime.datetime:
         hour=h,
         minute=m,
         second=s,
-        tzinfo=ZoneInfo("Asia/Shanghai"),
+        tzinfo=_BEIJING_TZ,
     )
     return end_dt - datetime.timedelta(seconds=40)
     # return end_dt - datetime.timedelta(minutes=1)  # ENDTIME 前 1 分钟（60秒）
 
-def strategic_first_attempt(
-    users,
-    usernames: str | None,
-    passwords: str | None,
-    action: bool,
-    target_dt: datetime.datetime,
-    success_list=None,
-):
+
+def _captcha_lead(lead: float, login_lead: float) -> float:
+    """按寿命模型确定验证码预解提前量：预解的验证码到最后一次使用（目标时间 + TARGET_OFFSET3_MS）时仍然有效。"""
+    kind = "slide" if ENABLE_SLIDER else "textclick" if ENABLE_TEXTCLICK else None
+    age = LIFETIME.safe_age(kind) if kind and LIFETIME is not None else None
+    if age is None:
+        return lead
+    adjusted = round(max(0.0, min(age - TARGET_OFFSET3_MS / 1000, login_lead)), 1)
+    if adjusted != lead:
+        logging.info(
+            f"[lifetime] {kind} validate safe age {age}s: captcha lead {lead}s -> {adjusted}s"
+        )
+    return adjusted
+
+
+def _compile_plan(users, action, target_dt: datetime.datetime | None = None, window: dict | None = None):
+    """用当前全局设置编译运行计划；target_dt 为空时为今天的窗口（星期按 _now(action) 判断）。
+
+    window 为 WINDOWS 中的一项时，用它的开放时间、结束时间、提前量和配置子集。
+    """
+    window = window or {}
+    weekday = None
+    endtime = ENDTIME
+    if window:
+        today = _beijing_now().date()
+        open_time = datetime.time.fromisoformat(window["open_time"])
+        target_dt = datetime.datetime.combine(today, open_time, _BEIJING_TZ)
+        endtime = window.get("endtime") or (target_dt + datetime.timedelta(seconds=40)).strftime("%H:%M:%S")
+    if target_dt is None:
+        target_dt = _get_beijing_target_from_endtime()
+    if target_dt.date() == _beijing_now().date():
+        weekday = get_current_dayofweek(action)
+    plan = compile_plan(
+        users,
+        action,
+        target_dt,
+        endtime,
+        reserve_next_day=RESERVE_NEXT_DAY,
+        login_lead_seconds=window.get("login_lead_seconds", STRATEGY_LOGIN_LEAD_SECONDS),
+        slider_lead_seconds=_captcha_lead(
+            window.get("slider_lead_seconds", STRATEGY_SLIDER_LEAD_SECONDS),
+            window.get("login_lead_seconds", STRATEGY_LOGIN_LEAD_SECONDS),
+        ),
+        first_submit_offset_ms=window.get("first_submit_offset_ms", FIRST_SUBMIT_OFFSET_MS),
+        weekday=weekday,
+        indices=window.get("configs"),
+    )
+    if SLOT_OPTIMIZE:
+        plan, changes = optimize_slots(plan, SLOT_MAX_BOOKING_MINUTES, SLOT_GRANULARITY_MINUTES)
+        log_changes(changes, "slots")
+    if DECONFLICT_SEATS:
+        plan, changes = deconflict(plan)
+        log_changes(changes)
+    if NODE_COUNT > 1:
+        from utils.coordinator import split_plan
+
+        plan, changes = split_plan(plan, NODE_INDEX, NODE_COUNT, NODE_SPLIT)
+        log_changes(changes, f"node {NODE_INDEX}/{NODE_COUNT}")
+    return plan
+
+
+def _window_plans(users, action):
+    """按 WINDOWS 编译每个窗口的运行计划，返回 [(name, plan), ...]；配置有误时抛出 PlanError。"""
+    problems = []
+    seen = {}
+    for n, window in enumerate(WINDOWS):
+        name = window.get("name") or f"window{n}"
+        try:
+            datetime.time.fromisoformat(str(window.get("open_time")))
+            if window.get("endtime"):
+                datetime.time.fromisoformat(str(window["endtime"]))
+        except ValueError:
+            problems.append(f"window {name}: open_time / endtime must be HH:MM:SS")
+        for index in window.get("configs") or []:
+            if not isinstance(index, int) or not 0 <= index < len(users):
+                problems.append(f"window {name}: config index {index!r} out of range")
+            elif index in seen:
+                problems.append(f"window {name}: config #{index} already in window {seen[index]}")
+            else:
+                seen[index] = name
+        if not window.get("configs"):
+            problems.append(f"window {name}: configs must list at least one config index")
+    if problems:
+        raise PlanError(problems)
+    names = [window.get("name") or f"window{n}" for n, window in enumerate(WINDOWS)]
+    plans = [_compile_plan(users, action, window=window) for window in WINDOWS]
+    # 拆出的段按窗口统一编号，不同窗口的段不会共用会话和结果下标
+    return list(zip(names, share_extra_indices(plans, len(users))))
+
+
+# 预热时为之后的窗口探测好、还没生效的端点表（按窗口的 target_dt）
+_PROBED_ENDPOINTS = {}
+
+
+def _probe_endpoints(label: str = "endpoints"):
+    """探测端点，返回新的 EndpointTable，不替换正在生效的解析表；关闭探测或回放录制时返回 None。"""
+    if not ENDPOINT_PROBE or (CASSETTE is not None and CASSETTE.mode == "replay"):
+        return None
+    from utils.endpoints import DEFAULT_HOSTS, EndpointTable
+
+    start = time.perf_counter()
+    table = EndpointTable().probe(ENDPOINT_HOSTS or DEFAULT_HOSTS, samples=ENDPOINT_PROBE_SAMPLES)
+    logging.info(
+        f"[{label}] Probed {len(table.probes)} connections to {len(table.resolved)} hosts "
+        f"in {(time.perf_counter() - start) * 1000:.0f}ms, pinned {table.pinned}"
+    )
+    return table
+
+
+def _pin_endpoints(target_dt):
+    """窗口开始时固定端点并把探测表记入本窗口的运行指标，返回生效的表（窗口结束时 uninstall）。
+
+    用预热时为本窗口探测好的表，没有时（单次运行）现在探测。换表只发生在窗口之间：
+    下一个窗口的预热和本窗口的重试尾巴重叠时，本窗口的解析结果和探测表不受影响。
+    """
+    table = _PROBED_ENDPOINTS.pop(target_dt, None) or _probe_endpoints()
+    if table is None:
+        return None
+    from utils import endpoints
+
+    endpoints.ENDPOINTS = table.install()
+    METRICS.endpoints(table.rows())
+    return table
+
+
+def _new_session(index: int, open_at: float | None = None) -> reserve:
+    s = reserve(
+        sleep_time=SLEEPTIME,
+        max_attempt=MAX_ATTEMPT,
+        enable_slider=ENABLE_SLIDER,
+        enable_textclick=ENABLE_TEXTCLICK,
+        reserve_next_day=RESERVE_NEXT_DAY,
+        open_at=open_at,
+    )
+    s.metrics_key = index
+    if LIFETIME is not None:
+        s.token_max_age = LIFETIME.safe_age("submit_enc") or 0.0
+    if COORDINATOR is not None:
+        s.coordinator = COORDINATOR
+    if CASSETTE is not None:
+        CASSETTE.attach(s)
+    return s
+
+
+def strategic_first_attempt(plan, action: bool, success_list=None, sessions=None):
     """只在第一次调用时使用的“有策略抢座”。
 
     - 在目标时间前 2 分钟左右开始（由 Actions 的 cron 控制）；
@@ -114,8 +410,9 @@ def strategic_first_attempt(
     - 目标时间到达瞬间：直接调用 get_submit 提交一次；
     - 之后的重试逻辑仍交给原有 while 循环和 login_and_reserve。
     """
+    target_dt = plan.target_dt
     if success_list is None:
-        success_list = [False] * len(users)
+        success_list = [False] * len(plan.configs)
 
     now = _beijing_now()
     # 如果已经过了目标时间，直接退回到普通逻辑由外层处理
@@ -123,153 +420,182 @@ def strategic_first_attempt(
         return success_list
 
     # 等到“目标时间前若干秒”附近再开始策略流程，由 cron 提前少量时间启动
-    thirty_before = target_dt - datetime.timedelta(seconds=STRATEGY_LOGIN_LEAD_SECONDS)
-    while _beijing_now() < thirty_before:
+    while _beijing_now() < plan.login_at:
         time.sleep(0.5)
 
-    usernames_list, passwords_list = None, None
-    if action:
-        if not usernames or not passwords:
-            raise Exception("USERNAMES or PASSWORDS not configured correctly in env")
-        usernames_list = usernames.split(",")
-        passwords_list = passwords.split(",")
-        if len(usernames_list) != len(passwords_list):
-            raise Exception("USERNAMES and PASSWORDS count mismatch")
-
-    current_dayofweek = get_current_dayofweek(action)
-
-    for index, user in enumerate(users):
+    configs = []
+    for cfg in plan.configs:
+        index = cfg.index
         # 已经成功的配置不再参与策略尝试
         if success_list[index]:
             continue
 
-        username = user["username"]
-        password = user["password"]
-        times = user["times"]
-        roomid = user["roomid"]
-        seatid = user["seatid"]
-        seat_page_id = user.get("seatPageId")
-        fid_enc = user.get("fidEnc")
-        daysofweek = user["daysofweek"]
-
-        # 今天不预约该配置，跳过
-        if current_dayofweek not in daysofweek:
-            logging.info("[strategic] Today not set to reserve, skip this config")
+        # 今天不预约该配置 / 没有对应账号，跳过
+        if not cfg.active:
+            logging.info(f"[strategic] Config #{index}: {cfg.skip_reason}, skip this config")
             continue
+        configs.append(cfg)
+
+    # 本窗口的开放探测：所有配置共用一次，由第一个到点的配置负责探测
+    if OPEN_DETECT.enabled and (ENABLE_SLIDER or ENABLE_TEXTCLICK):
+        logging.info("[strategic] Open detection skipped: captcha is enabled, probes cannot see the open")
+    elif OPEN_DETECT.enabled:
+        OPEN_DETECT.arm(target_dt.timestamp())
+    try:
+        if PARALLEL_CONFIGS and len(configs) > 1:
+            # 各配置使用独立会话，登录、验证码预热和到点提交并行进行，互不等待
+            with ThreadPoolExecutor(max_workers=len(configs), thread_name_prefix="strategic") as pool:
+                results = list(pool.map(lambda c: _strategic_config(c, plan, action, sessions), configs))
+        else:
+            results = [_strategic_config(c, plan, action, sessions) for c in configs]
+    finally:
+        OPEN_DETECT.disarm()
+    for cfg, suc in zip(configs, results):
+        success_list[cfg.index] = suc
 
-        # Actions 模式：根据索引或单账号覆盖用户名和密码
-        if action:
-            if len(usernames_list) == 1:
-                username = usernames_list[0]
-                password = passwords_list[0]
-            elif index < len(usernames_list):
-                username = usernames_list[index]
-                password = passwords_list[index]
-            else:
-                logging.error(
-                    "[strategic] Index out of range for USERNAMES/PASSWORDS, skipping this config."
-                )
-                continue
+    return success_list
 
-        # seatid 可能是字符串或列表，只在策略阶段针对第一个座位做一次精准尝试
-        seat_list = [seatid] if isinstance(seatid, str) else seatid
-        if not seat_list:
-            logging.error("[strategic] Empty seat list, skip this config")
-            continue
 
-        logging.info(
-            f"[strategic] Start first attempt for {username} -- {times} -- {seat_list} -- seatPageId={seat_page_id} -- fidEnc={fid_enc}"
-        )
+def _strategic_config(cfg, plan, action: bool, sessions=None) -> bool:
+    """单个配置的策略首抢：登录、预热验证码、到点取 token 提交，失败后再补两次。"""
+    index = cfg.index
+    target_dt = plan.target_dt
+    username = cfg.username
+    times = cfg.times
+    roomid = cfg.roomid
+    seat_page_id = cfg.seat_page_id
+    fid_enc = cfg.fid_enc
+    # 只在策略阶段针对第一个座位做一次精准尝试
+    seat_list = cfg.seats
 
-        # 1. 在 [T-30s, T] 区间内完成登录和基础 session（不提前获取页面 token）
-        s = reserve(
-            sleep_time=SLEEPTIME,
-            max_attempt=MAX_ATTEMPT,
-            enable_slider=ENABLE_SLIDER,
-            enable_textclick=ENABLE_TEXTCLICK,
-            reserve_next_day=RESERVE_NEXT_DAY,
-        )
+    logging.info(
+        f"[strategic] Start first attempt for {username} -- {times} -- {seat_list} -- seatPageId={seat_page_id} -- fidEnc={fid_enc}"
+    )
+
+    # 1. 在 [T-30s, T] 区间内完成登录和基础 session（不提前获取页面 token）
+    #    常驻模式下已有预热好的会话，直接复用
+    if sessions is not None and sessions[index] is not None:
+        s = sessions[index]
+        s.requests.headers.update({"Host": "office.chaoxing.com"})
+    else:
+        s = _new_session(index, open_at=target_dt.timestamp())
         s.get_login_status()
-        s.login(username, password)
+        s.login(username, cfg.password, cfg.encrypted)
         s.requests.headers.update({"Host": "office.chaoxing.com"})
-
-        first_seat = seat_list[0]
-
-        # 2. 等到“目标时间前若干秒”，预热滑块验证码，提前拿到多份 validate（如果启用了滑块）
-        ten_before = target_dt - datetime.timedelta(seconds=STRATEGY_SLIDER_LEAD_SECONDS)
-        while _beijing_now() < ten_before:
-            time.sleep(0.1)
-
-        captcha1 = captcha2 = captcha3 = ""
-        # 根据开关决定是否预热验证码
-        if ENABLE_SLIDER:
-            # 滑块验证：预先获取三份 validate
+        if sessions is not None:
+            sessions[index] = s
+
+    first_seat = seat_list[0]
+
+    # 2. 等到“目标时间前若干秒”，预热滑块验证码，提前拿到多份 validate（如果启用了滑块）
+    while _beijing_now() < plan.slider_at:
+        time.sleep(0.1)
+
+    captcha1 = captcha2 = captcha3 = ""
+    # 根据开关决定是否预热验证码
+    if ENABLE_SLIDER:
+        # 滑块验证：预先获取三份 validate
+        captcha1 = s.resolve_captcha("slide")
+        if not captcha1:
+            logging.warning(
+                "[strategic] First slider captcha failed or empty, retrying once more"
+            )
             captcha1 = s.resolve_captcha("slide")
-            if not captcha1:
-                logging.warning(
-                    "[strategic] First slider captcha failed or empty, retrying once more"
-                )
-                captcha1 = s.resolve_captcha("slide")
-            logging.info(f"[strategic] Pre-resolved slider captcha1: {captcha1}")
+        logging.info(f"[strategic] Pre-resolved slider captcha1: {captcha1}")
 
+        captcha2 = s.resolve_captcha("slide")
+        if not captcha2:
+            logging.warning(
+                "[strategic] Second slider captcha failed or empty, retrying once more"
+            )
             captcha2 = s.resolve_captcha("slide")
-            if not captcha2:
-                logging.warning(
-                    "[strategic] Second slider captcha failed or empty, retrying once more"
-                )
-                captcha2 = s.resolve_captcha("slide")
-            logging.info(f"[strategic] Pre-resolved slider captcha2: {captcha2}")
+        logging.info(f"[strategic] Pre-resolved slider captcha2: {captcha2}")
 
+        captcha3 = s.resolve_captcha("slide")
+        if not captcha3:
+            logging.warning(
+                "[strategic] Third slider captcha failed or empty, retrying once more"
+            )
             captcha3 = s.resolve_captcha("slide")
-            if not captcha3:
-                logging.warning(
-                    "[strategic] Third slider captcha failed or empty, retrying once more"
-                )
-                captcha3 = s.resolve_captcha("slide")
-            logging.info(f"[strategic] Pre-resolved slider captcha3: {captcha3}")
-        elif ENABLE_TEXTCLICK:
-            # 选字验证：预先获取三份 validate（循环重试直到成功）
-            def get_textclick_with_retry(name: str, max_retries: int = 10) -> str:
-                for i in range(max_retries):
-                    captcha = s.resolve_captcha("textclick")
-                    if captcha:
-                        logging.info(f"[strategic] {name} textclick captcha resolved: {captcha}")
-                        return captcha
-                    logging.warning(f"[strategic] {name} textclick captcha failed, retrying ({i + 1}/{max_retries})")
-                    time.sleep(0.5)
-                logging.error(f"[strategic] {name} textclick captcha failed after {max_retries} retries")
-                return ""
-
-            captcha1 = get_textclick_with_retry("First")
-            captcha2 = get_textclick_with_retry("Second")
-
-        # 3. 第一次提交：在目标时间 + FIRST_SUBMIT_OFFSET_MS 毫秒时获取页面 token，获取后立即提交
-        token_fetch_dt1 = target_dt + datetime.timedelta(milliseconds=FIRST_SUBMIT_OFFSET_MS)
-        while _beijing_now() < token_fetch_dt1:
-            # 更短的 sleep 间隔，提高 FIRST_SUBMIT_OFFSET_MS 附近的精度
-            time.sleep(0.001)
-
+        logging.info(f"[strategic] Pre-resolved slider captcha3: {captcha3}")
+    elif ENABLE_TEXTCLICK:
+        # 选字验证：预先获取三份 validate（循环重试直到成功）
+        def get_textclick_with_retry(name: str, max_retries: int = 10) -> str:
+            for i in range(max_retries):
+                captcha = s.resolve_captcha("textclick")
+                if captcha:
+                    logging.info(f"[strategic] {name} textclick captcha resolved: {captcha}")
+                    return captcha
+                logging.warning(f"[strategic] {name} textclick captcha failed, retrying ({i + 1}/{max_retries})")
+                time.sleep(0.5)
+            logging.error(f"[strategic] {name} textclick captcha failed after {max_retries} retries")
+            return ""
+
+        captcha1 = get_textclick_with_retry("First")
+        captcha2 = get_textclick_with_retry("Second")
+
+    page_url = cfg.page_url
+    PROFILER.tag("fire")
+
+    # 3. 第一次提交：在目标时间 + FIRST_SUBMIT_OFFSET_MS 毫秒时获取页面 token，获取后立即提交；
+    #    开放探测观察到已开放时不再等固定时间，立即取 token 提交
+    token_fetch_dt1 = plan.first_submit_at
+    opened_at, probe_category = OPEN_DETECT.wait(_open_probe(s, cfg, action))
+    if probe_category == submit_result.SUCCESS:
+        logging.info(f"[strategic] Open probe for seat {first_seat} already booked it")
+        return True
+    if probe_category == submit_result.SEAT_TAKEN:
+        # 首选座位已被别人约到，交给重试循环换下一个候选座位
+        logging.info(f"[strategic] Seat {first_seat} taken when booking opened, skip strategic submits")
+        s.seats_taken.add(first_seat)
+        return False
+    if probe_category == submit_result.ALREADY_RESERVED:
+        return False
+    if opened_at is not None:
+        token_fetch_dt1 = _beijing_now()
+    while _beijing_now() < token_fetch_dt1:
+        # 更短的 sleep 间隔，提高 FIRST_SUBMIT_OFFSET_MS 附近的精度
+        time.sleep(0.001)
+
+    if opened_at is not None:
+        logging.info(f"[strategic] Fetch page token for first submit at {token_fetch_dt1} (booking open observed)")
+    else:
         logging.info(
             f"[strategic] Fetch page token for first submit at {token_fetch_dt1} (target_dt + {FIRST_SUBMIT_OFFSET_MS}ms)"
         )
-        token1, value1 = s._get_page_token(
-            s.url.format(
-                roomId=roomid,
-                day=str(_beijing_now().date()),
-                seatPageId=seat_page_id or "",
-                fidEnc=fid_enc or "",
-            ),
-            require_value=True,
-        )
-        if not token1:
-            logging.error("[strategic] Failed to get page token for first submit, skip this config")
-            continue
-        logging.info(f"[strategic] Got page token for first submit: {token1}, value: {value1}")
 
+    # 对冲模式：用独立连接池的副本在后台同时获取一份独立的页面 token，
+    # 并占用一份预热好的验证码，第一次提交迟迟没有响应时立即用它补发
+    hedge_session = hedge_token_thread = refill_captcha = None
+    hedge_token = {}
+    if HEDGE_ENABLED:
+        hedge_session = s.fork()
+        # 备份请求借用第二份验证码：备份没有发出时原样留给第二次提交
+        hedge_captcha = captcha2
+
+        def _prefetch_hedge_token():
+            hedge_token["token"], hedge_token["value"] = hedge_session._get_page_token(
+                page_url, require_value=True
+            )
+
+        hedge_token_thread = threading.Thread(target=_prefetch_hedge_token, daemon=True)
+        hedge_token_thread.start()
+
+    token1, value1 = s._get_page_token(page_url, require_value=True)
+    if not token1:
+        logging.error("[strategic] Failed to get page token for first submit, skip this config")
+        return False
+    logging.info(f"[strategic] Got page token for first submit: {token1}, value: {value1}")
+
+    if opened_at is not None:
+        logging.info("[strategic] Immediately do first submit after fetching page token (booking open observed)")
+    else:
         logging.info(
             f"[strategic] Immediately do first submit after fetching page token (target_dt + {FIRST_SUBMIT_OFFSET_MS}ms)"
         )
-        suc = s.get_submit(
+
+    def _first_submit():
+        return s.get_submit(
             url=s.submit_url,
             times=times,
             token=token1,
@@ -278,313 +604,473 @@ def strategic_first_attempt(
             captcha=captcha1,
             action=action,
             value=value1,
+            day=cfg.day,
         )
 
-        # 如果第一次没有成功：为第二次提交重新获取页面 token，再延迟 TARGET_OFFSET2_MS 毫秒提交
-        if not suc:
-            logging.info("[strategic] First submit failed, prepare second submit with NEW page token")
-
-            # 先重新获取一次页面 token
-            token2, value2 = s._get_page_token(
-                s.url.format(
-                    roomId=roomid,
-                    day=str(_beijing_now().date()),
-                    seatPageId=seat_page_id or "",
-                    fidEnc=fid_enc or "",
-                ),
-                require_value=True,
+    if HEDGE_ENABLED:
+        def _hedge_submit():
+            hedge_token_thread.join()
+            if not hedge_token.get("token"):
+                logging.warning("[strategic] Hedge page token unavailable, skip backup submit")
+                return False
+            return hedge_session.get_submit(
+                url=hedge_session.submit_url,
+                times=times,
+                token=hedge_token["token"],
+                roomid=roomid,
+                seatid=first_seat,
+                captcha=hedge_captcha,
+                action=action,
+                value=hedge_token["value"],
+                day=cfg.day,
             )
-            if not token2:
-                logging.error("[strategic] Failed to get page token for second submit, skip to third/normal flow")
-            else:
-                send_dt2 = _beijing_now() + datetime.timedelta(milliseconds=TARGET_OFFSET2_MS)
-                while _beijing_now() < send_dt2:
-                    time.sleep(0.02)
 
-                logging.info(
-                    f"[strategic] Second submit at {send_dt2} (now + {TARGET_OFFSET2_MS}ms) with NEW page token"
-                )
-                suc = s.get_submit(
-                    url=s.submit_url,
-                    times=times,
-                    token=token2,
-                    roomid=roomid,
-                    seatid=first_seat,
-                    captcha=captcha2,
-                    action=action,
-                    value=value2,
-                )
+        delay = hedge_delay(HEDGE_PERCENTILE, HEDGE_DEFAULT_DELAY_MS, HEDGE_MIN_DELAY_MS)
+        hedge_result = hedged_call(_first_submit, _hedge_submit, delay, label="first submit")
+        logging.info(f"[strategic] Hedged first submit finished: {hedge_result}")
+        suc = bool(hedge_result.result)
+        if hedge_result.hedged:
+            # 第二份验证码已被备份请求用掉：第三份顶上，空出来的到对应的提交前再现解
+            captcha2, captcha3 = captcha3, ""
+            refill_captcha = "slide" if ENABLE_SLIDER else "textclick" if ENABLE_TEXTCLICK else None
+    else:
+        suc = _first_submit()
+
+    # 如果第一次没有成功：为第二次提交重新获取页面 token，再延迟 TARGET_OFFSET2_MS 毫秒提交
+    if not suc:
+        logging.info("[strategic] First submit failed, prepare second submit with NEW page token")
+
+        # 先重新获取一次页面 token
+        token2, value2 = s._get_page_token(page_url, require_value=True)
+        if not token2:
+            logging.error("[strategic] Failed to get page token for second submit, skip to third/normal flow")
+        else:
+            if refill_captcha and not captcha2:
+                captcha2 = s.resolve_captcha(refill_captcha)
+            send_dt2 = _beijing_now() + datetime.timedelta(milliseconds=TARGET_OFFSET2_MS)
+            while _beijing_now() < send_dt2:
+                time.sleep(0.02)
 
-        # 如果第二次仍未成功：为第三次提交再次获取新的 token，再延迟 TARGET_OFFSET3_MS 毫秒提交
-        if not suc:
-            logging.info("[strategic] Second submit failed, prepare third submit with NEW page token")
-
-            token3, value3 = s._get_page_token(
-                s.url.format(
-                    roomId=roomid,
-                    day=str(_beijing_now().date()),
-                    seatPageId=seat_page_id or "",
-                    fidEnc=fid_enc or "",
-                ),
-                require_value=True,
+            logging.info(
+                f"[strategic] Second submit at {send_dt2} (now + {TARGET_OFFSET2_MS}ms) with NEW page token"
+            )
+            suc = s.get_submit(
+                url=s.submit_url,
+                times=times,
+                token=token2,
+                roomid=roomid,
+                seatid=first_seat,
+                captcha=captcha2,
+                action=action,
+                value=value2,
+                day=cfg.day,
             )
-            if not token3:
-                logging.error("[strategic] Failed to get page token for third submit, give up strategic submits for this config")
-            else:
-                send_dt3 = _beijing_now() + datetime.timedelta(milliseconds=TARGET_OFFSET3_MS)
-                while _beijing_now() < send_dt3:
-                    time.sleep(0.02)
 
-                logging.info(
-                    f"[strategic] Third submit at {send_dt3} (now + {TARGET_OFFSET3_MS}ms) with NEW page token"
-                )
-                suc = s.get_submit(
-                    url=s.submit_url,
-                    times=times,
-                    token=token3,
-                    roomid=roomid,
-                    seatid=first_seat,
-                    captcha=captcha3,
-                    action=action,
-                    value=value3,
-                )
+    # 如果第二次仍未成功：为第三次提交再次获取新的 token，再延迟 TARGET_OFFSET3_MS 毫秒提交
+    if not suc:
+        logging.info("[strategic] Second submit failed, prepare third submit with NEW page token")
 
-        success_list[index] = suc
+        token3, value3 = s._get_page_token(page_url, require_value=True)
+        if not token3:
+            logging.error("[strategic] Failed to get page token for third submit, give up strategic submits for this config")
+        else:
+            if refill_captcha and not captcha3:
+                captcha3 = s.resolve_captcha(refill_captcha)
+            send_dt3 = _beijing_now() + datetime.timedelta(milliseconds=TARGET_OFFSET3_MS)
+            while _beijing_now() < send_dt3:
+                time.sleep(0.02)
 
-    return success_list
+            logging.info(
+                f"[strategic] Third submit at {send_dt3} (now + {TARGET_OFFSET3_MS}ms) with NEW page token"
+            )
+            suc = s.get_submit(
+                url=s.submit_url,
+                times=times,
+                token=token3,
+                roomid=roomid,
+                seatid=first_seat,
+                captcha=captcha3,
+                action=action,
+                value=value3,
+                day=cfg.day,
+            )
+
+    return suc
+
+
+def _open_probe(s, cfg, action: bool):
+    """开放探测：不带验证码提交首选座位，返回结果分类。已开放时这就是一次真实提交（可能直接约到）。
+
+    页面 token 在第一次探测前获取，之后复用，返回 token 类错误时重新获取。
+    """
+    token = {}
+
+    def probe():
+        if not token.get("token"):
+            token["token"], token["value"] = s._get_page_token(cfg.page_url, require_value=True)
+            if not token["token"]:
+                return submit_result.TOKEN
+        suc = s.get_submit(
+            url=s.submit_url,
+            times=cfg.times,
+            token=token["token"],
+            roomid=cfg.roomid,
+            seatid=cfg.seats[0],
+            captcha="",
+            action=action,
+            value=token["value"],
+            day=cfg.day,
+        )
+        if s.last_category == submit_result.TOKEN:
+            token.clear()
+        return submit_result.SUCCESS if suc else s.last_category
+
+    return probe
 
 
-def login_and_reserve(
-    users, usernames, passwords, action, success_list=None, sessions=None
-):
+def login_and_reserve(plan, action, success_list=None, sessions=None, exhausted_list=None):
     logging.info(
         f"Global settings: \nSLEEPTIME: {SLEEPTIME}\nENDTIME: {ENDTIME}\nENABLE_SLIDER: {ENABLE_SLIDER}\nENABLE_TEXTCLICK: {ENABLE_TEXTCLICK}\nRESERVE_NEXT_DAY: {RESERVE_NEXT_DAY}"
     )
 
-    usernames_list, passwords_list = None, None
-    if action:
-        if not usernames or not passwords:
-            raise Exception("USERNAMES or PASSWORDS not configured correctly in env")
-        usernames_list = usernames.split(",")
-        passwords_list = passwords.split(",")
-        if len(usernames_list) != len(passwords_list):
-            raise Exception("USERNAMES and PASSWORDS count mismatch")
-
     if success_list is None:
-        success_list = [False] * len(users)
+        success_list = [False] * len(plan.configs)
+    if exhausted_list is None:
+        exhausted_list = [False] * len(plan.configs)
+    open_at = plan.target_dt.timestamp()
 
-    # 如果传入了 sessions，但长度和 users 不匹配，则忽略 sessions，退回每轮重登
-    if sessions is not None and len(sessions) != len(users):
+    # 如果传入了 sessions，但比配置数少，则忽略 sessions，退回每轮重登
+    if sessions is not None and len(sessions) < len(plan.configs):
         logging.error("sessions length mismatch with users, ignore sessions and relogin each loop.")
         sessions = None
 
-    current_dayofweek = get_current_dayofweek(action)
-    for index, user in enumerate(users):
-        username = user["username"]
-        password = user["password"]
-        times = user["times"]
-        roomid = user["roomid"]
-        seatid = user["seatid"]
-        seat_page_id = user.get("seatPageId")
-        fid_enc = user.get("fidEnc")
-        daysofweek = user["daysofweek"]
-
-        # 如果今天不在该配置的 daysofweek 中，直接跳过
-        if current_dayofweek not in daysofweek:
-            logging.info("Today not set to reserve")
+    pending = []
+    for cfg in plan.configs:
+        index = cfg.index
+        # 今天不在该配置的 daysofweek 中 / 没有对应账号，直接跳过
+        if not cfg.active:
+            logging.info(f"Config #{index}: {cfg.skip_reason}")
             continue
 
-        if action:
-            if len(usernames_list) == 1:
-                # 只有一个账号，所有配置都用这个账号
-                username = usernames_list[0]
-                password = passwords_list[0]
-            elif index < len(usernames_list):
-                username = usernames_list[index]
-                password = passwords_list[index]
-            else:
-                logging.error(
-                    "Index out of range for USERNAMES/PASSWORDS, skipping this config."
-                )
-                continue
+        if exhausted_list[index]:
+            continue
 
-        if not success_list[index]:
-            logging.info(
-                f"----------- {username} -- {times} -- {seatid} try -----------"
-            )
+        # 之前的查询已经确认该账号约到了这个座位（例如另一个配置的 302 校验），不再重试
+        if not success_list[index] and VERIFIER.booked(cfg.username, cfg.day, cfg.roomid, cfg.times, cfg.seats):
+            logging.info(f"Config #{index}: booking already confirmed by reservation query")
+            success_list[index] = True
+            continue
 
-            # 根据 RELOGIN_EVERY_LOOP 决定是否复用会话
-            s = None
-            if sessions is not None:
-                s = sessions[index]
-                if s is None:
-                    # 该账号第一次使用：创建会话并登录
-                    s = reserve(
-                        sleep_time=SLEEPTIME,
-                        max_attempt=MAX_ATTEMPT,
-                        enable_slider=ENABLE_SLIDER,
-                        enable_textclick=ENABLE_TEXTCLICK,
-                        reserve_next_day=RESERVE_NEXT_DAY,
-                    )
-                    s.get_login_status()
-                    s.login(username, password)
-                    s.requests.headers.update({"Host": "office.chaoxing.com"})
-                    sessions[index] = s
-                else:
-                    # 复用已有会话，确保 Host 头正确
-                    s.requests.headers.update({"Host": "office.chaoxing.com"})
-            else:
-                # 维持原有行为：每一轮循环都重新创建会话并登录
-                s = reserve(
-                    sleep_time=SLEEPTIME,
-                    max_attempt=MAX_ATTEMPT,
-                    enable_slider=ENABLE_SLIDER,
-                    enable_textclick=ENABLE_TEXTCLICK,
-                    reserve_next_day=RESERVE_NEXT_DAY,
-                )
-                s.get_login_status()
-                s.login(username, password)
-                s.requests.headers.update({"Host": "office.chaoxing.com"})
-
-            # 在 GitHub Actions 中传入 ENDTIME，确保内部循环在超过结束时间后及时停止
-            suc = s.submit(
-                times,
-                roomid,
-                seatid,
-                action,
-                ENDTIME if action else None,
-                fidEnc=fid_enc,
-                seat_page_id=seat_page_id,
-            )
-            success_list[index] = suc
+        if not success_list[index]:
+            pending.append(cfg)
+
+    def _reserve(cfg):
+        return _reserve_config(cfg, plan, action, sessions, open_at)
+
+    if PARALLEL_CONFIGS and len(pending) > 1:
+        # 各配置使用独立会话，并行重试，一个配置的退避不拖慢其他配置
+        with ThreadPoolExecutor(max_workers=len(pending), thread_name_prefix="reserve") as pool:
+            results = list(pool.map(_reserve, pending))
+    else:
+        results = [_reserve(cfg) for cfg in pending]
+    for cfg, (suc, exhausted) in zip(pending, results):
+        success_list[cfg.index] = suc
+        # 全部候选座位已被占用 / 已有预约：后续循环不再重试该配置
+        exhausted_list[cfg.index] = exhausted
     return success_list
 
 
-def main(users, action=False):
-    target_dt = _get_beijing_target_from_endtime()
+def _reserve_config(cfg, plan, action, sessions, open_at):
+    """单个配置的一轮登录 + 提交，返回 (是否成功, 是否已无继续重试的必要)。"""
+    index = cfg.index
+    logging.info(
+        f"----------- {cfg.username} -- {list(cfg.times)} -- {list(cfg.seats)} try -----------"
+    )
+
+    # 根据 RELOGIN_EVERY_LOOP 决定是否复用会话
+    s = None
+    if sessions is not None:
+        s = sessions[index]
+        if s is None:
+            # 该账号第一次使用：创建会话并登录
+            s = _new_session(index, open_at=open_at)
+            s.get_login_status()
+            s.login(cfg.username, cfg.password, cfg.encrypted)
+            s.requests.headers.update({"Host": "office.chaoxing.com"})
+            sessions[index] = s
+        else:
+            # 复用已有会话，确保 Host 头正确
+            s.requests.headers.update({"Host": "office.chaoxing.com"})
+    else:
+        # 维持原有行为：每一轮循环都重新创建会话并登录
+        s = _new_session(index, open_at=open_at)
+        s.get_login_status()
+        s.login(cfg.username, cfg.password, cfg.encrypted)
+        s.requests.headers.update({"Host": "office.chaoxing.com"})
+
+    # 在 GitHub Actions 中传入 ENDTIME，确保内部循环在超过结束时间后及时停止
+    with PROFILER.phase("retry"):
+        suc = s.submit(
+            cfg.times,
+            cfg.roomid,
+            cfg.seats,
+            action,
+            plan.end_hms if action else None,
+            fidEnc=cfg.fid_enc,
+            seat_page_id=cfg.seat_page_id,
+            page_url=cfg.page_url,
+            day=cfg.day,
+        )
+    return suc, s.exhausted
+
+
+def main(users, action=False, sessions=None, strategic=None, plan=None):
+    """抢座主流程。
+
+    sessions: 预先登录好的会话列表（常驻模式传入），为 None 时按 RELOGIN_EVERY_LOOP 决定
+    strategic: 是否先执行一次有策略的第一次尝试，默认只在 action 模式下执行
+    plan: 启动时编译好的运行计划，为 None 时在这里编译
+    """
+    if strategic is None:
+        strategic = action
+    if plan is None:
+        plan = _compile_plan(users, action)
+    target_dt = plan.target_dt
     logging.info(
         f"start time {get_log_time(action)}, action {'on' if action else 'off'}, target_dt {target_dt}"
     )
     attempt_times = 0
-    usernames, passwords = None, None
-    if action:
-        usernames, passwords = get_user_credentials(action)
     success_list = None
+    exhausted_list = [False] * len(plan.configs)
 
     # 根据 RELOGIN_EVERY_LOOP 决定是否为每个用户维护持久会话
-    sessions = None
-    if not RELOGIN_EVERY_LOOP:
-        sessions = [None] * len(users)
+    if sessions is None and not RELOGIN_EVERY_LOOP:
+        sessions = [None] * len(plan.configs)
+    elif sessions is not None:
+        _fit_sessions(sessions, plan)
 
-    current_dayofweek = get_current_dayofweek(action)
-    today_reservation_num = sum(
-        1 for d in users if current_dayofweek in d.get("daysofweek")
-    )
+    today_reservation_num = plan.active_count
 
     # 只在 GitHub Actions 模式下执行一次“有策略”的第一次尝试
     strategic_done = False
 
-    while True:
-        # 使用逻辑时间 _now(action)，在 GitHub Actions 下就是北京时间
-        current_time = get_hms(action)
-        if current_time >= ENDTIME:
-            logging.info(
-                f"Current time {current_time} >= ENDTIME {ENDTIME}, stop main loop"
-            )
-            return
-
-        attempt_times += 1
+    with PROFILER.phase("warm-up"):
+        # 滑块验证码需要 OpenCV：在窗口开始前导入并预热（启动阶段已预热时为空操作）
+        if ENABLE_SLIDER:
+            warm_captcha_engine()
 
-        if not strategic_done and action:
-            success_list = strategic_first_attempt(
-                users, usernames, passwords, action, target_dt, success_list
+        if METRICS_ENABLED:
+            METRICS.start_run(
+                [c.as_user() for c in plan.configs], _strategy_settings(), target_dt.timestamp(), METRICS_PATH or None
             )
-            strategic_done = True
-        else:
-            # 后续尝试使用原有逻辑
-            # try:
-            success_list = login_and_reserve(
-                users, usernames, passwords, action, success_list, sessions
-            )
-            # except Exception as e:
-            #     print(f"An error occurred: {e}")
+        pinned_endpoints = _pin_endpoints(target_dt)
+        # 多节点协同：与协调服务对时并登记首选座位，计划里的时间点换算到本机时钟
+        if COORDINATOR is not None:
+            plan = COORDINATOR.join(plan)
+
+    try:
+        while True:
+            # 使用逻辑时间 _now(action)，在 GitHub Actions 下就是北京时间
+            current_time = get_hms(action)
+            if current_time >= plan.end_hms:
+                logging.info(
+                    f"Current time {current_time} >= ENDTIME {plan.end_hms}, stop main loop"
+                )
+                return success_list
 
-        print(
-            f"attempt time {attempt_times}, time now {current_time}, success list {success_list}"
-        )
-        if sum(success_list) == today_reservation_num:
-            print(f"reserved successfully!")
-            return
+            attempt_times += 1
 
+            if not strategic_done and strategic:
+                success_list = strategic_first_attempt(plan, action, success_list, sessions)
+                strategic_done = True
+            else:
+                # 后续尝试使用原有逻辑
+                # try:
+                success_list = login_and_reserve(
+                    plan, action, success_list, sessions, exhausted_list
+                )
+                # except Exception as e:
+                #     print(f"An error occurred: {e}")
 
-def debug(users, action=False):
+            if COORDINATOR is not None:
+                COORDINATOR.merge(success_list, plan)
+            print(
+                f"attempt time {attempt_times}, time now {current_time}, success list {success_list}"
+            )
+            if sum(success_list) == today_reservation_num:
+                print(f"reserved successfully!")
+                return success_list
+            if all(
+                success_list[c.index] or exhausted_list[c.index] or not c.active
+                for c in plan.configs
+            ):
+                logging.info("Every remaining config has all candidate seats taken, stop main loop")
+                return success_list
+    finally:
+        # 先落盘本次运行的指标，协调服务离线（leave 超时 / 抛错）时运行记录也不丢
+        try:
+            METRICS.finish(success_list)
+        finally:
+            # 解析表只在本窗口内生效，窗口之间恢复系统解析器
+            if pinned_endpoints is not None:
+                pinned_endpoints.uninstall()
+            if COORDINATOR is not None:
+                COORDINATOR.leave()
+
+
+def debug(users, action=False, plan=None):
     logging.info(
         f"Global settings: \nSLEEPTIME: {SLEEPTIME}\nENDTIME: {ENDTIME}\nENABLE_SLIDER: {ENABLE_SLIDER}\nENABLE_TEXTCLICK: {ENABLE_TEXTCLICK}\nRESERVE_NEXT_DAY: {RESERVE_NEXT_DAY}"
     )
     suc = False
     logging.info(f" Debug Mode start! , action {'on' if action else 'off'}")
 
-    usernames_list, passwords_list = None, None
-    if action:
-        usernames, passwords = get_user_credentials(action)
-        if not usernames or not passwords:
-            logging.error("USERNAMES or PASSWORDS not configured correctly in env.")
-            return
-        usernames_list = usernames.split(",")
-        passwords_list = passwords.split(",")
-        if len(usernames_list) != len(passwords_list):
-            logging.error("USERNAMES and PASSWORDS count mismatch.")
+    if plan is None:
+        try:
+            plan = _compile_plan(users, action)
+        except PlanError as e:
+            logging.error(f"Invalid config: {e}")
             return
 
-    current_dayofweek = get_current_dayofweek(action)
-    for index, user in enumerate(users):
-        username = user["username"]
-        password = user["password"]
-        times = user["times"]
-        roomid = user["roomid"]
-        seatid = user["seatid"]
-        seat_page_id = user.get("seatPageId")
-        fid_enc = user.get("fidEnc")
-        daysofweek = user["daysofweek"]
-        if type(seatid) == str:
-            seatid = [seatid]
-
-        # 如果今天不在该配置的 daysofweek 中，直接跳过，不处理账号
-        if current_dayofweek not in daysofweek:
-            logging.info("Today not set to reserve")
+    for cfg in plan.configs:
+        # 今天不在该配置的 daysofweek 中 / 没有对应账号，直接跳过，不处理账号
+        if not cfg.active:
+            logging.info(f"Config #{cfg.index}: {cfg.skip_reason}")
             continue
 
-        # 在 GitHub Actions 中，从环境变量获取账号密码
-        if action:
-            if len(usernames_list) == 1:
-                # 只有一个账号时，所有配置都用这个账号
-                username = usernames_list[0]
-                password = passwords_list[0]
-            elif index < len(usernames_list):
-                username = usernames_list[index]
-                password = passwords_list[index]
-            else:
-                logging.error(
-                    "Index out of range for USERNAMES/PASSWORDS, skipping this config."
-                )
-                continue
-
-        logging.info(f"----------- {username} -- {times} -- {seatid} try -----------")
-        s = reserve(
-            sleep_time=SLEEPTIME,
-            max_attempt=MAX_ATTEMPT,
-            enable_slider=ENABLE_SLIDER,
-            enable_textclick=ENABLE_TEXTCLICK,
-            reserve_next_day=RESERVE_NEXT_DAY,
-        )
+        logging.info(f"----------- {cfg.username} -- {list(cfg.times)} -- {list(cfg.seats)} try -----------")
+        s = _new_session(cfg.index)
         s.get_login_status()
-        s.login(username, password)
+        s.login(cfg.username, cfg.password, cfg.encrypted)
         s.requests.headers.update({"Host": "office.chaoxing.com"})
-        suc = s.submit(times, roomid, seatid, action, None, fidEnc=fid_enc, seat_page_id=seat_page_id)
+        suc = s.submit(
+            cfg.times,
+            cfg.roomid,
+            cfg.seats,
+            action,
+            None,
+            fidEnc=cfg.fid_enc,
+            seat_page_id=cfg.seat_page_id,
+            page_url=cfg.page_url,
+            day=cfg.day,
+        )
         if suc:
             return
 
 
+def _next_daemon_window(users, action):
+    """下一个需要执行的窗口：今天的目标时间还没过 ENDTIME 就是今天，否则顺延，跳过没有配置的星期。"""
+    target_dt = _get_beijing_target_from_endtime()
+    end_offset = datetime.timedelta(seconds=40)
+    now = _beijing_now()
+    for day in range(8):
+        candidate = target_dt + datetime.timedelta(days=day)
+        if candidate + end_offset <= now:
+            continue
+        weekday = candidate.strftime("%A")
+        if any(weekday in u.get("daysofweek", []) for u in users):
+            return weekday, candidate
+    return None
+
+
+def _fit_sessions(sessions, plan):
+    """时段优化拆出的额外请求排在原配置之后，会话列表按计划补齐（常驻进程里各天的计划长度可能不同）。"""
+    if len(sessions) < len(plan.configs):
+        sessions.extend([None] * (len(plan.configs) - len(sessions)))
+
+
+def _warm_sessions(plan, sessions, label: str = "daemon"):
+    """为计划中今天执行的配置登录会话并预先建连，写入 sessions（按配置下标）。"""
+    with PROFILER.phase("warm-up"):
+        # 需要的重依赖提前导入，首个验证码不再付出 OpenCV 的导入时间
+        if ENABLE_SLIDER:
+            warm_captcha_engine()
+        # 为本窗口重新探测端点，窗口开始时才固定（上一个窗口可能还在重试）
+        table = _probe_endpoints(label)
+        if table is not None:
+            _PROBED_ENDPOINTS[plan.target_dt] = table
+        _fit_sessions(sessions, plan)
+        for cfg in plan.active():
+            index = cfg.index
+            s = sessions[index]
+            if s is None:
+                s = sessions[index] = _new_session(index)
+            s.reset_window(plan.target_dt.timestamp())
+            s.get_login_status()
+            s.login(cfg.username, cfg.password, cfg.encrypted)
+            s.requests.headers.update({"Host": "office.chaoxing.com"})
+            try:
+                # 预先建立到 office 的连接，窗口内的第一个请求不再做 TCP/TLS 握手
+                s.requests.get("https://office.chaoxing.com/", verify=False, timeout=5)
+            except Exception as e:
+                logging.warning(f"[{label}] Pre-connect for config #{index} failed: {e}")
+        logging.info(f"[{label}] Warmed {plan.active_count} sessions for {plan.target_dt}")
+
+
+def run_windows(users, action=False, plans=None):
+    """多窗口模式：一个进程按时间顺序执行 WINDOWS 中的全部窗口，
+    下一个窗口的会话预热和上一个窗口的重试尾巴重叠进行。"""
+    from utils.scheduler import WindowScheduler
+
+    if plans is None:
+        plans = _window_plans(users, action)
+    # 按编译好的计划确定长度：拆出的段排在原配置之后
+    size = max([len(users)] + [len(plan.configs) for _, plan in plans])
+    sessions = [None] * size
+    success_list = [False] * size
+
+    def run(name, plan):
+        result = main(users, action, sessions=sessions, strategic=True, plan=plan)
+        for cfg in plan.active():
+            success_list[cfg.index] = bool(result and result[cfg.index])
+        return result
+
+    WindowScheduler(
+        plans,
+        prepare=lambda name, plan: _warm_sessions(plan, sessions, label=f"window {name}"),
+        run=run,
+        prepare_margin=WINDOW_PREPARE_MARGIN_SECONDS,
+    ).run()
+    logging.info(f"[scheduler] All windows finished, success list {success_list}")
+    return success_list
+
+
+def daemon(users, action=False):
+    """常驻模式：保持导入的库和已登录会话，按时间表自动执行每个预约窗口。"""
+    from utils import daemon as reserve_daemon
+
+    sessions = [None] * len(users)
+
+    # 预热时编译的计划留给同一个窗口执行，两者用的是同一个 target_dt
+    plans = {}
+
+    def warm_up(target_dt):
+        plans[target_dt] = plan = _compile_plan(users, action, target_dt)
+        _warm_sessions(plan, sessions)
+
+    def run_window(target_dt):
+        plan = plans.pop(target_dt, None) or _compile_plan(users, action, target_dt)
+        return main(users, action, sessions=sessions, strategic=True, plan=plan)
+
+    reserve_daemon.ReserveDaemon(
+        next_window=lambda: _next_daemon_window(users, action),
+        warm_up=warm_up,
+        run_window=run_window,
+        wake_margin=DAEMON_WAKE_MARGIN_SECONDS,
+        control_address=DAEMON_CONTROL_ADDRESS,
+    ).run_forever(lead_seconds=STRATEGY_LOGIN_LEAD_SECONDS)
+
+
+def daemon_status(users, action=False):
+    """查询正在运行的常驻进程状态。"""
+    from utils import daemon as reserve_daemon
+
+    try:
+        print(json.dumps(reserve_daemon.query("status", DAEMON_CONTROL_ADDRESS), ensure_ascii=False, indent=2))
+    except OSError as e:
+        print(f"daemon not reachable at {DAEMON_CONTROL_ADDRESS}: {e}")
+
+
 def get_roomid(args1, args2):
     username = input("请输入用户名：")
     password = input("请输入密码：")
@@ -601,6 +1087,14 @@ def get_roomid(args1, args2):
     encode = input("请输入deptldEnc：")
     s.roomid(encode)
 
+    # 顺便抓取全部分页和座位布局，写入本地目录缓存，后续启动时离线校验配置
+    catalogue = RoomCatalogue.load(CATALOGUE_PATH or None, CATALOGUE_TTL_HOURS)
+    catalogue.refresh(s, encode)
+    catalogue.save()
+    for building in catalogue.buildings():
+        rooms = catalogue.find_rooms(building=building)
+        logging.info(f"[catalogue] {building}: {len(rooms)} rooms")
+
 
 if __name__ == "__main__":
     config_path = os.path.join(os.path.dirname(__file__), "config.json")
@@ -610,7 +1104,7 @@ if __name__ == "__main__":
         "-m",
         "--method",
         default="reserve",
-        choices=["reserve", "debug", "room"],
+        choices=["reserve", "debug", "room", "daemon", "status"],
         help="for debug",
     )
     parser.add_argument(
@@ -619,22 +1113,201 @@ if __name__ == "__main__":
         action="store_true",
         help="use --action to enable in github action",
     )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="print startup phase timings and an -X importtime style report of the slowest imports",
+    )
+    parser.add_argument(
+        "--profile", nargs="?", metavar="DIR", const=os.path.join(os.path.dirname(__file__), "profile"),
+        help="sample CPU stacks during the run, tagged by phase (login / warm-up / captcha / fire / retry); "
+        "writes collapsed stacks and an HTML flamegraph per phase to DIR (default ./profile) on exit",
+    )
+    parser.add_argument(
+        "--profile-interval-ms", type=float, default=5.0, help="sampling interval of --profile in milliseconds",
+    )
+    parser.add_argument("--record", metavar="PATH", help="record all HTTP traffic of this run to a cassette file")
+    parser.add_argument("--replay", metavar="PATH", help="serve HTTP responses from a recorded cassette instead of the network")
+    parser.add_argument(
+        "--replay-speed", type=float, default=1.0,
+        help="scale recorded latencies when replaying (1 = original, 0 = no waiting)",
+    )
     args = parser.parse_args()
-    func_dict = {"reserve": main, "debug": debug, "room": get_roomid}
-    with open(args.user, "r+") as data:
-        config = json.load(data)
-        usersdata = config["reserve"]
-
-        # 从 config.json 中读取策略相关配置（如果存在），覆盖默认值
-        strategy_cfg = config.get("strategy", {})
-        STRATEGY_LOGIN_LEAD_SECONDS = int(
-            strategy_cfg.get("login_lead_seconds", STRATEGY_LOGIN_LEAD_SECONDS)
-        )
-        STRATEGY_SLIDER_LEAD_SECONDS = int(
-            strategy_cfg.get("slider_lead_seconds", STRATEGY_SLIDER_LEAD_SECONDS)
-        )
+    if args.profile:
+        from utils.profiler import write_report
+
+        PROFILER.start(args.profile_interval_ms / 1000)
+        atexit.register(write_report, args.profile)
+    startup = StartupProfile(origin=_STARTUP_ORIGIN)
+    startup.mark("imports", time.perf_counter() - _STARTUP_ORIGIN)
+    func_dict = {
+        "reserve": main,
+        "debug": debug,
+        "room": get_roomid,
+        "daemon": daemon,
+        "status": daemon_status,
+    }
+    with startup.phase("load config"):
+        with open(args.user, "r+") as data:
+            config = json.load(data)
+            usersdata = config["reserve"]
+
+            # 从 config.json 中读取策略相关配置（如果存在），覆盖默认值
+            strategy_cfg = config.get("strategy", {})
+            STRATEGY_LOGIN_LEAD_SECONDS = int(
+                strategy_cfg.get("login_lead_seconds", STRATEGY_LOGIN_LEAD_SECONDS)
+            )
+            STRATEGY_SLIDER_LEAD_SECONDS = int(
+                strategy_cfg.get("slider_lead_seconds", STRATEGY_SLIDER_LEAD_SECONDS)
+            )
+
+            # 控制是否在每一轮主循环中都重新登录
+            RELOGIN_EVERY_LOOP = bool(config.get("relogin_every_loop", RELOGIN_EVERY_LOOP))
+
+            catalogue_cfg = config.get("catalogue", {})
+            CATALOGUE_PATH = catalogue_cfg.get("path", CATALOGUE_PATH)
+            CATALOGUE_TTL_HOURS = float(catalogue_cfg.get("ttl_hours", CATALOGUE_TTL_HOURS))
+
+            HEDGE_ENABLED = bool(strategy_cfg.get("hedge_enabled", HEDGE_ENABLED))
+            HEDGE_PERCENTILE = float(strategy_cfg.get("hedge_percentile", HEDGE_PERCENTILE))
+            HEDGE_DEFAULT_DELAY_MS = float(
+                strategy_cfg.get("hedge_default_delay_ms", HEDGE_DEFAULT_DELAY_MS)
+            )
+            HEDGE_MIN_DELAY_MS = float(strategy_cfg.get("hedge_min_delay_ms", HEDGE_MIN_DELAY_MS))
+
+            HOST_RATE_PER_SECOND = float(
+                strategy_cfg.get("host_rate_per_second", HOST_RATE_PER_SECOND)
+            )
+            HOST_BURST = float(strategy_cfg.get("host_burst", HOST_BURST))
+            HOST_BUDGET.configure(HOST_RATE_PER_SECOND, HOST_BURST)
+
+            DECONFLICT_SEATS = bool(strategy_cfg.get("deconflict_seats", DECONFLICT_SEATS))
+            PARALLEL_CONFIGS = bool(strategy_cfg.get("parallel_configs", PARALLEL_CONFIGS))
+
+            slots_cfg = config.get("slots", {})
+            SLOT_OPTIMIZE = bool(slots_cfg.get("optimize", SLOT_OPTIMIZE))
+            SLOT_MAX_BOOKING_MINUTES = int(slots_cfg.get("max_booking_minutes", SLOT_MAX_BOOKING_MINUTES))
+            SLOT_GRANULARITY_MINUTES = int(slots_cfg.get("granularity_minutes", SLOT_GRANULARITY_MINUTES))
 
-        # 控制是否在每一轮主循环中都重新登录
-        RELOGIN_EVERY_LOOP = bool(config.get("relogin_every_loop", RELOGIN_EVERY_LOOP))
+            metrics_cfg = config.get("metrics", {})
+            METRICS_ENABLED = bool(metrics_cfg.get("enabled", METRICS_ENABLED))
+            METRICS_PATH = metrics_cfg.get("path", METRICS_PATH)
 
-    func_dict[args.method](usersdata, args.action)
+            daemon_cfg = config.get("daemon", {})
+            DAEMON_WAKE_MARGIN_SECONDS = float(
+                daemon_cfg.get("wake_margin_seconds", DAEMON_WAKE_MARGIN_SECONDS)
+            )
+            DAEMON_CONTROL_ADDRESS = daemon_cfg.get("control_address", DAEMON_CONTROL_ADDRESS)
+
+            logging_cfg = config.get("logging", {})
+            LOG_MODE = logging_cfg.get("mode", LOG_MODE)
+            LOG_JSONL_PATH = logging_cfg.get("jsonl_path", LOG_JSONL_PATH)
+
+            WINDOWS = config.get("windows", WINDOWS)
+
+            verify_cfg = config.get("verify", {})
+            VERIFY_ENABLED = bool(verify_cfg.get("enabled", VERIFY_ENABLED))
+            VERIFIER.configure(VERIFY_ENABLED)
+
+            endpoints_cfg = config.get("endpoints", {})
+            ENDPOINT_PROBE = bool(endpoints_cfg.get("probe", ENDPOINT_PROBE))
+            ENDPOINT_HOSTS = list(endpoints_cfg.get("hosts") or ENDPOINT_HOSTS)
+            ENDPOINT_PROBE_SAMPLES = int(endpoints_cfg.get("samples", ENDPOINT_PROBE_SAMPLES))
+
+            slider_cfg = config.get("slider", {})
+            SLIDER_ENGINE = slider_cfg.get("engine", SLIDER_ENGINE)
+            SLIDE.configure(SLIDER_ENGINE)
+
+            textclick_cfg = config.get("textclick", {})
+            TEXTCLICK_CORPUS = bool(textclick_cfg.get("corpus", TEXTCLICK_CORPUS))
+            TEXTCLICK_CORPUS_PATH = textclick_cfg.get("corpus_path", TEXTCLICK_CORPUS_PATH)
+            TEXTCLICK_CORPUS_MAX_MB = float(textclick_cfg.get("corpus_max_mb", TEXTCLICK_CORPUS_MAX_MB))
+            textclick.configure_corpus(
+                TEXTCLICK_CORPUS, TEXTCLICK_CORPUS_PATH or None, int(TEXTCLICK_CORPUS_MAX_MB * 1024 * 1024)
+            )
+
+            coordinator_cfg = config.get("coordinator", {})
+            COORDINATOR_ADDRESS = coordinator_cfg.get("address", COORDINATOR_ADDRESS)
+            NODE_INDEX = int(os.environ.get("NODE_INDEX", coordinator_cfg.get("node_index", NODE_INDEX)))
+            NODE_COUNT = int(os.environ.get("NODE_COUNT", coordinator_cfg.get("node_count", NODE_COUNT)))
+            NODE_SPLIT = coordinator_cfg.get("split", NODE_SPLIT)
+            COORDINATOR_POLL_MS = float(coordinator_cfg.get("poll_interval_ms", COORDINATOR_POLL_MS))
+            if COORDINATOR_ADDRESS:
+                from utils.coordinator import COORDINATOR
+
+                COORDINATOR.configure(COORDINATOR_ADDRESS, f"node{NODE_INDEX}", COORDINATOR_POLL_MS / 1000)
+
+            open_cfg = config.get("open_detect", {})
+            OPEN_DETECT_ENABLED = bool(open_cfg.get("enabled", OPEN_DETECT_ENABLED))
+            OPEN_DETECT_LEAD_MS = float(open_cfg.get("lead_ms", OPEN_DETECT_LEAD_MS))
+            OPEN_DETECT_MAX_INTERVAL_MS = float(open_cfg.get("max_interval_ms", OPEN_DETECT_MAX_INTERVAL_MS))
+            OPEN_DETECT_MIN_INTERVAL_MS = float(open_cfg.get("min_interval_ms", OPEN_DETECT_MIN_INTERVAL_MS))
+            OPEN_DETECT_BUDGET = int(open_cfg.get("budget", OPEN_DETECT_BUDGET))
+            OPEN_DETECT_LATE_MS = float(open_cfg.get("late_ms", OPEN_DETECT_LATE_MS))
+            OPEN_DETECT.configure(
+                OPEN_DETECT_ENABLED, OPEN_DETECT_LEAD_MS, OPEN_DETECT_MAX_INTERVAL_MS,
+                OPEN_DETECT_MIN_INTERVAL_MS, OPEN_DETECT_BUDGET, OPEN_DETECT_LATE_MS,
+            )
+
+            lifetime_cfg = config.get("lifetime", {})
+            LIFETIME_MODEL_PATH = lifetime_cfg.get("model_path", LIFETIME_MODEL_PATH)
+            LIFETIME_RISK = float(lifetime_cfg.get("risk", LIFETIME_RISK))
+            LIFETIME_ADJUST_LEADS = bool(lifetime_cfg.get("adjust_leads", LIFETIME_ADJUST_LEADS))
+            if LIFETIME_ADJUST_LEADS:
+                from utils.lifetime import LIFETIME
+
+                LIFETIME.configure(LIFETIME_MODEL_PATH or None, LIFETIME_RISK)
+                if LIFETIME.kinds:
+                    logging.info(f"[lifetime] Loaded lifetime model ({LIFETIME.source}): {LIFETIME.summary()}")
+
+    if LOG_MODE == "queue":
+        start_queue_logging(LOG_JSONL_PATH or None)
+
+    # 有本地目录缓存时，离线校验并展开配置（seatid 范围、fidEnc 补全）；
+    # 房间 / 座位不存在时在窗口开始前直接退出
+    if args.method not in ("room", "status"):
+        with startup.phase("catalogue validation"):
+            catalogue = RoomCatalogue.load(CATALOGUE_PATH or None, CATALOGUE_TTL_HOURS)
+            if catalogue.rooms and catalogue.is_stale():
+                logging.warning("[catalogue] Cached catalogue is older than TTL, run with -m room to refresh")
+            if not validate_users(usersdata, catalogue):
+                raise SystemExit(1)
+
+    # 把配置和环境变量里的账号编译成运行计划：配置有误或账号缺失时在窗口开始前直接退出
+    plan = window_plans = None
+    if args.method in ("reserve", "debug", "daemon"):
+        with startup.phase("compile run plan"):
+            try:
+                plan = _compile_plan(usersdata, args.action)
+                if WINDOWS and args.method == "reserve":
+                    window_plans = _window_plans(usersdata, args.action)
+            except PlanError as e:
+                for problem in e.problems:
+                    logging.error(f"[plan] {problem}")
+                raise SystemExit(1)
+
+    # 本次运行会用到的重依赖在启动阶段（远早于 target_dt）就导入并预热；
+    # 用不到的（例如关闭滑块时的 numpy / cv2）保持懒加载，完全不导入
+    if ENABLE_SLIDER and args.method in ("reserve", "debug"):
+        with startup.phase("captcha engine warm-up"), PROFILER.phase("warm-up"):
+            warm_captcha_engine()
+
+    if args.record or args.replay:
+        from utils.cassette import Cassette
+
+        if args.replay:
+            CASSETTE = Cassette(args.replay, "replay", speed=args.replay_speed)
+            logging.info(f"[cassette] Replaying {len(CASSETTE.interactions)} interactions from {args.replay}")
+        else:
+            CASSETTE = Cassette(args.record, "record")
+            atexit.register(CASSETTE.save)
+
+    if args.profile_startup:
+        logging.info(startup.report(import_profile("main", cwd=os.path.dirname(os.path.abspath(__file__)))))
+
+    if window_plans:
+        run_windows(usersdata, args.action, plans=window_plans)
+    elif args.method in ("reserve", "debug"):
+        func_dict[args.method](usersdata, args.action, plan=plan)
+    else:
+        func_dict[args.method](usersdata, args.action)
@@ -0,0 +1,45 @@
+"""
+HTTP 录制 / 回放的离线测试：在本地模拟服务器上录制一次提交，关掉服务器后回放。
+"""
+
+import os
+import tempfile
+
+from utils import reserve
+from utils.cassette import Cassette
+from utils.mock_server import MockSeatServer
+
+
+def _attempt(s):
+    s.get_login_status()
+    s.login("user", "secret")
+    s.requests.headers.update({"Host": "office.chaoxing.com"})
+    page_url = s.url.format(roomId="12884", day="2026-10-20", seatPageId="12884", fidEnc="")
+    token, value = s._get_page_token(page_url, require_value=True)
+    return s.get_submit(s.submit_url, ["07:00", "13:00"], token, "12884", "008", value=value, day="2026-10-20")
+
+
+def test_record_then_replay():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "run.jsonl.gz")
+        with MockSeatServer(latency=0.01) as server:
+            recorder = Cassette(path, "record")
+            s = recorder.attach(server.attach(reserve(sleep_time=0, max_attempt=1)))
+            assert _attempt(s)
+            recorder.save()
+            urls = (s.login_page, s.login_url, s.url, s.submit_url)
+
+        cassette = Cassette(path, "replay", speed=0)
+        assert [i["route"].split()[0] for i in cassette.interactions] == ["GET", "POST", "GET", "POST"]
+        assert cassette.interactions[1]["query"]["password"] == "***"
+        assert cassette.interactions[3]["elapsed_ms"] >= 10
+
+        # 服务器已经关闭，回放仍然得到同样的结果
+        s = cassette.attach(reserve(sleep_time=0, max_attempt=1))
+        s.login_page, s.login_url, s.url, s.submit_url = urls
+        assert _attempt(s)
+
+
+if __name__ == "__main__":
+    test_record_then_replay()
+    print("ok")
@@ -0,0 +1,93 @@
+"""
+房间 / 座位目录离线测试：用假的 reserve 会话代替网络请求。
+"""
+
+import os
+import tempfile
+
+from utils.catalogue import RoomCatalogue, validate_users
+
+
+class FakeSession:
+    """模拟 reserve 的 room_list_page / seat_layout，两页共 3 个房间。"""
+
+    def __init__(self):
+        self.pages = {
+            1: [
+                {"id": 12884, "firstLevelName": "图书馆", "secondLevelName": "三楼", "thirdLevelName": "自习室A"},
+                {"id": 12885, "firstLevelName": "图书馆", "secondLevelName": "四楼", "thirdLevelName": "自习室B"},
+            ],
+            2: [
+                {"id": 9928, "firstLevelName": "教学楼", "secondLevelName": "一楼", "thirdLevelName": "阅览室"},
+            ],
+        }
+        self.layout_calls = 0
+
+    def room_list_page(self, encode, cpage=1, page_size=100):
+        return {"seatRoomList": self.pages.get(cpage, []), "totalPage": len(self.pages)}
+
+    def seat_layout(self, roomid):
+        self.layout_calls += 1
+        return [str(n) for n in range(1, 11)]
+
+
+def _build(tmpdir):
+    catalogue = RoomCatalogue(os.path.join(tmpdir, "catalogue.json"), ttl_hours=1)
+    session = FakeSession()
+    catalogue.refresh(session, "dept")
+    catalogue.save()
+    return catalogue, session
+
+
+def test_refresh_and_lookup():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        catalogue, _ = _build(tmpdir)
+        assert len(catalogue.rooms) == 3
+        assert [r["id"] for r in catalogue.find_rooms(building="图书馆", floor="三楼")] == ["12884"]
+        assert sorted(catalogue.rooms_with_seat("8")) == ["12884", "12885", "9928"]
+        assert catalogue.has_seat("12884", "010")
+        assert not catalogue.has_seat("12884", "011")
+
+
+def test_load_respects_ttl():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        catalogue, _ = _build(tmpdir)
+        loaded = RoomCatalogue.load(catalogue.path, ttl_hours=1)
+        assert loaded.get_room("9928")["name"] == "阅览室"
+        assert not loaded.is_stale()
+
+        # 未过期时再次 refresh 不会重新抓座位布局
+        session = FakeSession()
+        loaded.refresh(session)
+        assert session.layout_calls == 0
+
+
+def test_expand_config():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        catalogue, _ = _build(tmpdir)
+        users = [
+            {"building": "图书馆", "floor": "四楼", "seatid": "001-003"},
+            {"roomid": "9928", "seatid": ["099"]},
+        ]
+        assert not validate_users(users, catalogue)
+        assert users[0]["roomid"] == "12885"
+        # 目录里没有 seatPageId，缺省时不拿 roomid 猜
+        assert "seatPageId" not in users[0]
+        assert users[0]["seatid"] == ["001", "002", "003"]
+
+
+def test_validate_without_catalogue():
+    empty = RoomCatalogue()
+    users = [{"roomid": "9928", "seatid": "001-002"}]
+    assert validate_users(users, empty) and users[0]["seatid"] == ["001", "002"]
+    # "*" 需要目录里的座位列表
+    users = [{"roomid": "9928", "seatid": "*"}]
+    assert not validate_users(users, empty) and users[0]["seatid"] == "*"
+
+
+if __name__ == "__main__":
+    test_refresh_and_lookup()
+    test_load_respects_ttl()
+    test_expand_config()
+    test_validate_without_catalogue()
+    print("catalogue tests passed")
@@ -0,0 +1,55 @@
+"""
+紧凑会话的离线测试：共享请求头模板 / 连接池、有界的结构化提交记录，以及小规模的内存对比。
+"""
+
+from benchmarks import bench_memory
+from utils import reserve, submit_result
+from utils.mock_server import MockSeatServer
+from utils.reserve import LOGIN_HEADERS, SUBMIT_LOG_SIZE, SubmitRecord
+
+
+def test_shared_templates_and_pool():
+    a, b = reserve(), reserve()
+    assert not hasattr(a, "__dict__")
+    assert a.headers is b.headers and a.login_headers is LOGIN_HEADERS
+    try:
+        a.headers["Host"] = "x"
+        raise AssertionError("header template must be read-only")
+    except TypeError:
+        pass
+    assert a.requests.get_adapter("https://office.chaoxing.com/") is b.requests.get_adapter("https://x/")
+    clone = a.fork()
+    assert clone.requests is not a.requests and clone.submit_msg is a.submit_msg
+
+
+def test_submit_log_is_bounded_and_structured():
+    with MockSeatServer(seats={"001"}) as server:
+        s = server.attach(reserve(sleep_time=0, max_attempt=1))
+        s.get_login_status()
+        s.login("compact", "x")
+        s.requests.headers.update({"Host": "office.chaoxing.com"})
+        assert s.requests.headers is not LOGIN_HEADERS and LOGIN_HEADERS["Host"] == "passport2.chaoxing.com"
+        page_url = s.url.format(roomId="9928", day="2026-10-20", seatPageId="9928", fidEnc="")
+        token, value = s._get_page_token(page_url, require_value=True)
+        s.get_submit(s.submit_url, ["09:30", "22:00"], token, "9928", "002", value=value, day="2026-10-20")
+    record = s.submit_msg[-1]
+    assert isinstance(record, SubmitRecord)
+    assert (record.start, record.end, record.seat) == ("09:30", "22:00", "002")
+    assert record.category == submit_result.SEAT_TAKEN and not record.success and record.rtt > 0
+
+    for n in range(SUBMIT_LOG_SIZE * 3):
+        s._log_submit(n, ["09:30", "22:00"], "002", {"success": False, "msg": "x"}, submit_result.OTHER)
+    assert len(s.submit_msg) == SUBMIT_LOG_SIZE and s.submit_msg[0].at == SUBMIT_LOG_SIZE * 2
+
+
+def test_memory_smaller_than_legacy():
+    compact = bench_memory.run("compact", accounts=20, attempts=300)
+    legacy = bench_memory.run("legacy", accounts=20, attempts=300)
+    assert compact["after_attempts_bytes"] < legacy["after_attempts_bytes"] / 2
+
+
+if __name__ == "__main__":
+    test_shared_templates_and_pool()
+    test_submit_log_is_bounded_and_structured()
+    test_memory_smaller_than_legacy()
+    print("ok")
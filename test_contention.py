@@ -0,0 +1,38 @@
+"""
+竞争基准的离线测试：分布解析；竞争客户端很慢时我方约到，我方首抢很晚时被竞争客户端抢走。
+"""
+
+import random
+
+from benchmarks.bench_contention import parse_dist, run
+
+
+def test_parse_dist():
+    rng = random.Random(0)
+    assert parse_dist("const:40", rng)() == 0.04
+    assert 0.01 <= parse_dist("uniform:10:20", rng)() <= 0.02
+    try:
+        parse_dist("normal:10", rng)
+        raise AssertionError("normal needs mean and std")
+    except ValueError:
+        pass
+
+
+def test_win_and_loss_against_competitors():
+    fast = run(trials=1, competitors=2, our_latency="const:5", competitor_latency="const:5",
+               competitor_offset="const:1500", first_submit_offset_ms=0, window=2.5)
+    assert fast["wins"] == 1 and fast["outcomes"][0]["winner"] == "us"
+    assert 0 <= fast["first_arrival_ms"]["p50"] < 300
+    # 报告的是实际生效的参数：main.py 模块默认值 + 本次覆盖
+    assert fast["settings"]["first_submit_offset_ms"] == 0 and fast["settings"]["hedge_enabled"] is False
+
+    slow = run(trials=1, competitors=2, our_latency="const:5", competitor_latency="const:0",
+               competitor_offset="const:0", first_submit_offset_ms=800, window=2.5)
+    assert slow["wins"] == 0 and slow["outcomes"][0]["winner"] == "rival"
+    assert slow["winner_arrival_ms"]["p50"] < slow["outcomes"][0]["our_arrivals"][0] * 1000
+
+
+if __name__ == "__main__":
+    test_parse_dist()
+    test_win_and_loss_against_competitors()
+    print("ok")
@@ -0,0 +1,89 @@
+"""
+多节点协同的离线测试：计划拆分、协调服务上的对时 / 占用 / 发布，以及两个节点对同一座位的提交在本地模拟服务器上不重复。
+"""
+
+import datetime
+import time
+from zoneinfo import ZoneInfo
+
+from utils import reserve, submit_result
+from utils.coordinator import Coordinator, CoordinatorServer, split_plan
+from utils.mock_server import MockSeatServer
+from utils.run_plan import compile_plan
+
+TARGET = datetime.datetime(2026, 10, 19, 7, 59, 20, tzinfo=ZoneInfo("Asia/Shanghai"))
+
+
+def _plan(*claims):
+    users = [
+        {"username": f"u{i}", "password": "p", "times": list(times), "roomid": room, "seatid": list(seats),
+         "daysofweek": ["Monday"]}
+        for i, (room, times, seats) in enumerate(claims)
+    ]
+    return compile_plan(users, False, TARGET, "08:00:40")
+
+
+def test_split_plan():
+    plan = _plan(("1", ("07:00", "13:00"), ["001", "002", "003", "004"]), ("1", ("07:00", "13:00"), ["005"]))
+    roster, _ = split_plan(plan, 1, 2, "roster")
+    assert [c.active for c in roster.configs] == [False, True]
+    seats, _ = split_plan(plan, 1, 2, "seats")
+    assert seats.configs[0].seats == ("003", "004", "001", "002") and seats.active_count == 2
+    assert split_plan(plan, 0, 1)[0] is plan
+
+
+def test_claims_clock_and_results():
+    plan = _plan(("1", ("07:00", "13:00"), ["001", "002"]))
+    with CoordinatorServer("127.0.0.1:0", now=lambda: time.time() + 2.0) as server:
+        a = Coordinator().configure(server.address, "node0", poll_interval=0.05)
+        b = Coordinator().configure(server.address, "node1", poll_interval=0.05)
+        plan_a = a.join(plan)
+        plan_b = b.join(plan)
+        # 协调服务时钟快 2 秒：本机提前 2 秒开火
+        assert abs((plan.target_dt - plan_a.target_dt).total_seconds() - 2.0) < 0.1
+        assert plan.end_hms == "08:00:40" and plan_a.end_hms == "08:00:38"
+        # node0 先登记了 001，node1 的首选座位挪到 002
+        assert plan_a.configs[0].seats == ("001", "002") and plan_b.configs[0].seats == ("002", "001")
+
+        a.publish("won", 0, "1", plan.day, ["07:00", "13:00"], "001")
+        a._publisher.join()
+        b.refresh()
+        assert b.won_elsewhere(0) and not a.won_elsewhere(0)
+        assert b.seat_taken("1", plan.day, ["09:00", "10:00"], "001")
+        assert not b.seat_taken("1", plan.day, ["13:00", "19:00"], "001")
+        success_list = [False]
+        assert b.merge(success_list, plan_b) == [0] and success_list == [True]
+        a.leave()
+        b.leave()
+
+
+def test_nodes_do_not_submit_a_seat_already_won():
+    with MockSeatServer() as mock, CoordinatorServer("127.0.0.1:0") as server:
+        nodes = [Coordinator().configure(server.address, f"node{i}") for i in range(2)]
+        sessions = []
+        for i, node in enumerate(nodes):
+            node.window = "w"
+            s = mock.attach(reserve(sleep_time=0, max_attempt=2))
+            s.coordinator = node
+            s.metrics_key = i
+            s.get_login_status()
+            s.login(f"u{i}", "x")
+            sessions.append(s)
+        day = "2026-10-20"
+        page_url = sessions[0].url.format(roomId="9928", day=day, seatPageId="9928", fidEnc="")
+
+        assert sessions[0].submit(["09:30", "22:00"], "9928", ["001"], False, page_url=page_url, day=day)
+        nodes[0]._publisher.join()
+        nodes[1].refresh()
+        # node1 的另一个账号：001 已被 node0 约到，直接换到 002
+        assert sessions[1].submit(["09:30", "22:00"], "9928", ["001", "002"], False, page_url=page_url, day=day)
+        nodes[1]._publisher.join()
+        assert [r["seat"] for r in mock.submits] == ["001", "002"]
+        assert sessions[1].last_category == submit_result.SUCCESS
+
+
+if __name__ == "__main__":
+    test_split_plan()
+    test_claims_clock_and_results()
+    test_nodes_do_not_submit_a_seat_already_won()
+    print("ok")
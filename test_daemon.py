@@ -0,0 +1,64 @@
+"""
+常驻模式的离线测试：按时间表唤醒、预热后执行窗口，控制 socket 可查询状态和停止。
+"""
+
+import datetime
+import os
+import tempfile
+import time
+from zoneinfo import ZoneInfo
+
+from utils.daemon import ReserveDaemon, query
+
+
+def test_windows_warm_up_then_run_and_report_status():
+    now = datetime.datetime.now(ZoneInfo("Asia/Shanghai"))
+    windows = [("Monday", now + datetime.timedelta(seconds=0.3)), ("Tuesday", now + datetime.timedelta(seconds=0.6))]
+    upcoming = list(windows)
+    events = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        address = os.path.join(tmpdir, "daemon.sock")
+
+        def run_window(target_dt):
+            events.append(("run", target_dt, time.time()))
+            status = query("status", address)
+            assert status["state"] == "running" and status["next_window"]["target"] == target_dt.isoformat()
+            return [True]
+
+        daemon = ReserveDaemon(
+            next_window=lambda: upcoming.pop(0) if upcoming else None,
+            warm_up=lambda target_dt: events.append(("warm", target_dt, time.time())),
+            run_window=run_window,
+            wake_margin=0.1,
+            control_address=address,
+        )
+        daemon.run_forever(lead_seconds=0)
+        assert not os.path.exists(address)
+
+    assert [(kind, target) for kind, target, _ in events] == [
+        ("warm", windows[0][1]), ("run", windows[0][1]), ("warm", windows[1][1]), ("run", windows[1][1]),
+    ]
+    # 目标时间前 wake_margin 秒唤醒预热
+    assert events[0][2] >= windows[0][1].timestamp() - 0.1 - 0.05
+    assert daemon.status["windows_run"] == 2 and daemon.status["state"] == "stopped"
+    assert daemon.status["last_result"]["result"] == [True]
+
+
+def test_stop_command_ends_sleep():
+    far = datetime.datetime.now(ZoneInfo("Asia/Shanghai")) + datetime.timedelta(hours=1)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        address = os.path.join(tmpdir, "daemon.sock")
+        daemon = ReserveDaemon(lambda: ("Monday", far), lambda t: None, lambda t: None, control_address=address)
+        daemon.start_control_server()
+        assert query("stop", address) == {"ok": True, "state": "stopping"}
+        daemon._server.shutdown()
+        daemon._server.server_close()
+        # 收到 stop 后等待下一个窗口的睡眠立即结束
+        start = time.time()
+        assert not daemon._sleep_until(far.timestamp()) and time.time() - start < 1
+
+
+if __name__ == "__main__":
+    test_windows_warm_up_then_run_and_report_status()
+    test_stop_command_ends_sleep()
+    print("ok")
@@ -0,0 +1,51 @@
+"""
+跨配置座位去冲突的离线测试。
+"""
+
+import datetime
+from zoneinfo import ZoneInfo
+
+from utils.deconflict import deconflict, overlaps
+from utils.run_plan import compile_plan
+
+TARGET = datetime.datetime(2026, 10, 19, 7, 59, 20, tzinfo=ZoneInfo("Asia/Shanghai"))
+
+
+def _plan(*claims):
+    users = [
+        {"username": f"u{i}", "password": "p", "times": list(times), "roomid": room, "seatid": list(seats),
+         "daysofweek": ["Monday"]}
+        for i, (room, times, seats) in enumerate(claims)
+    ]
+    return compile_plan(users, False, TARGET, "08:00:40")
+
+
+def test_overlaps():
+    assert overlaps(["07:00", "13:00"], ["12:00", "14:00"])
+    assert not overlaps(["07:00", "13:00"], ["13:00", "19:00"])
+
+
+def test_adjacent_slots_share_a_seat():
+    plan = _plan(("1", ("07:00", "13:00"), ["008"]), ("1", ("13:00", "19:00"), ["008"]))
+    new_plan, changes = deconflict(plan)
+    assert changes == [] and new_plan is plan
+
+
+def test_overlapping_claims_get_distinct_primary_seats():
+    plan = _plan(
+        ("1", ("07:00", "13:00"), ["008", "009"]),
+        ("1", ("09:00", "12:00"), ["008"]),
+        ("2", ("09:00", "12:00"), ["008"]),
+    )
+    new_plan, changes = deconflict(plan)
+    seats = [c.seats for c in new_plan.configs]
+    # 只有一个候选的 #1 拿到 008，#0 改用 009 并去掉 008；不同房间的 #2 不受影响
+    assert seats == [("009",), ("008",), ("008",)]
+    assert len(changes) == 1 and changes[0].startswith("config #0")
+
+
+if __name__ == "__main__":
+    test_overlaps()
+    test_adjacent_slots_share_a_seat()
+    test_overlapping_claims_get_distinct_primary_seats()
+    print("ok")
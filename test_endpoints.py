@@ -0,0 +1,92 @@
+"""
+端点探测的离线测试：对本地模拟服务器探测 localhost 的全部地址、固定解析结果，并写入运行指标；
+每个窗口预热时重新探测，窗口开始时才换表。
+"""
+
+import os
+import socket
+import sqlite3
+import tempfile
+
+import requests
+
+from utils.endpoints import EndpointTable
+from utils.metrics import MetricsRecorder
+from utils.mock_server import MockSeatServer
+
+
+def test_probe_pins_healthy_address_and_caches_dns():
+    with MockSeatServer() as server:
+        port = int(server.base_url.rsplit(":", 1)[1])
+        table = EndpointTable().probe(["localhost"], port=port, tls=False, samples=2, timeout=1)
+        rows = table.rows()
+        # 模拟服务器只监听 127.0.0.1，localhost 解析出的 ::1（如果有）不健康
+        assert table.pinned["localhost"] == "127.0.0.1"
+        assert [r["address"] for r in rows if r["pinned"]] == ["127.0.0.1"]
+        assert all(r["ok"] == (r["address"] == "127.0.0.1") for r in rows)
+
+        table.install()
+        try:
+            infos = socket.getaddrinfo("localhost", port, 0, socket.SOCK_STREAM)
+            assert [i[4][0] for i in infos] == ["127.0.0.1"]
+            # 没有探测过的 host 和 UDP 查询仍走系统解析器
+            assert socket.getaddrinfo("127.0.0.1", 80)
+            udp = socket.getaddrinfo("localhost", port, 0, socket.SOCK_DGRAM)
+            assert all(i[1] == socket.SOCK_DGRAM and i[2] != socket.IPPROTO_TCP for i in udp)
+            assert requests.get(f"http://localhost:{port}/mlogin", timeout=2).status_code == 200
+        finally:
+            table.uninstall()
+        assert socket.getaddrinfo is not table.getaddrinfo
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "metrics.sqlite")
+            recorder = MetricsRecorder()
+            recorder.start_run([], {}, None, path)
+            recorder.endpoints(rows)
+            recorder.finish([])
+            with sqlite3.connect(path) as conn:
+                saved = conn.execute("SELECT address, ok, pinned FROM endpoint_probes").fetchall()
+            assert ("127.0.0.1", 1, 1) in saved and len(saved) == len(rows)
+
+
+def test_each_window_pins_its_own_table():
+    import main as bot
+    from utils import endpoints
+
+    saved = endpoints.ENDPOINTS, bot.ENDPOINT_PROBE, bot.ENDPOINT_HOSTS, bot.ENDPOINT_PROBE_SAMPLES
+    saved_probe = EndpointTable.probe
+    with MockSeatServer() as server:
+        port = int(server.base_url.rsplit(":", 1)[1])
+        # 只探测本地模拟服务器
+        EndpointTable.probe = lambda self, hosts, samples: saved_probe(self, hosts, port, False, samples, 1)
+        bot.ENDPOINT_PROBE, bot.ENDPOINT_HOSTS, bot.ENDPOINT_PROBE_SAMPLES = True, ["localhost"], 1
+        first = second = None
+        try:
+            # 单次运行：窗口开始时现在探测并固定
+            first = bot._pin_endpoints("a")
+            assert socket.getaddrinfo == first.getaddrinfo and endpoints.ENDPOINTS is first
+            assert first.pinned["localhost"] == "127.0.0.1"
+
+            # 下一个窗口的预热在本窗口进行中探测，不替换正在生效的解析表
+            second = bot._probe_endpoints("window b")
+            bot._PROBED_ENDPOINTS["b"] = second
+            assert socket.getaddrinfo == first.getaddrinfo
+            first.uninstall()
+            assert socket.getaddrinfo is endpoints._original_getaddrinfo
+
+            # 下一个窗口开始时才换成为它探测的表
+            assert bot._pin_endpoints("b") is second and "b" not in bot._PROBED_ENDPOINTS
+            assert socket.getaddrinfo == second.getaddrinfo
+        finally:
+            for table in (first, second):
+                if table is not None:
+                    table.uninstall()
+            EndpointTable.probe = saved_probe
+            bot._PROBED_ENDPOINTS.clear()
+            endpoints.ENDPOINTS, bot.ENDPOINT_PROBE, bot.ENDPOINT_HOSTS, bot.ENDPOINT_PROBE_SAMPLES = saved
+
+
+if __name__ == "__main__":
+    test_probe_pins_healthy_address_and_caches_dns()
+    test_each_window_pins_its_own_table()
+    print("ok")
@@ -0,0 +1,141 @@
+"""
+对冲提交的离线测试：RTT 分位数、对冲等待时间，以及 hedged_call 的主请求胜出 / 补发胜出 /
+都失败 / 主请求晚到时补记节省时间几种路径。
+"""
+
+import logging
+import threading
+import time
+
+from utils import hedge
+from utils.hedge import RttTracker, hedge_delay, hedged_call
+
+
+class _Capture(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.INFO)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def _capture_logs():
+    handler = _Capture()
+    root = logging.getLogger()
+    saved_level = root.level
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+
+    def restore():
+        root.removeHandler(handler)
+        root.setLevel(saved_level)
+
+    return handler, restore
+
+
+def test_percentile_and_fallback():
+    tracker = RttTracker(maxlen=10)
+    assert tracker.percentile("submit", 90) is None
+    for i in range(1, 11):
+        tracker.record("page", i / 100)
+    assert tracker.percentile("page", 50) == 0.05
+    assert tracker.percentile("page", 90) == 0.09
+    assert tracker.percentile("page", 0) == 0.01 and tracker.percentile("page", 100) == 0.1
+    # 没有提交样本时退回页面请求的样本
+    assert tracker.percentile("submit", 90, fallback_kinds=("page",)) == 0.09
+    # 只保留最近 maxlen 个样本
+    tracker.record("page", 1.0)
+    assert tracker.samples("page")[0] == 0.02 and tracker.percentile("page", 100) == 1.0
+
+
+def test_hedge_delay():
+    saved = hedge.RTT
+    hedge.RTT = RttTracker()
+    try:
+        assert hedge_delay(90, 300, 80) == 0.3
+        assert hedge_delay(90, 50, 80) == 0.08
+        hedge.RTT.record("page", 0.2)
+        assert hedge_delay(90, 300, 80) == 0.2
+        hedge.RTT.record("submit", 0.01)
+        assert hedge_delay(90, 300, 80) == 0.08
+    finally:
+        hedge.RTT = saved
+
+
+def test_primary_wins_without_backup():
+    calls = []
+    result = hedged_call(lambda: "primary", lambda: calls.append("backup"), delay=0.5)
+    assert (result.result, result.winner, result.hedged) == ("primary", "primary", False)
+    assert calls == []
+
+
+def test_backup_wins_and_late_primary_reports_saving():
+    handler, restore = _capture_logs()
+    release = threading.Event()
+    primary_done = threading.Event()
+
+    def primary():
+        release.wait(2)
+        primary_done.set()
+        return "slow"
+
+    try:
+        result = hedged_call(primary, lambda: "fast", delay=0.02, label="t1")
+        assert (result.result, result.winner, result.hedged) == ("fast", "backup", True)
+        assert any("t1: backup won" in m and "primary still in flight" in m for m in handler.messages)
+        release.set()
+        primary_done.wait(2)
+        # 完成回调在主请求的线程里执行，稍等它写日志
+        deadline = time.time() + 2
+        while time.time() < deadline and not any("hedge saved" in m for m in handler.messages):
+            time.sleep(0.01)
+        assert any("t1: backup won" in m and "primary arrived" in m and "hedge saved" in m for m in handler.messages)
+    finally:
+        release.set()
+        restore()
+
+
+def test_both_fail_returns_last_result():
+    handler, restore = _capture_logs()
+
+    def primary():
+        time.sleep(0.1)
+        return False
+
+    def backup():
+        raise OSError("offline")
+
+    try:
+        result = hedged_call(primary, backup, delay=0.02, label="t2")
+        assert (result.result, result.winner, result.hedged) == (False, "primary", True)
+        assert any("t2: backup request raised offline" in m for m in handler.messages)
+        assert any("t2: primary won" in m and "hedge saved 0ms" in m for m in handler.messages)
+    finally:
+        restore()
+
+
+def test_primary_wins_after_backup_fired():
+    def backup():
+        time.sleep(0.2)
+        return "backup"
+
+    def primary():
+        time.sleep(0.05)
+        return "primary"
+
+    result = hedged_call(primary, backup, delay=0.01)
+    assert (result.result, result.winner, result.hedged) == ("primary", "primary", True)
+    # 没有补发请求时只能等主请求
+    result = hedged_call(primary, None, delay=0.01)
+    assert (result.result, result.hedged) == ("primary", False) and result.elapsed >= 0.05
+
+
+if __name__ == "__main__":
+    test_percentile_and_fallback()
+    test_hedge_delay()
+    test_primary_wins_without_backup()
+    test_backup_wins_and_late_primary_reports_saving()
+    test_both_fail_returns_last_result()
+    test_primary_wins_after_backup_fired()
+    print("ok")
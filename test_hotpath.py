@@ -0,0 +1,32 @@
+"""
+提交热路径的解析函数和基准回归门禁的离线测试。
+"""
+
+from benchmarks.bench_hotpath import RESULT_JSONP, SLIDE_JSONP, compare
+from utils.reserve import extract_submit_enc, parse_target_chars, unwrap_jsonp
+
+
+def test_page_and_captcha_parsing():
+    assert extract_submit_enc("<input type='hidden' name = 'submit_enc' data-x='1' value='tok'/>") == "tok"
+    assert extract_submit_enc("<html><body>登录已过期</body></html>") == ""
+    assert unwrap_jsonp(SLIDE_JSONP)["imageVerificationVo"]["cutoutImage"].endswith(".png")
+    assert unwrap_jsonp(RESULT_JSONP)["extraData"].startswith('{"validate"')
+    # 响应体里带括号时也只去掉外层回调
+    assert unwrap_jsonp('jQuery1_2({"msg":"(busy)"})') == {"msg": "(busy)"}
+    assert parse_target_chars('"朝" "阳" "系"') == ["朝", "阳", "系"]
+    assert parse_target_chars('"朝" "阳') == ["朝"]
+
+
+def test_regression_gate():
+    baseline = {"cases": {"enc": {"relative": 1.0}, "aes": {"relative": 2.0}}}
+    result = {"cases": {"enc": {"relative": 1.2}, "aes": {"relative": 2.8}, "new": {"relative": 5.0}}}
+    rows = {row[0]: row for row in compare(result, baseline, threshold=0.3)}
+    assert not rows["enc"][4]
+    assert rows["aes"][4]
+    assert rows["new"][1] is None and not rows["new"][4]
+
+
+if __name__ == "__main__":
+    test_page_and_captcha_parsing()
+    test_regression_gate()
+    print("ok")
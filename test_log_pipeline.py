@@ -0,0 +1,64 @@
+"""
+异步日志管道的离线测试：start_queue_logging 把 handler 挪到后台线程，stop_queue_logging
+刷出剩余日志、把 handler 还回去并关闭 JSONL 文件。
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+
+from utils import log_pipeline
+from utils.log_pipeline import JsonlHandler, start_queue_logging, stop_queue_logging
+
+
+class _Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append((record.getMessage(), threading.current_thread().name))
+
+
+def test_handlers_moved_and_restored():
+    logger = logging.getLogger("test.log_pipeline")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    capture = _Capture()
+    logger.addHandler(capture)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "log.jsonl")
+        try:
+            listener = start_queue_logging(path, logger)
+            # 重复调用是空操作
+            assert start_queue_logging(path, logger) is listener
+            assert len(logger.handlers) == 1 and isinstance(logger.handlers[0], log_pipeline._DeferredQueueHandler)
+            jsonl = next(h for h in listener.handlers if isinstance(h, JsonlHandler))
+
+            for n in range(50):
+                logger.info(f"line {n}")
+            logger.warning("seat %s taken", "008")
+        finally:
+            stop_queue_logging()
+
+        # 停止时刷出全部日志，handler 还给原 logger，JSONL 文件关闭
+        assert logger.handlers == [capture]
+        assert jsonl._file.closed
+        assert [m for m, _ in capture.records] == [f"line {n}" for n in range(50)] + ["seat 008 taken"]
+        assert all(thread != threading.current_thread().name for _, thread in capture.records)
+        with open(path, encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        assert len(lines) == 51 and lines[-1]["l"] == "WARNING" and lines[-1]["m"] == "seat 008 taken"
+
+        # 停止后日志回到同步输出，重复停止是空操作
+        stop_queue_logging()
+        logger.info("after stop")
+        assert capture.records[-1] == ("after stop", threading.current_thread().name)
+    logger.removeHandler(capture)
+
+
+if __name__ == "__main__":
+    test_handlers_moved_and_restored()
+    print("ok")
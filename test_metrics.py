@@ -0,0 +1,102 @@
+"""
+运行指标的离线测试：finish 写入 SQLite、aggregate 按周 + 策略参数聚合、report 命令行输出。
+"""
+
+import contextlib
+import io
+import json
+import os
+import sqlite3
+import tempfile
+
+from utils import metrics
+from utils.metrics import MetricsRecorder, aggregate
+
+USERS = [
+    {"roomid": "1", "seatid": ["008", "009"], "times": ["08:00", "12:00"]},
+    {"roomid": "2", "seatid": "010", "times": ["12:00", "18:00"]},
+]
+
+
+def _record(path, settings, target_ts, successes):
+    recorder = MetricsRecorder()
+    recorder.start_run(USERS, settings, target_ts, path)
+    recorder.started_at = target_ts - 60
+    # 开放探测的"未开放"不算首次提交
+    recorder.submit(0, "not_open", 0.05, target_ts - 0.2)
+    recorder.submit(0, "captcha", 0.08, target_ts + 0.1)
+    recorder.submit(0, "success", 0.12, target_ts + 0.3)
+    recorder.captcha(0, 0.4)
+    recorder.submit(1, "seat_taken", 0.2, target_ts + 0.05)
+    recorder.outcome(1, "exhausted")
+    recorder.finish(successes)
+    return recorder
+
+
+def test_finish_writes_run():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "metrics.sqlite")
+        target = 1_790_000_000.0
+        recorder = _record(path, {"offset": 100}, target, [True, False])
+        assert not recorder.enabled
+        # finish 之后的记录是空操作，也不会重复写入
+        recorder.submit(0, "success", 0.1, target)
+        recorder.finish([True, False])
+        with sqlite3.connect(path) as conn:
+            runs = conn.execute("SELECT run_id, target_ts, settings FROM runs").fetchall()
+            rows = conn.execute(
+                "SELECT idx, seats, first_submit_offset_ms, attempts, success, outcome, failures, captcha_ms, rtt_ms "
+                "FROM config_runs ORDER BY idx"
+            ).fetchall()
+        assert runs == [(recorder.run_id, target, json.dumps({"offset": 100}))]
+        first, second = rows
+        assert first[:6] == (0, '["008", "009"]', 100.0, 3, 1, "success")
+        assert json.loads(first[6]) == {"not_open": 1, "captcha": 1}
+        assert json.loads(first[7]) == [400.0] and json.loads(first[8]) == [50.0, 80.0, 120.0]
+        assert second[:6] == (1, '["010"]', 50.0, 1, 0, "exhausted")
+
+
+def test_aggregate_and_report():
+    week = 7 * 86400
+    # 周三上午（UTC），前后几小时都在同一个 ISO 周里
+    now = 1_790_150_000.0
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "metrics.sqlite")
+        _record(path, {"offset": 100}, now - 3600, [True, False])
+        _record(path, {"offset": 100}, now - 7200, [True, True])
+        _record(path, {"offset": 200}, now - 3600, [False, False])
+        _record(path, {"offset": 100}, now - week - 3600, [True, True])
+        # 超出统计范围的运行不计入
+        _record(path, {"offset": 100}, now - 10 * week, [True, True])
+
+        result = aggregate(path, weeks=2, now=now)
+        assert len(result) == 3
+        latest = [r for r in result if r["week"] == max(g["week"] for g in result)]
+        by_offset = {r["settings"]["offset"]: r for r in latest}
+        assert by_offset[100]["configs"] == 4 and by_offset[100]["success_rate"] == 0.75
+        assert by_offset[100]["attempts"] == 8
+        assert by_offset[100]["failures"] == {"not_open": 2, "captcha": 2, "seat_taken": 2}
+        assert by_offset[100]["first_submit_p50_ms"] == 100.0 and by_offset[100]["first_submit_p90_ms"] == 100.0
+        assert by_offset[200]["success_rate"] == 0.0
+        assert by_offset[100]["settings_key"] != by_offset[200]["settings_key"]
+
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            assert metrics.main(["report", "--db", path, "--weeks", "520", "--json"]) == 0
+        assert sum(r["configs"] for r in json.loads(out.getvalue())) == 10
+
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            assert metrics.main(["report", "--db", path, "--weeks", "520"]) == 0
+        text = out.getvalue()
+        assert text.splitlines()[0].startswith("week") and by_offset[200]["settings_key"] in text
+        assert '{"offset": 200}' in text
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert metrics.main(["report", "--db", os.path.join(tmp, "missing.sqlite")]) == 1
+
+
+if __name__ == "__main__":
+    test_finish_writes_run()
+    test_aggregate_and_report()
+    print("ok")
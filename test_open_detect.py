@@ -0,0 +1,79 @@
+"""
+开放探测的离线测试：探测时间表越来越密且有上限；在本地模拟服务器上探测到提前 / 推迟的开放，
+探测线程之外的配置拿到同一个开放时间，验证码导致结果说明不了时退回固定时间。
+"""
+
+import threading
+import time
+
+from utils import reserve, submit_result
+from utils.mock_server import MockSeatServer
+from utils.open_detect import MAX_INCONCLUSIVE, OpenDetector, probe_times
+
+DAY = "2026-10-20"
+
+
+def test_probe_times_get_denser_and_bounded():
+    times = probe_times(100.0, 1.5, 0.3, 0.03, 25, 3.0)
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    assert times[0] == 98.5 and len(times) == 25
+    assert abs(gaps[0] - 0.3) < 1e-9 and abs(min(gaps) - 0.03) < 1e-9
+    assert all(b <= a + 1e-9 for a, b in zip(gaps, gaps[1:]))
+    assert probe_times(100.0, 1.5, 0.3, 0.03, 1000, 0.5)[-1] <= 100.5
+
+
+def _probe(mock, seat="001"):
+    s = mock.attach(reserve(sleep_time=0, max_attempt=1))
+    s.get_login_status()
+    s.login("u", "x")
+    page_url = s.url.format(roomId="9928", day=DAY, seatPageId="9928", fidEnc="")
+    token, value = s._get_page_token(page_url, require_value=True)
+
+    def probe():
+        suc = s.get_submit(s.submit_url, ["09:30", "22:00"], token, "9928", seat, "", False, value, DAY)
+        return submit_result.SUCCESS if suc else s.last_category
+
+    return probe
+
+
+def _detect(offset: float):
+    """服务器在名义开放时间 + offset 秒开放，返回 (探测到的偏移, 负责探测的结果, 另一个配置拿到的偏移)。"""
+    nominal = time.time() + 0.5
+    with MockSeatServer(open_at=nominal + offset) as mock:
+        probe = _probe(mock)
+        detector = OpenDetector().configure(True, lead_ms=400, max_interval_ms=100, min_interval_ms=20, late_ms=1000)
+        detector.arm(nominal)
+        result, other = {}, {}
+        poller = threading.Thread(target=lambda: result.update(zip(("at", "category"), detector.wait(probe))))
+        poller.start()
+        time.sleep(0.05)
+        # 另一个配置：不探测，等探测线程的结果
+        other["at"] = detector.wait(None)[0]
+        poller.join()
+        assert detector.probes <= 25
+        return result["at"] - nominal, result["category"], other["at"] - nominal
+
+
+def test_detects_early_and_late_open():
+    early, category, shared = _detect(-0.2)
+    assert category == submit_result.SUCCESS and -0.25 < early < 0.0 and shared == early
+    late, category, _ = _detect(0.3)
+    assert category == submit_result.SUCCESS and 0.28 < late < 0.4
+
+
+def test_inconclusive_probes_fall_back():
+    with MockSeatServer(open_at=time.time() + 5, captcha_ttl=30) as mock:
+        probe = _probe(mock)
+        detector = OpenDetector().configure(True, lead_ms=100, min_interval_ms=10)
+        detector.arm(time.time() + 0.1)
+        opened_at, category = detector.wait(probe)
+        assert opened_at is None and category == submit_result.CAPTCHA
+        assert detector.probes == MAX_INCONCLUSIVE
+    assert OpenDetector().wait(probe) == (None, None)
+
+
+if __name__ == "__main__":
+    test_probe_times_get_denser_and_bounded()
+    test_detects_early_and_late_open()
+    test_inconclusive_probes_fall_back()
+    print("ok")
@@ -0,0 +1,51 @@
+"""
+自适应 pacer / 提交响应分类的离线测试。
+"""
+
+import time
+
+from utils import submit_result
+from utils.pacer import AdaptivePacer, HostBudget
+
+
+def test_classify():
+    assert submit_result.classify({"success": True}) == submit_result.SUCCESS
+    assert submit_result.classify(None) == submit_result.NETWORK
+    assert submit_result.classify({"success": False, "msg": "操作过于频繁，请稍后再试"}) == submit_result.THROTTLED
+    assert submit_result.classify({"success": False, "msg": "该座位已被预约"}) == submit_result.SEAT_TAKEN
+    assert submit_result.classify({"success": False, "msg": "请刷新后再提交预约(代码:302)"}) == submit_result.AMBIGUOUS
+    # 302 可能已经约到，要继续确认 / 重试，不算终止
+    assert submit_result.is_terminal(submit_result.SEAT_TAKEN)
+    assert not submit_result.is_terminal(submit_result.AMBIGUOUS)
+    assert not submit_result.is_terminal(submit_result.THROTTLED)
+
+
+def test_burst_then_backoff():
+    now = time.time()
+    pacer = AdaptivePacer(base_interval=0.1, open_at=now - 0.2, burst_seconds=1.0)
+    assert pacer.next_delay(now) == 0.0
+
+    pacer.on_response(submit_result.THROTTLED, 0.05)
+    pacer.on_response(submit_result.THROTTLED, 0.05)
+    assert pacer.next_delay(now) >= 0.4
+
+    for _ in range(20):
+        pacer.on_response(submit_result.OTHER, 0.05)
+    assert pacer.next_delay(now + 5) == 0.1
+
+
+def test_host_budget():
+    budget = HostBudget(rate=50, burst=2)
+    start = time.monotonic()
+    for _ in range(4):
+        budget.acquire("https://office.chaoxing.com/data/apps/seat/submit")
+    # 前 2 个令牌立即可用，后 2 个需要约 2/50 秒
+    assert time.monotonic() - start >= 0.03
+    assert budget.acquire("https://passport2.chaoxing.com/") == 0.0
+
+
+if __name__ == "__main__":
+    test_classify()
+    test_burst_then_backoff()
+    test_host_budget()
+    print("pacer tests passed")
@@ -0,0 +1,71 @@
+"""
+采样分析器的离线测试：按阶段归类、只统计消耗 CPU 的线程，写出 collapsed stack 和 HTML 火焰图。
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+from utils.profiler import OTHER, SamplingProfiler, flamegraph_html
+
+
+def _spin(seconds: float):
+    end = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < end:
+        total += sum(range(200))
+    return total
+
+
+def test_samples_are_tagged_by_phase_and_skip_idle_threads():
+    profiler = SamplingProfiler().start(0.002)
+
+    def busy():
+        with profiler.phase("captcha"):
+            _spin(0.3)
+        _spin(0.1)
+
+    def idle():
+        with profiler.phase("login"):
+            time.sleep(0.4)
+
+    threads = [threading.Thread(target=busy), threading.Thread(target=idle)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    profiler.stop()
+
+    captcha = profiler.samples["captcha"]
+    assert sum(captcha.values()) > 20
+    assert all("_spin (test_profiler.py" in stack for stack in captcha)
+    assert any("busy (test_profiler.py" in stack for stack in profiler.samples[OTHER])
+    # 只在 sleep 的线程不产生样本
+    assert sum(profiler.samples["login"].values()) <= 2
+    # 停止后打标记是空操作
+    assert profiler.tag("fire") is None and profiler._phases == {}
+
+
+def test_write_folded_and_html():
+    profiler = SamplingProfiler()
+    profiler.samples["fire"]["main (main.py:1);submit (reserve.py:10)"] = 3
+    profiler.samples["fire"]["main (main.py:1);<lambda> (reserve.py:20)"] = 1
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = profiler.write(tmpdir)
+        assert sorted(os.path.basename(p) for p in paths) == ["all.folded", "fire.folded", "fire.html"]
+        with open(os.path.join(tmpdir, "fire.folded"), encoding="utf-8") as f:
+            assert f.read().splitlines() == [
+                "main (main.py:1);<lambda> (reserve.py:20) 1",
+                "main (main.py:1);submit (reserve.py:10) 3",
+            ]
+        with open(os.path.join(tmpdir, "all.folded"), encoding="utf-8") as f:
+            assert f.readline().startswith("fire;main (main.py:1)")
+    page = flamegraph_html(profiler.samples["fire"], "fire")
+    assert "submit (reserve.py:10) — 3 samples (75.0%)" in page and "&lt;lambda&gt;" in page
+
+
+if __name__ == "__main__":
+    test_samples_are_tagged_by_phase_and_skip_idle_threads()
+    test_write_folded_and_html()
+    print("ok")
@@ -0,0 +1,82 @@
+"""
+运行计划编译的离线测试（账号、星期、URL、校验），以及在本地模拟服务器上按计划提交。
+"""
+
+import datetime
+from zoneinfo import ZoneInfo
+
+from utils import AES_Encrypt, reserve
+from utils.mock_server import MockSeatServer
+from utils.run_plan import PlanError, compile_plan, resolve_credentials
+
+TARGET = datetime.datetime(2026, 10, 19, 7, 59, 20, tzinfo=ZoneInfo("Asia/Shanghai"))  # Monday
+
+
+def _user(**overrides):
+    user = {
+        "username": "u",
+        "password": "p",
+        "times": ["07:00", "13:00"],
+        "roomid": "12884",
+        "seatid": "008",
+        "seatPageId": "12884",
+        "fidEnc": "abc",
+        "daysofweek": ["Monday"],
+    }
+    user.update(overrides)
+    return user
+
+
+def test_compile_plan():
+    users = [_user(), _user(seatid=["001", "002"], daysofweek=["Tuesday"])]
+    plan = compile_plan(users, False, TARGET, "08:00:40", login_lead_seconds=15, first_submit_offset_ms=200)
+    first, second = plan.configs
+    assert plan.weekday == "Monday" and plan.day == "2026-10-20"
+    assert first.active and first.seats == ("008",)
+    assert "id=12884&day=2026-10-20&backLevel=2&seatId=12884&fidEnc=abc" in first.page_url
+    assert not second.active and second.seats == ("001", "002")
+    # 登录用的密文在编译计划时算好，随配置保存；不执行的配置不加密
+    assert first.encrypted == (AES_Encrypt("u"), AES_Encrypt("p")) and second.encrypted == ()
+    assert plan.active_count == 1
+    assert plan.login_at == TARGET - datetime.timedelta(seconds=15)
+    assert plan.first_submit_at == TARGET + datetime.timedelta(milliseconds=200)
+
+
+def test_env_credentials():
+    users = [_user(), _user(), _user()]
+    assert resolve_credentials(users, True, "a", "x") == [("a", "x")] * 3
+    assert resolve_credentials(users, True, "a,b", "x,y") == [("a", "x"), ("b", "y"), None]
+    plan = compile_plan(users, True, TARGET, "08:00:40", credentials=resolve_credentials(users, True, "a,b", "x,y"))
+    assert plan.configs[2].skip_reason == "no credentials"
+    try:
+        resolve_credentials(users, True, "a,b", "x")
+        assert False, "count mismatch should fail"
+    except PlanError:
+        pass
+
+
+def test_validation_lists_every_problem():
+    users = [_user(times=["13:00", "07:00"]), _user(seatid=[], daysofweek=["Funday"])]
+    try:
+        compile_plan(users, False, TARGET, "08:00:40")
+        assert False, "invalid config should fail"
+    except PlanError as e:
+        assert len(e.problems) == 3
+
+
+def test_submit_with_plan():
+    with MockSeatServer() as server:
+        s = server.attach(reserve(sleep_time=0, max_attempt=1))
+        plan = compile_plan([_user()], False, TARGET, "08:00:40", page_url=s.url)
+        cfg = plan.configs[0]
+        s.login(cfg.username, cfg.password, cfg.encrypted)
+        assert s.submit(cfg.times, cfg.roomid, cfg.seats, False, page_url=cfg.page_url, day=cfg.day)
+        assert list(server.bookings)[0][1] == "2026-10-20"
+
+
+if __name__ == "__main__":
+    test_compile_plan()
+    test_env_credentials()
+    test_validation_lists_every_problem()
+    test_submit_with_plan()
+    print("ok")
@@ -0,0 +1,115 @@
+"""
+多窗口调度的离线测试：按时间顺序执行、预热与上一个窗口重叠、重试尾巴截断；
+超过最长时长的配置拆出的段跨窗口编号唯一，预热时会话列表按计划补齐。
+"""
+
+import datetime
+import threading
+import time
+from zoneinfo import ZoneInfo
+
+import main as bot
+from utils.run_plan import compile_plan
+from utils.scheduler import WindowScheduler
+
+USERS = [
+    {"username": "a", "password": "x", "times": ["08:00", "12:00"], "roomid": "1", "seatid": "001",
+     "daysofweek": ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]},
+    {"username": "b", "password": "y", "times": ["12:00", "18:00"], "roomid": "2", "seatid": "002",
+     "daysofweek": ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]},
+]
+
+
+def _plan(target, end, indices):
+    return compile_plan(USERS, False, target, end.strftime("%H:%M:%S"), indices=indices)
+
+
+def test_windows_run_in_order_with_overlapping_prepare():
+    now = datetime.datetime.now(ZoneInfo("Asia/Shanghai"))
+    first = _plan(now + datetime.timedelta(seconds=0.2), now + datetime.timedelta(hours=1), [0])
+    second = _plan(now + datetime.timedelta(seconds=2.2), now + datetime.timedelta(hours=1), [1])
+    events = []
+    lock = threading.Lock()
+
+    def prepare(name, plan):
+        with lock:
+            events.append(("prepare", name))
+
+    def run(name, plan):
+        with lock:
+            events.append(("run", name))
+        time.sleep(0.3 if name == "noon" else 2.5)
+        return [c.active for c in plan.configs]
+
+    scheduler = WindowScheduler([("noon", second), ("morning", first)], prepare, run, prepare_margin=0)
+    # 第一个窗口的结束时间被截断到第二个窗口的 slider_at
+    assert scheduler.windows[0][1].end_hms == second.slider_at.strftime("%H:%M:%S")
+    results = scheduler.run()
+
+    assert [e for e in events if e[0] == "run"] == [("run", "morning"), ("run", "noon")]
+    # 第二个窗口在第一个窗口执行期间完成预热
+    assert events.index(("prepare", "noon")) < events.index(("run", "noon"))
+    assert events.index(("prepare", "noon")) > events.index(("run", "morning"))
+    assert results["morning"] == [True, False] and results["noon"] == [False, True]
+
+
+class _FakeSession:
+    """只记录预热调用的会话。"""
+
+    def __init__(self, index):
+        self.index = index
+        self.logins = []
+        self.requests = self
+
+    headers = {}
+
+    def reset_window(self, open_at):
+        pass
+
+    def get_login_status(self):
+        pass
+
+    def login(self, username, password, encrypted=None):
+        self.logins.append(username)
+
+    def get(self, *args, **kwargs):
+        raise OSError("offline")
+
+
+def test_split_pieces_get_unique_indices_and_sessions():
+    every_day = USERS[0]["daysofweek"]
+    users = [
+        {"username": name, "password": "x", "times": ["09:30", "22:00"], "roomid": room, "seatid": "001",
+         "daysofweek": every_day}
+        for name, room in (("a", "1"), ("b", "2"))
+    ]
+    saved = bot.WINDOWS, bot._new_session, bot.ENDPOINT_PROBE, bot.ENABLE_SLIDER, bot.SLOT_OPTIMIZE
+    bot.WINDOWS = [{"name": "morning", "open_time": "08:00:00", "configs": [0]},
+                   {"name": "noon", "open_time": "12:00:00", "configs": [1]}]
+    bot._new_session = lambda index, open_at=None: _FakeSession(index)
+    bot.ENDPOINT_PROBE = bot.ENABLE_SLIDER = False
+    bot.SLOT_OPTIMIZE = True
+    try:
+        plans = dict(bot._window_plans(users, False))
+        morning, noon = plans["morning"], plans["noon"]
+        assert len(morning.configs) == len(noon.configs) == 6
+        assert all(c.index == n for plan in (morning, noon) for n, c in enumerate(plan.configs))
+        # 09:30-22:00 超过 360 分钟，每个窗口拆成 3 段，拆出的段各占不同的下标
+        assert [c.index for c in morning.active()] == [0, 2, 3]
+        assert [c.index for c in noon.active()] == [1, 4, 5]
+        assert not noon.configs[2].active and noon.configs[2].skip_reason == "split piece of another window"
+
+        # 常驻模式按原配置数建会话列表，预热时按计划补齐
+        plan = bot._compile_plan(users, False, morning.target_dt)
+        sessions = [None] * len(users)
+        bot._warm_sessions(plan, sessions)
+        assert len(sessions) == len(plan.configs) == 6
+        assert [s.logins for s in sessions if s] == [["a"], ["b"], ["a"], ["a"], ["b"], ["b"]]
+    finally:
+        bot.WINDOWS, bot._new_session, bot.ENDPOINT_PROBE, bot.ENABLE_SLIDER, bot.SLOT_OPTIMIZE = saved
+
+
+if __name__ == "__main__":
+    test_windows_run_in_order_with_overlapping_prepare()
+    test_split_pieces_get_unique_indices_and_sessions()
+    print("ok")
@@ -0,0 +1,34 @@
+"""
+批量签名的离线测试：verify_param_batch / enc_batch 与逐个调用 verify_param / enc 的结果完全一致。
+"""
+
+from benchmarks.bench_signing import ALGORITHM_VALUE, build_params
+from utils.encrypt import enc, enc_batch, verify_param, verify_param_batch
+
+
+def test_batch_matches_single_calls():
+    params = build_params(20, 3)
+    assert verify_param_batch(params, ALGORITHM_VALUE) == [verify_param(p, ALGORITHM_VALUE) for p in params]
+    assert enc_batch(params) == [enc(p) for p in params]
+
+
+def test_mixed_keys_and_per_item_values():
+    params = build_params(3, 1)
+    # 键集合不同的字典各自成组；没有共享前缀的组（第一个键就不同）也要一致
+    params.append({"roomId": "1", "seatNum": "009", "captcha": "v"})
+    params.append({"a": "1", "b": "2"})
+    params.append({"a": "3", "b": "2"})
+    values = [f"value{i}" for i in range(len(params))]
+    assert verify_param_batch(params, values) == [verify_param(p, v) for p, v in zip(params, values)]
+    assert verify_param_batch([], ALGORITHM_VALUE) == []
+    try:
+        verify_param_batch(params, values[:-1])
+        raise AssertionError("length mismatch should fail")
+    except ValueError:
+        pass
+
+
+if __name__ == "__main__":
+    test_batch_matches_single_calls()
+    test_mixed_keys_and_per_item_values()
+    print("ok")
@@ -0,0 +1,52 @@
+"""
+滑块引擎的离线测试：FFT 归一化互相关与 TM_CCOEFF_NORMED 一致，numpy 引擎在合成语料上的准确率不低于 cv2。
+"""
+
+import numpy as np
+
+from benchmarks.bench_slider import run, synthetic_case
+from utils import slide
+from utils.slide import SlideSolver, ncc
+
+
+def test_ncc_matches_ccoeff_normed():
+    rng = np.random.default_rng(0)
+    image = rng.random((40, 120))
+    template = image[5:25, 70:100].copy()
+    scores = ncc(image, template)
+    assert scores.shape == (21, 91)
+    assert np.unravel_index(int(np.argmax(scores)), scores.shape) == (5, 70)
+    assert abs(scores.max() - 1.0) < 1e-9
+    if slide._has_cv2():
+        import cv2
+
+        expected = cv2.matchTemplate(image.astype(np.float32), template.astype(np.float32), cv2.TM_CCOEFF_NORMED)
+        assert np.abs(scores - expected).max() < 1e-4
+
+
+def test_numpy_engine_on_synthetic_corpus():
+    cases = [synthetic_case(n, full_height=n % 2 == 0) for n in range(40)]
+    engines = ["numpy"] + (["cv2"] if slide._has_cv2() else [])
+    result = run(cases, engines)
+    assert result["numpy"]["correct"] >= 34
+    if "cv2" in result:
+        assert result["numpy"]["correct"] >= result["cv2"]["correct"]
+
+
+def test_solver_configure_and_warm():
+    solver = SlideSolver().configure("numpy")
+    assert solver.warm() == "numpy" and solver.warm_engine == "numpy"
+    bg, tp, x = synthetic_case(7)
+    assert abs(solver.locate(bg, tp) - x) <= 3
+    try:
+        solver.configure("tesseract")
+        raise AssertionError("unknown engine must be rejected")
+    except ValueError:
+        pass
+
+
+if __name__ == "__main__":
+    test_ncc_matches_ccoeff_normed()
+    test_numpy_engine_on_synthetic_corpus()
+    test_solver_configure_and_warm()
+    print("ok")
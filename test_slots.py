@@ -0,0 +1,40 @@
+"""
+时段拆分 / 合并优化的离线测试。
+"""
+
+import datetime
+from zoneinfo import ZoneInfo
+
+from utils.run_plan import compile_plan
+from utils.slots import optimize_slots, plan_slots
+
+TARGET = datetime.datetime(2026, 10, 19, 7, 59, 20, tzinfo=ZoneInfo("Asia/Shanghai"))
+
+
+def test_plan_slots():
+    shipped = [("07:00", "13:00"), ("13:00", "19:00"), ("19:00", "21:30")]
+    assert plan_slots(shipped, 360, 30) == shipped
+    assert plan_slots(shipped, 0) == [("07:00", "21:30")]
+    assert plan_slots([("07:00", "10:00"), ("09:00", "12:00")], 240, 30) == [("07:00", "11:00"), ("11:00", "12:00")]
+    assert plan_slots([("08:00", "09:00"), ("10:00", "11:00")], 360) == [("08:00", "09:00"), ("10:00", "11:00")]
+
+
+def test_optimize_slots_keeps_indices():
+    users = [
+        {"username": "a", "password": "p", "times": times, "roomid": "1", "seatid": ["008"], "daysofweek": ["Monday"]}
+        for times in (["07:00", "12:00"], ["12:00", "15:00"], ["15:00", "22:00"])
+    ]
+    plan = compile_plan(users, False, TARGET, "08:00:40")
+    new_plan, changes = optimize_slots(plan, 480, 30)
+    times = [(c.index, c.times, c.active) for c in new_plan.configs]
+    assert times == [(0, ("07:00", "15:00"), True), (1, ("15:00", "22:00"), True), (2, ("15:00", "22:00"), False)]
+    assert new_plan.configs[2].skip_reason == "merged into #0" and len(changes) == 1
+
+    new_plan, _ = optimize_slots(plan, 120, 30)
+    assert len(new_plan.configs) == 8 and new_plan.configs[-1].times == ("21:00", "22:00")
+
+
+if __name__ == "__main__":
+    test_plan_slots()
+    test_optimize_slots_keeps_indices()
+    print("ok")
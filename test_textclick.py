@@ -0,0 +1,89 @@
+"""
+选字验证码匹配的离线测试：候选字、形近字、排除法，以及语料上贪心与最优分配的求解率对比。
+"""
+
+import os
+import tempfile
+
+from utils import textclick
+from utils.tulingcloud_ocr import _glyph_candidates
+
+
+def _glyph(x, *candidates):
+    return {"x": x, "y": 10, "candidates": list(candidates)}
+
+
+def test_assignment_uses_candidates_and_similar_chars():
+    glyphs = [_glyph(1, ("己", 0.9)), _glyph(2, ("潮", 0.6), ("朝", 0.3)), _glyph(3, ("阳", 0.95))]
+    positions, confidence = textclick.match(["朝", "阳", "已"], glyphs)
+    assert [p["x"] for p in positions] == [2, 3, 1]
+    assert 0 < confidence < 1
+    # 贪心只认首选候选，会整张放弃
+    assert textclick.greedy_match(["朝", "阳", "已"], glyphs) is None
+
+
+def test_assignment_is_optimal_not_greedy():
+    # 按目标顺序逐个取最高分会把字形 1 给 "未"，"末" 只剩形近的字形 2（0.8*0.42 < 0.7*0.7）
+    glyphs = [_glyph(1, ("未", 0.8), ("末", 0.7)), _glyph(2, ("未", 0.7))]
+    positions, _ = textclick.match(["未", "末"], glyphs)
+    assert [p["x"] for p in positions] == [2, 1]
+
+
+def test_elimination_only_when_unambiguous():
+    glyphs = [_glyph(1, ("朝", 0.9)), _glyph(2, ("龟", 0.9)), _glyph(3, ("系", 0.9))]
+    positions, _ = textclick.match(["朝", "阳", "系"], glyphs)
+    assert [p["x"] for p in positions] == [1, 2, 3]
+    # 多一个字形时 "阳" 不知道该落在哪里
+    positions, _ = textclick.match(["朝", "阳", "系"], glyphs + [_glyph(4, ("鱼", 0.9))])
+    assert positions is None
+
+
+def test_ocr_candidates_parsing():
+    item = {"文字": "朝", "置信度": 88, "候选": [{"文字": "潮", "置信度": 10}]}
+    assert _glyph_candidates(item, "朝") == [("朝", 0.88), ("潮", 0.1)]
+    assert _glyph_candidates({"文字": "阳"}, "阳") == [("阳", 1.0)]
+
+
+def test_corpus_solve_rate():
+    ocr_ok = {"text": "朝阳系", "coordinates": [{"x": 1, "y": 1}, {"x": 2, "y": 2}, {"x": 3, "y": 3}]}
+    ocr_misread = {"text": "朝阴系", "coordinates": [{"x": 1, "y": 1}, {"x": 2, "y": 2}, {"x": 3, "y": 3}]}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "corpus.jsonl")
+        # 默认不记录
+        assert textclick.record(["朝"], ocr_ok, None, 0.0, path) is None and not os.path.exists(path)
+        textclick.configure_corpus(True, path)
+        try:
+            first = textclick.record(["朝", "阳", "系"], ocr_ok, ocr_ok["coordinates"], 1.0)
+            second = textclick.record(["系", "阳", "朝"], ocr_misread, None, 0.0)
+            # 排除法猜出来的答案没通过校验
+            guessed, _ = textclick.match(["朝", "阳", "系"], textclick.glyphs_from_ocr(ocr_misread))
+            third = textclick.record(["朝", "阳", "系"], ocr_misread, guessed, 0.1)
+            textclick.mark(first, True)
+            textclick.mark(third, False)
+            items = textclick.load_corpus()
+        finally:
+            textclick.configure_corpus(False)
+        assert items[0]["validated"] is True and "validated" not in items[1] and items[2]["validated"] is False
+        assert second
+        report = textclick.solve_rate(items)
+        # 只有有校验结果的两条计入，校验未通过的算失败
+        assert report["validated"] == 1 and report["rejected"] == 1
+        assert report["greedy_answered"] == 1 and report["assignment_answered"] == 2
+        assert report["greedy_correct"] == report["assignment_correct"] == 1
+        assert report["greedy_accuracy"] == report["assignment_accuracy"] == 0.5
+
+        # 超过大小上限后不再追加
+        textclick.configure_corpus(True, path, max_bytes=1)
+        try:
+            assert textclick.record(["朝"], ocr_ok, None, 0.0) is None
+        finally:
+            textclick.configure_corpus(False)
+        assert len(textclick.load_corpus(path)) == 3
+
+if __name__ == "__main__":
+    test_assignment_uses_candidates_and_similar_chars()
+    test_assignment_is_optimal_not_greedy()
+    test_elimination_only_when_unambiguous()
+    test_ocr_candidates_parsing()
+    test_corpus_solve_rate()
+    print("ok")
@@ -0,0 +1,46 @@
+"""
+预约结果校验的离线测试：记录归一化，以及在本地模拟服务器上确认"代码:302"的真实结果。
+"""
+
+import datetime
+
+from utils import reserve, submit_result
+from utils.mock_server import MockSeatServer
+from utils.verify import VERIFIER, find_booking, normalize
+
+
+def test_normalize():
+    start = int(datetime.datetime(2026, 10, 20, 7, 0, tzinfo=datetime.timezone(datetime.timedelta(hours=8))).timestamp() * 1000)
+    row = normalize({"roomId": 12884, "seatNum": "008", "startTime": start, "endTime": start + 6 * 3600 * 1000})
+    assert row == {"roomid": "12884", "seat": "008", "day": "2026-10-20", "start": "07:00", "end": "13:00"}
+    assert normalize({"roomId": 1, "statusName": "已取消"}) is None
+    assert find_booking([row], "2026-10-20", "12884", ["07:00", "13:00"], ["008"]) == row
+    assert find_booking([row], "2026-10-20", "12884", ["07:00", "13:00"], ["009"]) is None
+
+
+def _submit_once(server, seat="008"):
+    s = server.attach(reserve(sleep_time=0, max_attempt=1))
+    s.login("user", "pass")
+    token, value = s._get_page_token(s.url.format(roomId="12884", day="2026-10-20", seatPageId="", fidEnc=""), True)
+    suc = s.get_submit(s.submit_url, ["07:00", "13:00"], token, "12884", seat, value=value, day="2026-10-20")
+    return s, suc
+
+
+def test_ambiguous_is_verified():
+    VERIFIER.configure(True)
+    try:
+        with MockSeatServer(ambiguous="booked") as server:
+            s, suc = _submit_once(server)
+            assert suc and s.last_category == submit_result.SUCCESS
+            assert VERIFIER.booked("user", "2026-10-20", "12884", ["07:00", "13:00"], ["008"])
+        with MockSeatServer(ambiguous="dropped") as server:
+            s, suc = _submit_once(server)
+            assert not suc and s.last_category == submit_result.AMBIGUOUS
+    finally:
+        VERIFIER.configure(False)
+
+
+if __name__ == "__main__":
+    test_normalize()
+    test_ambiguous_is_verified()
+    print("ok")
@@ -1,5 +1,13 @@
 import os 
-from .encrypt import AES_Encrypt, generate_captcha_key, enc, verify_param
+from .encrypt import (
+    AES_Encrypt,
+    encrypt_credentials,
+    generate_captcha_key,
+    enc,
+    verify_param,
+    enc_batch,
+    verify_param_batch,
+)
 from .reserve import reserve
 
 def _fetch_env_variables(env_name, action):
@@ -0,0 +1,184 @@
+"""
+HTTP 录制 / 回放（cassette）
+
+在 reserve 会话的传输层（requests 的 HTTPAdapter）录下每个请求 / 响应和耗时，
+写成一个紧凑的 JSONL 文件（.gz 结尾时压缩）；回放时不联网，按录制顺序返回响应，
+并按原始耗时或缩放后的耗时等待，用来离线复现一次真实的抢座过程、回归测试和基准测试。
+
+    python main.py --record run.jsonl.gz      # 正常运行并录制
+    python main.py --replay run.jsonl.gz      # 用录制的响应回放（--replay-speed 0 表示不等待）
+
+录制时不保存 cookie，登录请求里的账号 / 密码字段和响应里的 Set-Cookie 会被替换掉。
+"""
+
+import base64
+import gzip
+import json
+import logging
+import threading
+import time
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+_REDACTED_FIELDS = {"uname", "password"}
+CASSETTE_VERSION = 1
+
+
+def _route(method: str, url: str) -> str:
+    """回放时按 "方法 路径" 匹配；查询参数和表单里的 enc / day / token 每次都不同，不参与匹配。"""
+    return f"{method.upper()} {urlsplit(url).path}"
+
+
+def _redact(pairs):
+    return {k: ("***" if k in _REDACTED_FIELDS else v) for k, v in pairs}
+
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class Cassette:
+    """一组录制的请求 / 响应。
+
+    mode: "record" 录制（透传到真实网络）或 "replay" 回放
+    speed: 回放耗时倍数，1 为原始耗时，0 为不等待
+    """
+
+    def __init__(self, path: str, mode: str = "replay", speed: float = 1.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"unknown cassette mode {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self.interactions = []
+        self._cursor = {}
+        self._lock = threading.Lock()
+        if mode == "replay":
+            self.load()
+
+    # ---------------- 文件 ----------------
+
+    def load(self):
+        with _open(self.path, "r") as f:
+            header = json.loads(f.readline())
+            if header.get("cassette") != CASSETTE_VERSION:
+                raise ValueError(f"{self.path} is not a cassette file")
+            self.interactions = [json.loads(line) for line in f if line.strip()]
+        self._cursor = {}
+        return self
+
+    def save(self):
+        with self._lock:
+            interactions = list(self.interactions)
+        with _open(self.path, "w") as f:
+            f.write(json.dumps({"cassette": CASSETTE_VERSION, "recorded_at": time.time()}) + "\n")
+            for item in interactions:
+                f.write(json.dumps(item, ensure_ascii=False, separators=(",", ":")) + "\n")
+        logging.info(f"[cassette] Saved {len(interactions)} interactions to {self.path}")
+
+    # ---------------- 录制 / 回放 ----------------
+
+    def record(self, request, response, elapsed: float):
+        split = urlsplit(request.url)
+        body = request.body or ""
+        if isinstance(body, bytes):
+            body = body.decode("utf-8", errors="replace")
+        content = response.content
+        try:
+            text, encoding = content.decode("utf-8"), "utf-8"
+        except UnicodeDecodeError:
+            text, encoding = base64.b64encode(content).decode("ascii"), "base64"
+        item = {
+            "t": round(time.time(), 3),
+            "route": _route(request.method, request.url),
+            "query": _redact(parse_qsl(split.query, keep_blank_values=True)),
+            "form": _redact(parse_qsl(body, keep_blank_values=True)) if body else {},
+            "status": response.status_code,
+            "content_type": response.headers.get("Content-Type", ""),
+            "elapsed_ms": round(elapsed * 1000, 2),
+            "encoding": encoding,
+            "body": text,
+        }
+        with self._lock:
+            self.interactions.append(item)
+
+    def next_for(self, method: str, url: str):
+        """按录制顺序取该路由的下一条响应；用完后重复最后一条，没有录到时返回 None。"""
+        route = _route(method, url)
+        with self._lock:
+            matches = [i for i in self.interactions if i["route"] == route]
+            if not matches:
+                return None
+            n = self._cursor.get(route, 0)
+            self._cursor[route] = n + 1
+            return matches[min(n, len(matches) - 1)]
+
+    def attach(self, session):
+        """把 reserve 实例（或 requests.Session）的 http/https 请求接到本 cassette 上。"""
+        http = getattr(session, "requests", session)
+        adapter = CassetteAdapter(self)
+        http.mount("http://", adapter)
+        http.mount("https://", adapter)
+        if http is not session:
+            session.cassette = self
+        return session
+
+
+class CassetteAdapter(HTTPAdapter):
+    def __init__(self, cassette: Cassette):
+        super().__init__()
+        self.cassette = cassette
+
+    def send(self, request, **kwargs):
+        if self.cassette.mode == "record":
+            start = time.perf_counter()
+            response = super().send(request, **kwargs)
+            # 先读完响应体再计时，和调用方看到的耗时一致
+            _ = response.content
+            self.cassette.record(request, response, time.perf_counter() - start)
+            return response
+
+        item = self.cassette.next_for(request.method, request.url)
+        if item is None:
+            raise requests.ConnectionError(f"[cassette] no recorded response for {_route(request.method, request.url)}")
+        if self.cassette.speed > 0:
+            time.sleep(item["elapsed_ms"] / 1000 * self.cassette.speed)
+        response = requests.Response()
+        response.status_code = item["status"]
+        response.headers = CaseInsensitiveDict({"Content-Type": item["content_type"]})
+        if item["encoding"] == "base64":
+            response._content = base64.b64decode(item["body"])
+        else:
+            response._content = item["body"].encode("utf-8")
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+
+def summary(path: str):
+    """按路由统计录制的请求数和耗时（ms）。"""
+    cassette = Cassette(path, "replay")
+    routes = {}
+    for item in cassette.interactions:
+        routes.setdefault(item["route"], []).append(item["elapsed_ms"])
+    return {
+        route: {"count": len(values), "min_ms": min(values), "max_ms": max(values),
+                "mean_ms": round(sum(values) / len(values), 2)}
+        for route, values in sorted(routes.items())
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 2:
+        print("usage: python -m utils.cassette <cassette file>")
+        raise SystemExit(1)
+    print(json.dumps(summary(sys.argv[1]), ensure_ascii=False, indent=2))
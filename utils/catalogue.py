@@ -0,0 +1,314 @@
+"""
+房间 / 座位目录（catalogue）模块
+
+把 room/list 的全部分页和每个房间的座位布局抓下来，保存成一个本地 JSON 索引，
+之后启动时可以不联网就完成：
+- 按 楼栋(firstLevelName) / 楼层(secondLevelName) / 房间名(thirdLevelName) 查房间；
+- 按座位号查有哪些房间包含该座位；
+- 校验 config.json 里的 roomid / seatid，并补全 fidEnc、展开座位范围。
+"""
+
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+CATALOGUE_VERSION = 1
+DEFAULT_CATALOGUE_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "room_catalogue.json"
+)
+DEFAULT_TTL_HOURS = 168  # 房间布局很少变化，默认一周刷新一次
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_WORKERS = 8
+
+
+def _format_seat(seat, width: int = 3) -> str:
+    """座位号统一为前端使用的 3 位补零字符串，例如 8 -> "008"。"""
+    seat = str(seat).strip()
+    return seat.zfill(width) if seat.isdigit() else seat
+
+
+def _expand_seat_range(spec: str):
+    """把 "001-010" 这样的范围展开为座位号列表；不是范围时返回 None。"""
+    if "-" not in spec:
+        return None
+    start, _, end = spec.partition("-")
+    if not (start.strip().isdigit() and end.strip().isdigit()):
+        return None
+    width = max(len(start.strip()), len(end.strip()), 3)
+    lo, hi = int(start), int(end)
+    if lo > hi:
+        lo, hi = hi, lo
+    return [str(n).zfill(width) for n in range(lo, hi + 1)]
+
+
+class RoomCatalogue:
+    """房间 / 座位目录，数据保存在内存字典中并带有查询索引。
+
+    rooms 结构（也是落盘 JSON 的结构）：
+        {roomid: {"id", "building", "floor", "name", "fidEnc",
+                  "seats": ["001", ...], "fetched_at": 时间戳}}
+    """
+
+    def __init__(self, path: str | None = None, ttl_hours: float = DEFAULT_TTL_HOURS):
+        self.path = path or DEFAULT_CATALOGUE_PATH
+        self.ttl_seconds = float(ttl_hours) * 3600
+        self.dept_id_enc = ""
+        self.fetched_at = 0.0
+        self.rooms = {}
+        self._by_building = {}
+        self._by_floor = {}
+        self._by_seat = {}
+
+    # ---------------- 持久化 ----------------
+
+    @classmethod
+    def load(cls, path: str | None = None, ttl_hours: float = DEFAULT_TTL_HOURS):
+        """从磁盘加载目录；文件不存在或损坏时返回空目录（不会联网）。"""
+        catalogue = cls(path, ttl_hours)
+        if not os.path.exists(catalogue.path):
+            return catalogue
+        try:
+            with open(catalogue.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"[catalogue] Failed to load {catalogue.path}: {e}")
+            return catalogue
+        if data.get("version") != CATALOGUE_VERSION:
+            logging.warning("[catalogue] Catalogue version mismatch, ignore cached file")
+            return catalogue
+        catalogue.dept_id_enc = data.get("deptIdEnc", "")
+        catalogue.fetched_at = float(data.get("fetched_at", 0))
+        catalogue.rooms = {str(k): v for k, v in data.get("rooms", {}).items()}
+        catalogue._build_index()
+        return catalogue
+
+    def save(self):
+        """原子写入：先写临时文件再替换，避免中途中断留下半个 JSON。"""
+        data = {
+            "version": CATALOGUE_VERSION,
+            "deptIdEnc": self.dept_id_enc,
+            "fetched_at": self.fetched_at,
+            "rooms": self.rooms,
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+        logging.info(f"[catalogue] Saved {len(self.rooms)} rooms to {self.path}")
+
+    # ---------------- 索引与查询 ----------------
+
+    def _build_index(self):
+        self._by_building, self._by_floor, self._by_seat = {}, {}, {}
+        for room_id, room in self.rooms.items():
+            self._by_building.setdefault(room.get("building", ""), []).append(room_id)
+            floor_key = (room.get("building", ""), room.get("floor", ""))
+            self._by_floor.setdefault(floor_key, []).append(room_id)
+            for seat in room.get("seats", []):
+                self._by_seat.setdefault(seat, []).append(room_id)
+
+    def is_stale(self, room_id: str | None = None) -> bool:
+        """判断整个目录（或单个房间的座位布局）是否超过 TTL。"""
+        if room_id is None:
+            fetched_at = self.fetched_at
+        else:
+            fetched_at = self.rooms.get(str(room_id), {}).get("fetched_at", 0)
+        return time.time() - fetched_at > self.ttl_seconds
+
+    def get_room(self, room_id):
+        return self.rooms.get(str(room_id))
+
+    def buildings(self):
+        return sorted(b for b in self._by_building if b)
+
+    def find_rooms(self, building: str | None = None, floor: str | None = None, name: str | None = None):
+        """按楼栋 / 楼层 / 房间名（子串匹配）查房间，返回房间字典列表。"""
+        if building is not None and floor is not None:
+            candidates = self._by_floor.get((building, floor), [])
+        elif building is not None:
+            candidates = self._by_building.get(building, [])
+        else:
+            candidates = list(self.rooms)
+        result = []
+        for room_id in candidates:
+            room = self.rooms[room_id]
+            if floor is not None and room.get("floor") != floor:
+                continue
+            if name is not None and name not in room.get("name", ""):
+                continue
+            result.append(room)
+        return result
+
+    def rooms_with_seat(self, seat):
+        """返回包含该座位号的所有房间 id。"""
+        return list(self._by_seat.get(_format_seat(seat), []))
+
+    def has_seat(self, room_id, seat) -> bool:
+        return str(room_id) in self._by_seat.get(_format_seat(seat), [])
+
+    # ---------------- 抓取 ----------------
+
+    def refresh(self, session, dept_id_enc: str | None = None, force: bool = False,
+                page_size: int = DEFAULT_PAGE_SIZE, workers: int = DEFAULT_WORKERS):
+        """联网刷新目录：并发拉取全部 room/list 分页，再并发拉取过期房间的座位布局。
+
+        参数:
+            session: 已登录的 reserve 实例
+            dept_id_enc: 学校的 deptIdEnc；为空时沿用目录里保存的值
+            force: True 时忽略 TTL，全部重新抓取
+        """
+        dept_id_enc = dept_id_enc or self.dept_id_enc
+        if not dept_id_enc:
+            raise ValueError("deptIdEnc is required to refresh the room catalogue")
+
+        if force or self.is_stale() or dept_id_enc != self.dept_id_enc:
+            room_entries = self._fetch_all_rooms(session, dept_id_enc, page_size, workers)
+            fresh_rooms = {}
+            for entry in room_entries:
+                room_id = str(entry.get("id", ""))
+                if not room_id:
+                    continue
+                old = self.rooms.get(room_id, {})
+                fresh_rooms[room_id] = {
+                    "id": room_id,
+                    "building": entry.get("firstLevelName", "") or "",
+                    "floor": entry.get("secondLevelName", "") or "",
+                    "name": entry.get("thirdLevelName", "") or "",
+                    "fidEnc": entry.get("fidEnc", "") or old.get("fidEnc", ""),
+                    "seats": old.get("seats", []),
+                    "fetched_at": old.get("fetched_at", 0),
+                }
+            self.rooms = fresh_rooms
+            self.dept_id_enc = dept_id_enc
+            self.fetched_at = time.time()
+
+        stale_ids = [rid for rid in self.rooms if force or self.is_stale(rid)]
+        if stale_ids:
+            logging.info(f"[catalogue] Fetching seat layouts for {len(stale_ids)} rooms")
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                layouts = pool.map(lambda rid: (rid, session.seat_layout(rid)), stale_ids)
+                for room_id, seats in layouts:
+                    if seats is None:
+                        continue
+                    self.rooms[room_id]["seats"] = sorted({_format_seat(s) for s in seats})
+                    self.rooms[room_id]["fetched_at"] = time.time()
+
+        self._build_index()
+        return self
+
+    @staticmethod
+    def _fetch_all_rooms(session, dept_id_enc, page_size, workers):
+        first = session.room_list_page(dept_id_enc, cpage=1, page_size=page_size)
+        rooms = list(first.get("seatRoomList") or [])
+        total_pages = _total_pages(first, page_size, len(rooms))
+        if total_pages > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                pages = pool.map(
+                    lambda p: session.room_list_page(dept_id_enc, cpage=p, page_size=page_size),
+                    range(2, total_pages + 1),
+                )
+                for page in pages:
+                    rooms.extend(page.get("seatRoomList") or [])
+        elif len(rooms) >= page_size:
+            # 接口没有返回总数时，退化为顺序翻页直到某页不满
+            cpage = 1
+            while True:
+                cpage += 1
+                page_rooms = session.room_list_page(
+                    dept_id_enc, cpage=cpage, page_size=page_size
+                ).get("seatRoomList") or []
+                rooms.extend(page_rooms)
+                if len(page_rooms) < page_size:
+                    break
+        logging.info(f"[catalogue] Fetched {len(rooms)} rooms in {max(total_pages, 1)} pages")
+        return rooms
+
+    # ---------------- 配置校验 / 展开 ----------------
+
+    def expand_config(self, user: dict) -> list:
+        """校验并展开单个预约配置（原地修改），返回问题描述列表（空列表表示通过）。
+
+        - roomid 为空但给了 building/floor/room 时，按目录解析出唯一房间；
+        - seatid 支持 "*"（房间全部座位）和 "001-010" 范围写法；
+        - 缺省的 fidEnc 用目录中保存的值补全；目录里没有 seatPageId，缺省时保持为空并打警告。
+
+        没有目录时只展开座位范围；"*" 需要目录里的座位列表，没有目录时报错。
+        """
+        problems = []
+        if not self.rooms:
+            seats = _expand_seats(user.get("seatid"), None)
+            if "*" in seats:
+                problems.append('seatid "*" needs a room catalogue, run with -m room first')
+            elif user.get("seatid"):
+                user["seatid"] = seats
+            return problems
+
+        room_id = str(user.get("roomid") or "")
+        if not room_id and any(user.get(k) for k in ("building", "floor", "room")):
+            matches = self.find_rooms(user.get("building"), user.get("floor"), user.get("room"))
+            if len(matches) == 1:
+                room_id = matches[0]["id"]
+                user["roomid"] = room_id
+            else:
+                problems.append(
+                    f"room query {user.get('building')}/{user.get('floor')}/{user.get('room')} "
+                    f"matched {len(matches)} rooms"
+                )
+                return problems
+
+        room = self.get_room(room_id)
+        if room is None:
+            problems.append(f"roomid {room_id} not found in catalogue")
+            return problems
+
+        if not user.get("seatPageId"):
+            logging.warning(f"[catalogue] room {room_id}: seatPageId is not set, the seat page URL is built without it")
+        if not user.get("fidEnc") and room.get("fidEnc"):
+            user["fidEnc"] = room["fidEnc"]
+
+        seats = _expand_seats(user.get("seatid"), room)
+        if room.get("seats"):
+            unknown = [s for s in seats if not self.has_seat(room_id, s)]
+            if unknown:
+                problems.append(f"seats {unknown} not found in room {room_id}")
+        user["seatid"] = seats
+        return problems
+
+
+def _expand_seats(seat_specs, room: dict | None) -> list:
+    """展开 seatid 里的 "*" 和范围写法；room 为空时 "*" 原样保留，由调用方报错。"""
+    if isinstance(seat_specs, str):
+        seat_specs = [seat_specs]
+    seats = []
+    for spec in seat_specs or []:
+        if spec == "*":
+            seats.extend(room.get("seats", []) if room is not None else [spec])
+            continue
+        expanded = _expand_seat_range(str(spec))
+        seats.extend(expanded if expanded is not None else [spec])
+    return seats
+
+
+def _total_pages(page: dict, page_size: int, first_count: int) -> int:
+    """从 room/list 返回中推断总页数；接口字段名不固定，依次尝试常见写法。"""
+    for key in ("totalPage", "pageCount", "pages"):
+        if page.get(key):
+            return int(page[key])
+    for key in ("total", "totalCount", "count"):
+        if page.get(key):
+            return max(1, -(-int(page[key]) // page_size))
+    return 1 if first_count < page_size else 0
+
+
+def validate_users(users: list, catalogue: RoomCatalogue) -> bool:
+    """启动时离线校验全部配置，逐条打印问题，有问题时返回 False；目录为空时只展开座位范围。"""
+    if not catalogue.rooms:
+        logging.info("[catalogue] No cached catalogue, only seat ranges are expanded")
+    ok = True
+    for index, user in enumerate(users):
+        for problem in catalogue.expand_config(user):
+            ok = False
+            logging.error(f"[catalogue] config #{index}: {problem}")
+    return ok
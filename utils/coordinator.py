@@ -0,0 +1,359 @@
+"""
+多节点协同抢座
+
+一个 GitHub runner 只有一个网络出口和一颗 CPU。协同模式下多个节点（runner）共用同一份 config.json：
+- 按 NODE_INDEX / NODE_COUNT 拆分：roster 模式每个配置只由一个节点执行；
+  seats 模式每个节点都执行全部配置，但候选座位轮转，各节点的首选座位互不相同；
+- 窗口开始前与协调服务对时，所有节点按协调服务的时钟对齐计划里的各个时间点（同一时刻开火）；
+- 开火前为每个配置的首选座位登记占用（claim），被别的节点占用的座位挪到候选末尾；
+- 约到 / 确认被占用的座位发布到协调服务，各节点后台轮询：
+  同一配置已被别的节点约到时直接视为成功，座位已被约走时不再对它提交。
+
+协调服务是一行一个 JSON 请求 / 回复的 TCP 服务，仓库内的实现只在内存里保存状态，
+本地测试和同一局域网内的节点可以直接使用：
+
+    python -m utils.coordinator --address 0.0.0.0:8765
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import socket
+import socketserver
+import threading
+import time
+
+from utils.deconflict import overlaps
+
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+SPLIT_MODES = ("roster", "seats")
+
+
+def _parse_address(address: str):
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def _seat_conflict(a, b) -> bool:
+    """同一房间、同一天、同一座位且时段重叠。"""
+    return (
+        a["roomid"] == b["roomid"] and a["day"] == b["day"] and a["seat"] == b["seat"]
+        and overlaps(a["times"], b["times"])
+    )
+
+
+def split_plan(plan, node_index: int, node_count: int, mode: str = "roster"):
+    """按节点拆分运行计划，返回 (新的 RunPlan, 日志用的变更说明列表)。"""
+    if node_count <= 1:
+        return plan, []
+    if mode not in SPLIT_MODES:
+        raise ValueError(f"unknown split mode {mode!r}, expected one of {SPLIT_MODES}")
+    configs = list(plan.configs)
+    changes = []
+    for cfg in plan.active():
+        if mode == "roster":
+            owner = cfg.index % node_count
+            if owner != node_index:
+                configs[cfg.index] = cfg._replace(active=False, skip_reason=f"assigned to node {owner}")
+                changes.append(f"config #{cfg.index}: assigned to node {owner}")
+            continue
+        shift = node_index * len(cfg.seats) // node_count
+        if shift:
+            seats = cfg.seats[shift:] + cfg.seats[:shift]
+            configs[cfg.index] = cfg._replace(seats=seats)
+            changes.append(f"config #{cfg.index}: seats {list(cfg.seats)} -> {list(seats)}")
+    return plan._replace(configs=tuple(configs)), changes
+
+
+# ---------------- 协调服务 ----------------
+
+class CoordinatorState:
+    """每个窗口的节点、座位占用、已约到的配置和已被约走的座位。"""
+
+    def __init__(self, now=None):
+        self._now = now or time.time
+        self._lock = threading.Lock()
+        self.windows = {}
+
+    def _window(self, window):
+        return self.windows.setdefault(window, {"nodes": {}, "claims": [], "wins": {}, "taken": []})
+
+    def handle(self, request):
+        op = request.get("op")
+        if op == "time":
+            return {"now": self._now()}
+        window = request.get("window")
+        node = request.get("node")
+        with self._lock:
+            state = self._window(window)
+            if node is not None:
+                state["nodes"][node] = self._now()
+            if op == "join":
+                return {"ok": True, "nodes": sorted(state["nodes"])}
+            if op == "claim":
+                seat = {k: request[k] for k in ("roomid", "day", "times", "seat")}
+                for claim in state["claims"]:
+                    if claim["node"] != node and _seat_conflict(claim, seat):
+                        return {"granted": False, "owner": claim["node"]}
+                state["claims"].append(dict(seat, node=node))
+                return {"granted": True, "owner": node}
+            if op == "publish":
+                seat = {k: request[k] for k in ("roomid", "day", "times", "seat")}
+                state["taken"].append(dict(seat, node=node, config=request.get("config")))
+                if request.get("kind") == "won" and request.get("config") is not None:
+                    state["wins"].setdefault(str(request["config"]), dict(seat, node=node))
+                return {"ok": True}
+            if op == "state":
+                return {"wins": state["wins"], "taken": state["taken"], "nodes": sorted(state["nodes"])}
+        return {"ok": False, "error": f"unknown op {op!r}"}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                reply = self.server.state.handle(json.loads(line.decode("utf-8")))
+            except (ValueError, KeyError, TypeError) as e:
+                reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            self.wfile.write((json.dumps(reply, ensure_ascii=False) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class CoordinatorServer:
+    """仓库内的协调服务：with CoordinatorServer("127.0.0.1:0") as server: server.address ..."""
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, now=None):
+        self.state = CoordinatorState(now)
+        self._server = _Server(_parse_address(address), _Handler)
+        self._server.state = self.state
+        host, port = self._server.server_address[:2]
+        self.address = f"{host}:{port}"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True, name="coordinator").start()
+        logging.info(f"[coordinator] Listening on {self.address}")
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# ---------------- 节点端 ----------------
+
+class Coordinator:
+    """节点端：对时、登记占用、发布结果，并在后台轮询其他节点的结果。
+
+    未配置 address 时所有方法都是空操作，查询方法返回 False。
+    """
+
+    def __init__(self):
+        self.address = ""
+        self.node = "node0"
+        self.poll_interval = 0.2
+        self.timeout = 2.0
+        self.window = None
+        self.offset = 0.0
+        self.rtt = None
+        self._wins = {}
+        self._taken = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._poller = None
+        self._publisher = None
+
+    def configure(self, address: str = "", node: str = "node0", poll_interval: float = 0.2, timeout: float = 2.0):
+        self.address = address or ""
+        self.node = node
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        return self
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.address)
+
+    def request(self, op: str, **fields):
+        payload = dict(fields, op=op, node=self.node, window=self.window)
+        with socket.create_connection(_parse_address(self.address), timeout=self.timeout) as sock:
+            sock.sendall((json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8"))
+            data = b""
+            while not data.endswith(b"\n"):
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+        return json.loads(data.decode("utf-8"))
+
+    def sync_clock(self, samples: int = 5):
+        """取往返最短的一次：offset = 协调服务时钟 - 本机时钟。"""
+        best = None
+        for _ in range(samples):
+            t0 = time.time()
+            now = self.request("time")["now"]
+            t1 = time.time()
+            if best is None or t1 - t0 < best[0]:
+                best = (t1 - t0, now - (t0 + t1) / 2)
+        self.rtt, self.offset = best
+        return self.offset
+
+    def align(self, plan, min_offset: float = 0.005):
+        """把计划里的时间点换算到本机时钟：协调服务时钟到 target_dt 时本机开火。"""
+        if abs(self.offset) < min_offset:
+            return plan
+        shift = datetime.timedelta(seconds=-self.offset)
+        # 结束时间只精确到秒（主循环和提交循环都按 HH:MM:SS 比较），换算后四舍五入到秒
+        end_dt = datetime.datetime.combine(
+            plan.target_dt.date(), datetime.time.fromisoformat(plan.end_hms), plan.target_dt.tzinfo
+        ) + shift
+        end_dt = (end_dt + datetime.timedelta(milliseconds=500)).replace(microsecond=0)
+        return plan._replace(
+            target_dt=plan.target_dt + shift,
+            login_at=plan.login_at + shift,
+            slider_at=plan.slider_at + shift,
+            first_submit_at=plan.first_submit_at + shift,
+            end_hms=end_dt.strftime("%H:%M:%S"),
+        )
+
+    def claim_primary(self, plan):
+        """为每个配置的首选座位登记占用；被别的节点占用的座位挪到候选末尾。返回新的 RunPlan。"""
+        configs = list(plan.configs)
+        for cfg in plan.active():
+            seats = list(cfg.seats)
+            for _ in range(len(seats)):
+                reply = self.request("claim", roomid=cfg.roomid, day=cfg.day, times=list(cfg.times), seat=seats[0])
+                if reply.get("granted"):
+                    break
+                logging.info(f"[coordinator] Seat {seats[0]} of config #{cfg.index} claimed by {reply.get('owner')}")
+                seats.append(seats.pop(0))
+            if tuple(seats) != cfg.seats:
+                configs[cfg.index] = cfg._replace(seats=tuple(seats))
+        return plan._replace(configs=tuple(configs))
+
+    def join(self, plan):
+        """窗口开始前调用：对时、登记首选座位、启动后台轮询，返回对齐后的 RunPlan。
+
+        协调服务不可用时记录警告并原样返回计划，本节点按单机模式继续。
+        """
+        if not self.enabled:
+            return plan
+        self.leave()
+        self.window = plan.target_dt.isoformat()
+        with self._lock:
+            self._wins, self._taken = {}, []
+        try:
+            self.sync_clock()
+            reply = self.request("join")
+            plan = self.claim_primary(self.align(plan))
+        except (OSError, ValueError) as e:
+            logging.warning(f"[coordinator] Coordinator {self.address} unavailable, run standalone: {e}")
+            return plan
+        logging.info(
+            f"[coordinator] Node {self.node} joined window {self.window}, nodes {reply.get('nodes')}, "
+            f"clock offset {self.offset * 1000:+.1f}ms (rtt {self.rtt * 1000:.1f}ms)"
+        )
+        self._stop.clear()
+        self._poller = threading.Thread(target=self._poll, daemon=True, name="coordinator-poll")
+        self._poller.start()
+        return plan
+
+    def leave(self):
+        self._stop.set()
+        if self._poller is not None:
+            self._poller.join(timeout=self.timeout)
+            self._poller = None
+
+    def refresh(self):
+        """拉取一次其他节点发布的结果。"""
+        reply = self.request("state")
+        with self._lock:
+            self._wins = {int(k): v for k, v in reply.get("wins", {}).items()}
+            self._taken = reply.get("taken", [])
+        return reply
+
+    def _poll(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except (OSError, ValueError) as e:
+                logging.debug(f"[coordinator] Poll failed: {e}")
+
+    def publish(self, kind: str, config, roomid, day, times, seat):
+        """发布约到（won）/ 已被约走（taken）的座位；在后台线程发送，不阻塞提交循环。"""
+        if not self.enabled:
+            return
+        fields = dict(kind=kind, config=config, roomid=str(roomid), day=str(day), times=list(times), seat=str(seat))
+        with self._lock:
+            self._taken.append(dict(fields, node=self.node))
+            if kind == "won" and config is not None:
+                self._wins.setdefault(config, dict(fields, node=self.node))
+
+        def send():
+            try:
+                self.request("publish", **fields)
+            except (OSError, ValueError) as e:
+                logging.warning(f"[coordinator] Failed to publish {kind} seat {seat}: {e}")
+
+        self._publisher = threading.Thread(target=send, daemon=True, name="coordinator-publish")
+        self._publisher.start()
+
+    def won_elsewhere(self, config) -> bool:
+        """该配置是否已被别的节点约到。"""
+        if not self.enabled or config is None:
+            return False
+        # _wins 由后台轮询线程整体替换，和 seat_taken 一样在锁内读取
+        with self._lock:
+            win = self._wins.get(config)
+        return win is not None and win.get("node") != self.node
+
+    def seat_taken(self, roomid, day, times, seat) -> bool:
+        """该座位在重叠时段是否已被约走（任何节点发布的）。"""
+        if not self.enabled:
+            return False
+        probe = {"roomid": str(roomid), "day": str(day), "times": list(times), "seat": str(seat)}
+        with self._lock:
+            return any(_seat_conflict(t, probe) for t in self._taken)
+
+    def merge(self, success_list, plan):
+        """把别的节点约到的配置并入 success_list，返回新并入的配置下标。"""
+        merged = []
+        for cfg in plan.active():
+            if not success_list[cfg.index] and self.won_elsewhere(cfg.index):
+                success_list[cfg.index] = True
+                merged.append(cfg.index)
+        if merged:
+            logging.info(f"[coordinator] Configs {merged} already booked by other nodes")
+        return merged
+
+
+# 全局节点端：main 按 config.json 的 coordinator 配置设置
+COORDINATOR = Coordinator()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m utils.coordinator")
+    parser.add_argument("--address", default=DEFAULT_ADDRESS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    server = CoordinatorServer(args.address)
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,166 @@
+"""
+常驻（daemon）模式
+
+用于自托管 runner：进程常驻，提前导入依赖、保持已登录的会话和连接，
+每个预约窗口到来前自动唤醒、预热，然后执行和 GitHub Actions 相同的抢座流程，
+避免每次冷启动（安装依赖 / 导入 OpenCV / 登录）挤占关键时间。
+
+状态通过本地控制 socket 查询：
+    python main.py -m status
+"""
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+
+DEFAULT_CONTROL_ADDRESS = "/tmp/chaoxing-reserve.sock"
+
+
+def _parse_address(address: str):
+    """"/path/to.sock" 使用 Unix socket；"host:port" 使用本机 TCP（不支持 Unix socket 的系统）。"""
+    if ":" not in address or address.startswith("/"):
+        return socket.AF_UNIX, address
+    host, _, port = address.rpartition(":")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+class _ControlHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        command = self.rfile.readline().decode("utf-8").strip() or "status"
+        reply = self.server.daemon_ref.handle_command(command)
+        self.wfile.write((json.dumps(reply, ensure_ascii=False, default=str) + "\n").encode("utf-8"))
+
+
+class _UnixControlServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _TcpControlServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class ReserveDaemon:
+    """按时间表循环：等待 -> 预热 -> 执行窗口 -> 记录结果。
+
+    参数:
+        next_window: 无参函数，返回下一个窗口的 (窗口名, 目标时间 datetime)，没有窗口时返回 None
+        warm_up: 函数 warm_up(target_dt)，在窗口前 wake_margin 秒调用，负责登录 / 预导入 / 预连接
+        run_window: 函数 run_window(target_dt)，执行抢座并返回结果（会记录到状态里）
+        wake_margin: 在（目标时间 - 登录提前量）之前多少秒唤醒做预热
+    """
+
+    def __init__(self, next_window, warm_up, run_window, wake_margin: float = 60.0,
+                 control_address: str = DEFAULT_CONTROL_ADDRESS, now=None):
+        self.next_window = next_window
+        self.warm_up = warm_up
+        self.run_window = run_window
+        self.wake_margin = wake_margin
+        self.control_address = control_address
+        self._now = now or time.time
+        self._stop = threading.Event()
+        self._server = None
+        self.status = {
+            "pid": os.getpid(),
+            "started_at": self._now(),
+            "state": "starting",
+            "next_window": None,
+            "windows_run": 0,
+            "last_result": None,
+            "last_error": None,
+        }
+
+    # ---------------- 控制 socket ----------------
+
+    def handle_command(self, command: str):
+        if command == "status":
+            status = dict(self.status)
+            status["uptime_seconds"] = round(self._now() - status["started_at"], 1)
+            return status
+        if command == "stop":
+            self.stop()
+            return {"ok": True, "state": "stopping"}
+        return {"ok": False, "error": f"unknown command {command}"}
+
+    def start_control_server(self):
+        family, address = _parse_address(self.control_address)
+        if family == socket.AF_UNIX:
+            if os.path.exists(address):
+                os.unlink(address)
+            self._server = _UnixControlServer(address, _ControlHandler)
+        else:
+            self._server = _TcpControlServer(address, _ControlHandler)
+        self._server.daemon_ref = self
+        threading.Thread(target=self._server.serve_forever, daemon=True, name="daemon-control").start()
+        logging.info(f"[daemon] Control socket listening on {self.control_address}")
+
+    def stop(self):
+        self._stop.set()
+
+    # ---------------- 主循环 ----------------
+
+    def _sleep_until(self, ts: float) -> bool:
+        """睡到 ts；期间收到 stop 返回 False。"""
+        while not self._stop.is_set():
+            remaining = ts - self._now()
+            if remaining <= 0:
+                return True
+            self._stop.wait(min(remaining, 30))
+        return False
+
+    def run_forever(self, lead_seconds: float = 0.0):
+        self.start_control_server()
+        try:
+            while not self._stop.is_set():
+                window = self.next_window()
+                if window is None:
+                    logging.info("[daemon] No upcoming window, daemon exits")
+                    break
+                name, target_dt = window
+                self.status.update(state="sleeping", next_window={"name": name, "target": target_dt.isoformat()})
+                wake_ts = target_dt.timestamp() - lead_seconds - self.wake_margin
+                logging.info(f"[daemon] Next window {name} at {target_dt}, wake up for warm-up at {wake_ts:.0f}")
+                if not self._sleep_until(wake_ts):
+                    break
+
+                try:
+                    self.status["state"] = "warming"
+                    self.warm_up(target_dt)
+                    self.status["state"] = "running"
+                    result = self.run_window(target_dt)
+                    self.status.update(last_result={"name": name, "target": target_dt.isoformat(), "result": result})
+                    self.status["last_error"] = None
+                except Exception as e:
+                    logging.exception(f"[daemon] Window {name} failed")
+                    self.status["last_error"] = f"{name}: {e}"
+                self.status["windows_run"] += 1
+                # 避免窗口执行得很快时同一个窗口被重复调度
+                self._sleep_until(max(self._now(), target_dt.timestamp()) + 1)
+        finally:
+            self.status["state"] = "stopped"
+            if self._server is not None:
+                self._server.shutdown()
+                self._server.server_close()
+                family, address = _parse_address(self.control_address)
+                if family == socket.AF_UNIX and os.path.exists(address):
+                    os.unlink(address)
+
+
+def query(command: str = "status", address: str = DEFAULT_CONTROL_ADDRESS, timeout: float = 5.0):
+    """向正在运行的 daemon 发送命令并返回解析后的 JSON 回复。"""
+    family, addr = _parse_address(address)
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(addr)
+        sock.sendall((command + "\n").encode("utf-8"))
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = sock.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+    return json.loads(data.decode("utf-8"))
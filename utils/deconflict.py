@@ -0,0 +1,102 @@
+"""
+跨配置座位去冲突
+
+多个配置在同一房间、时段重叠时抢同一个座位，只会互相挤掉（后到的一定是"已被预约"）。
+在窗口开始前：
+- 以 (房间, 时段重叠) 建冲突图，有边的两个配置不能用同一个首选座位；
+- 候选最少的配置先分配首选座位，分配不到时尝试把邻居挪到它的其他空闲候选上；
+- 时段不重叠的配置可以共用同一个座位（例如 07:00-13:00 和 13:00-19:00）；
+- 每个配置的座位顺序改为：首选座位在前，其余候选中去掉冲突邻居的首选座位。
+  去掉后没有候选时保留原顺序，宁可互相竞争也不放弃。
+"""
+
+import logging
+
+
+def _minutes(hm: str) -> int:
+    h, m = hm.split(":")
+    return int(h) * 60 + int(m)
+
+
+def overlaps(times_a, times_b) -> bool:
+    """两个 [start, end) 时段是否重叠；首尾相接不算重叠。"""
+    return _minutes(times_a[0]) < _minutes(times_b[1]) and _minutes(times_b[0]) < _minutes(times_a[1])
+
+
+def conflict_graph(configs):
+    """返回 {配置下标: {冲突的配置下标}}：同一房间、时段重叠且有共同候选座位。"""
+    graph = {c.index: set() for c in configs}
+    for i, a in enumerate(configs):
+        for b in configs[i + 1:]:
+            if a.roomid == b.roomid and overlaps(a.times, b.times) and set(a.seats) & set(b.seats):
+                graph[a.index].add(b.index)
+                graph[b.index].add(a.index)
+    return graph
+
+
+def assign_primary_seats(configs, graph):
+    """为每个配置分配首选座位，冲突邻居之间互不相同；无法分配时为 None。"""
+    seats = {c.index: c.seats for c in configs}
+    primary = {}
+
+    def free_for(index):
+        taken = {primary.get(n) for n in graph[index]}
+        return [s for s in seats[index] if s not in taken]
+
+    # 候选少的先分配，同样多时按配置顺序
+    for cfg in sorted(configs, key=lambda c: (len(c.seats), c.index)):
+        free = free_for(cfg.index)
+        if free:
+            primary[cfg.index] = free[0]
+            continue
+        # 一层增广：把占用自己候选座位的邻居挪到它的其他空闲候选上
+        for seat in cfg.seats:
+            holders = [n for n in graph[cfg.index] if primary.get(n) == seat]
+            if len(holders) != 1:
+                continue
+            holder = holders[0]
+            primary[cfg.index] = seat
+            alternatives = [s for s in free_for(holder) if s != seat]
+            if alternatives:
+                primary[holder] = alternatives[0]
+                break
+            del primary[cfg.index]
+        else:
+            primary[cfg.index] = None
+    return primary
+
+
+def deconflict(plan):
+    """返回座位顺序调整后的 RunPlan 和日志用的变更说明列表。"""
+    active = plan.active()
+    graph = conflict_graph(active)
+    if not any(graph.values()):
+        return plan, []
+    primary = assign_primary_seats(active, graph)
+    configs = list(plan.configs)
+    changes = []
+    for cfg in active:
+        neighbours = graph[cfg.index]
+        if not neighbours:
+            continue
+        first = primary[cfg.index]
+        if first is None:
+            changes.append(
+                f"config #{cfg.index}: every candidate seat is claimed by overlapping configs "
+                f"{sorted(neighbours)}, keep {list(cfg.seats)}"
+            )
+            continue
+        blocked = {primary[n] for n in neighbours} - {first}
+        seats = (first,) + tuple(s for s in cfg.seats if s != first and s not in blocked)
+        if seats != cfg.seats:
+            changes.append(
+                f"config #{cfg.index} (room {cfg.roomid} {cfg.times[0]}-{cfg.times[1]}) overlaps "
+                f"{sorted(neighbours)}: seats {list(cfg.seats)} -> {list(seats)}"
+            )
+            configs[cfg.index] = cfg._replace(seats=seats)
+    return plan._replace(configs=tuple(configs)), changes
+
+
+def log_changes(changes, tag: str = "deconflict"):
+    for change in changes:
+        logging.info(f"[{tag}] {change}")
@@ -1,4 +1,3 @@
-from cryptography.hazmat.primitives import padding
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.backends import default_backend
 import base64
@@ -8,16 +7,40 @@ from uuid import uuid1
 import hashlib
 
 
+_AES_KEY = b"u2oh6Vu^HWe4_AES"
+_AES_IV = b"u2oh6Vu^HWe4_AES"
+_AES_CIPHER = None
+
+
+def _aes_cipher():
+    """Cipher 对象只构造一次；每次加密仍然新建 encryptor（CBC 需要从 IV 重新开始）。"""
+    global _AES_CIPHER
+    if _AES_CIPHER is None:
+        _AES_CIPHER = Cipher(algorithms.AES(_AES_KEY), modes.CBC(_AES_IV), backend=default_backend())
+    return _AES_CIPHER
+
+
 def AES_Encrypt(data):
-    key = b"u2oh6Vu^HWe4_AES"  # Convert to bytes
-    iv = b"u2oh6Vu^HWe4_AES"  # Convert to bytes
-    padder = padding.PKCS7(128).padder()
-    padded_data = padder.update(data.encode("utf-8")) + padder.finalize()
-    cipher = Cipher(algorithms.AES(key), modes.CBC(iv), backend=default_backend())
-    encryptor = cipher.encryptor()
-    encrypted_data = encryptor.update(padded_data) + encryptor.finalize()
-    enctext = base64.b64encode(encrypted_data).decode("utf-8")
-    return enctext
+    raw = data.encode("utf-8")
+    # PKCS7 填充，与 padding.PKCS7(128) 结果一致
+    pad = 16 - len(raw) % 16
+    encryptor = _aes_cipher().encryptor()
+    encrypted_data = encryptor.update(raw + bytes([pad]) * pad) + encryptor.finalize()
+    return base64.b64encode(encrypted_data).decode("utf-8")
+
+
+def encrypt_credentials(credentials):
+    """编译运行计划时一次性预加密全部账号，密文随配置保存，之后 login() 不再做任何 AES 运算。
+
+    参数:
+        credentials: [(username, password), ...]，元素为 None 的跳过
+    返回:
+        [(enc_username, enc_password) 或 None, ...]
+    """
+    return [
+        None if pair is None else (AES_Encrypt(pair[0]), AES_Encrypt(pair[1]))
+        for pair in credentials
+    ]
 
 
 def resort(submit_info):
@@ -92,3 +115,64 @@ def verify_param(params, algorithm_value):
     md5_hash = hashlib.md5(hash_string.encode("utf-8")).hexdigest()
 
     return md5_hash
+
+
+# enc() 末尾固定追加的算法值，等价于 verify_param(params, ENC_PATTERN)
+ENC_PATTERN = "%sd`~7^/>N4!Q#){''"
+
+
+def verify_param_batch(params_list, algorithm_values):
+    """批量计算 verify_param，结果与逐个调用完全一致。
+
+    参数:
+        params_list: 参数字典列表（通常是同一 roomId/day 下不同座位、时间段的提交参数）
+        algorithm_values: 单个算法值（所有参数共用）或与 params_list 等长的列表
+
+    返回:
+        与 params_list 一一对应的 MD5 十六进制字符串列表
+
+    优化点：
+    - 键集合相同的字典为一组，只排序一次键；
+    - 组内排序后开头取值全都相同的那几个键（例如 captcha/day）只拼接、哈希一次，
+      每个字典从这个前缀的 hashlib 状态 copy() 出来，只 update 不同的部分。
+    """
+    count = len(params_list)
+    if isinstance(algorithm_values, str):
+        tails = [f"[{algorithm_values}]"] * count
+    else:
+        if len(algorithm_values) != count:
+            raise ValueError("algorithm_values length mismatch with params_list")
+        tails = [f"[{v}]" for v in algorithm_values]
+
+    groups = {}
+    for index, params in enumerate(params_list):
+        groups.setdefault(frozenset(params), []).append(index)
+
+    results = [""] * count
+    for key_set, indexes in groups.items():
+        keys = sorted(key_set)
+        first = params_list[indexes[0]]
+        shared = 0
+        for key in keys:
+            value = first[key]
+            if any(params_list[i][key] != value for i in indexes):
+                break
+            shared += 1
+
+        prefix = hashlib.md5(
+            "".join(f"[{key}={first[key]}]" for key in keys[:shared]).encode("utf-8")
+        )
+        rest_keys = keys[shared:]
+        for i in indexes:
+            params = params_list[i]
+            state = prefix.copy()
+            state.update(
+                ("".join([f"[{key}={params[key]}]" for key in rest_keys]) + tails[i]).encode("utf-8")
+            )
+            results[i] = state.hexdigest()
+    return results
+
+
+def enc_batch(params_list):
+    """批量计算 enc，等价于对每个字典调用 enc()。"""
+    return verify_param_batch(params_list, ENC_PATTERN)
@@ -0,0 +1,199 @@
+"""
+多地址 RTT 探测与端点固定
+
+office / passport2 / captcha / captcha-b 每次新建连接都交给系统解析器，客户端并不知道
+从当前机器（例如 Actions runner）出发哪个地址 / 边缘节点最快。窗口开始前：
+
+- 解析每个 host 的全部 A / AAAA 记录；
+- 对每个地址分别测 TCP 握手、TLS 握手（SNI 为原 host）和一个小请求（Host 为原 host）的耗时；
+- 用缓存的解析结果替换 socket.getaddrinfo：最快的健康地址排在第一个，其余健康地址作为后备，
+  窗口期间不再查 DNS，窗口结束时 uninstall() 恢复系统解析器。只接管 TCP 流式查询，
+  URL 里仍是原 host，所以 SNI / Host / cookie 都不受影响；
+- 探测表写入运行指标（metrics.sqlite 的 endpoint_probes 表）。
+
+    python -m utils.endpoints                     # 探测默认 host 并打印结果
+    python -m utils.endpoints office.chaoxing.com
+"""
+
+import logging
+import socket
+import ssl
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_HOSTS = (
+    "office.chaoxing.com",
+    "passport2.chaoxing.com",
+    "captcha.chaoxing.com",
+    "captcha-b.chaoxing.com",
+)
+
+_original_getaddrinfo = socket.getaddrinfo
+
+
+def resolve(host: str, port: int = 443):
+    """返回 host 的全部地址 [(family, ip), ...]，按解析器顺序去重。"""
+    seen, addresses = set(), []
+    for family, _, _, _, sockaddr in _original_getaddrinfo(host, port, 0, socket.SOCK_STREAM):
+        ip = sockaddr[0]
+        if ip not in seen:
+            seen.add(ip)
+            addresses.append((family, ip))
+    return addresses
+
+
+def probe_address(host: str, family: int, ip: str, port: int = 443, tls: bool = True, timeout: float = 3.0):
+    """对一个地址测一次 TCP / TLS 握手和 GET / 请求（只读状态行）的耗时（毫秒）。"""
+    row = {"host": host, "address": ip, "family": "ipv6" if family == socket.AF_INET6 else "ipv4",
+           "tcp_ms": None, "tls_ms": None, "http_ms": None, "status": None, "ok": False, "error": ""}
+    sock = None
+    try:
+        start = time.perf_counter()
+        sock = socket.create_connection((ip, port), timeout=timeout)
+        row["tcp_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        if tls:
+            # 与 reserve 的 verify=False 一致，只测握手耗时
+            context = ssl.create_default_context()
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+            start = time.perf_counter()
+            sock = context.wrap_socket(sock, server_hostname=host)
+            row["tls_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        start = time.perf_counter()
+        sock.sendall(f"GET / HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode("ascii"))
+        status_line = sock.recv(256).split(b"\r\n", 1)[0].decode("latin-1")
+        row["http_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        parts = status_line.split()
+        row["status"] = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else None
+        row["ok"] = row["status"] is not None and row["status"] < 500
+        if not row["ok"]:
+            row["error"] = f"bad status line {status_line!r}"
+    except (OSError, ssl.SSLError) as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        if sock is not None:
+            sock.close()
+    return row
+
+
+def _score(rows):
+    """地址得分：多次探测的 TCP + TLS + 请求耗时取中位数；有一次失败就不算健康。"""
+    if not rows or not all(r["ok"] for r in rows):
+        return None
+    return statistics.median((r["tcp_ms"] or 0) + (r["tls_ms"] or 0) + (r["http_ms"] or 0) for r in rows)
+
+
+class EndpointTable:
+    """每个 host 的地址、探测结果和选中的地址；install() 后 getaddrinfo 使用这里缓存的结果。"""
+
+    def __init__(self):
+        self.resolved = {}  # host -> 解析出的全部地址 [(family, ip), ...]
+        self.addresses = {}  # host -> 解析缓存，最快的健康地址在前；没有健康地址时为解析器顺序
+        self.pinned = {}  # host -> ip
+        self.probes = []
+        self.probed_at = None
+        self._lock = threading.Lock()
+        self._installed = False
+
+    @property
+    def probed(self) -> bool:
+        return self.probed_at is not None
+
+    def probe(self, hosts=DEFAULT_HOSTS, port: int = 443, tls: bool = True, samples: int = 3, timeout: float = 3.0):
+        """并发探测所有 host 的所有地址，每个地址 samples 次；解析失败的 host 保持走系统解析器。"""
+        targets = []
+        addresses = {}
+        for host in hosts:
+            try:
+                addresses[host] = resolve(host, port)
+            except OSError as e:
+                logging.warning(f"[endpoints] Failed to resolve {host}: {e}")
+                continue
+            targets += [(host, family, ip) for family, ip in addresses[host] for _ in range(samples)]
+        with ThreadPoolExecutor(max_workers=min(16, max(1, len(targets))), thread_name_prefix="probe") as pool:
+            rows = list(pool.map(lambda t: probe_address(t[0], t[1], t[2], port, tls, timeout), targets))
+
+        pinned, ordered = {}, {}
+        for host, addrs in addresses.items():
+            scores = {ip: _score([r for r in rows if r["host"] == host and r["address"] == ip]) for _, ip in addrs}
+            healthy = sorted((ip for ip in scores if scores[ip] is not None), key=lambda ip: scores[ip])
+            if not healthy:
+                logging.warning(f"[endpoints] No healthy address for {host}, keep system resolver order")
+                ordered[host] = addrs
+                continue
+            family_of = dict((ip, family) for family, ip in addrs)
+            ordered[host] = [(family_of[ip], ip) for ip in healthy]
+            pinned[host] = healthy[0]
+            logging.info(
+                f"[endpoints] {host}: pinned {healthy[0]} ({scores[healthy[0]]:.1f}ms) "
+                f"of {len(addrs)} addresses, {len(healthy)} healthy"
+            )
+        with self._lock:
+            self.resolved, self.addresses, self.pinned, self.probes = addresses, ordered, pinned, rows
+            self.probed_at = time.time()
+        return self
+
+    def rows(self):
+        """探测表：每个地址一行，耗时取中位数，pinned 标记选中的地址。"""
+        table = []
+        for host, addrs in self.resolved.items():
+            for _, ip in addrs:
+                samples = [r for r in self.probes if r["host"] == host and r["address"] == ip]
+                if not samples:
+                    continue
+
+                def med(key):
+                    values = [r[key] for r in samples if r[key] is not None]
+                    return round(statistics.median(values), 2) if values else None
+
+                table.append({
+                    "host": host, "address": ip, "family": samples[0]["family"],
+                    "tcp_ms": med("tcp_ms"), "tls_ms": med("tls_ms"), "http_ms": med("http_ms"),
+                    "ok": all(r["ok"] for r in samples), "samples": len(samples),
+                    "pinned": self.pinned.get(host) == ip,
+                    "error": next((r["error"] for r in samples if r["error"]), ""),
+                })
+        return sorted(table, key=lambda r: (r["host"], not r["pinned"], r["http_ms"] or 1e9))
+
+    # ---------------- 解析缓存 ----------------
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        addrs = self.addresses.get(host)
+        # 只缓存了 TCP 连接要用的地址，UDP 等其他查询照旧交给系统解析器
+        if (not addrs or type not in (0, socket.SOCK_STREAM) or proto not in (0, socket.IPPROTO_TCP)
+                or not isinstance(port, int) and not (isinstance(port, str) and port.isdigit())):
+            return _original_getaddrinfo(host, port, family, type, proto, flags)
+        port = int(port)
+        result = []
+        for fam, ip in addrs:
+            if family not in (0, socket.AF_UNSPEC) and family != fam:
+                continue
+            sockaddr = (ip, port, 0, 0) if fam == socket.AF_INET6 else (ip, port)
+            result.append((fam, type or socket.SOCK_STREAM, proto or socket.IPPROTO_TCP, "", sockaddr))
+        return result or _original_getaddrinfo(host, port, family, type, proto, flags)
+
+    def install(self):
+        """用缓存结果替换 socket.getaddrinfo（进程内所有会话生效）。"""
+        socket.getaddrinfo = self.getaddrinfo
+        self._installed = True
+        return self
+
+    def uninstall(self):
+        if self._installed:
+            socket.getaddrinfo = _original_getaddrinfo
+            self._installed = False
+
+
+# 当前窗口生效的端点表：每个窗口开始时换成为它探测的表
+ENDPOINTS = EndpointTable()
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    table = EndpointTable().probe(sys.argv[1:] or DEFAULT_HOSTS)
+    print(json.dumps(table.rows(), ensure_ascii=False, indent=2))
@@ -0,0 +1,131 @@
+"""
+对冲提交（hedged submit）
+
+第一次提交发出后，如果在"观测到的提交 RTT 的某个分位数"内还没有响应，
+就用另一条连接、预先准备好的独立 token/验证码再发一次，谁先成功算谁。
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class RttTracker:
+    """按请求类型记录最近的 RTT 样本（秒），用于计算分位数。线程安全。"""
+
+    def __init__(self, maxlen: int = 256):
+        self.maxlen = maxlen
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(kind, deque(maxlen=self.maxlen)).append(seconds)
+
+    def samples(self, kind: str):
+        with self._lock:
+            return list(self._samples.get(kind, ()))
+
+    def percentile(self, kind: str, pct: float, fallback_kinds=()):
+        """返回 kind 的 pct 分位数；没有样本时依次尝试 fallback_kinds，全都没有返回 None。"""
+        for k in (kind, *fallback_kinds):
+            values = sorted(self.samples(k))
+            if values:
+                rank = min(len(values) - 1, max(0, int(round(pct / 100 * (len(values) - 1)))))
+                return values[rank]
+        return None
+
+
+# 全局 RTT 记录：reserve 的页面 token 请求和提交请求都会写入这里，多个账号共享
+RTT = RttTracker()
+
+
+def hedge_delay(percentile: float, default_ms: float, min_ms: float) -> float:
+    """计算对冲等待时间（秒）：优先用提交 RTT 分位数，其次页面请求 RTT，最后用默认值。"""
+    rtt = RTT.percentile("submit", percentile, fallback_kinds=("page",))
+    delay_ms = default_ms if rtt is None else rtt * 1000
+    return max(delay_ms, min_ms) / 1000
+
+
+class HedgeResult:
+    def __init__(self, result, winner: str, hedged: bool, elapsed: float):
+        self.result = result
+        self.winner = winner
+        self.hedged = hedged
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return (
+            f"HedgeResult(result={self.result}, winner={self.winner}, "
+            f"hedged={self.hedged}, elapsed={self.elapsed * 1000:.1f}ms)"
+        )
+
+
+def hedged_call(primary, backup, delay: float, label: str = "submit", is_success=bool):
+    """执行 primary()；delay 秒内未返回则并发执行 backup()，先成功者胜出。
+
+    两个都失败时返回最后完成的那个结果。backup 为 None 时退化为普通调用。
+    胜出后不等待另一个请求，它完成时会在日志中补记对冲节省的时间。
+    """
+    start = time.perf_counter()
+    pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="hedge")
+    try:
+        primary_future = pool.submit(primary)
+        done, _ = wait([primary_future], timeout=delay)
+        if done or backup is None:
+            return HedgeResult(primary_future.result(), "primary", False, time.perf_counter() - start)
+
+        logging.info(
+            f"[hedge] {label}: no response after {delay * 1000:.0f}ms, fire backup request"
+        )
+        backup_future = pool.submit(backup)
+        names = {primary_future: "primary", backup_future: "backup"}
+        finish_times = {}
+        pending = set(names)
+        result, winner = None, "none"
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                finish_times[names[future]] = time.perf_counter() - start
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logging.warning(f"[hedge] {label}: {names[future]} request raised {e}")
+                    result = None
+                winner = names[future]
+                if is_success(result):
+                    pending = set()
+                    break
+
+        elapsed = time.perf_counter() - start
+        _report_saving(label, winner, finish_times, primary_future, start)
+        return HedgeResult(result, winner, True, elapsed)
+    finally:
+        pool.shutdown(wait=False)
+
+
+def _report_saving(label, winner, finish_times, primary_future, start):
+    if winner != "backup":
+        logging.info(
+            f"[hedge] {label}: primary won at {finish_times.get('primary', 0) * 1000:.1f}ms, hedge saved 0ms"
+        )
+        return
+    win_at = finish_times["backup"]
+    if "primary" in finish_times:
+        logging.info(
+            f"[hedge] {label}: backup won at {win_at * 1000:.1f}ms, primary finished at "
+            f"{finish_times['primary'] * 1000:.1f}ms"
+        )
+        return
+
+    def _late_primary(_):
+        saved = time.perf_counter() - start - win_at
+        logging.info(
+            f"[hedge] {label}: backup won at {win_at * 1000:.1f}ms, primary arrived "
+            f"{saved * 1000:.1f}ms later, hedge saved {saved * 1000:.1f}ms"
+        )
+
+    logging.info(f"[hedge] {label}: backup won at {win_at * 1000:.1f}ms, primary still in flight")
+    primary_future.add_done_callback(_late_primary)
@@ -0,0 +1,345 @@
+"""
+页面 token / 验证码 validate 寿命分析
+
+按一组延迟反复探测：
+- submit_enc：取一次页面 token，之后在各个延迟点都用它提交，看多久以后返回 token 失效；
+- slide / textclick：先连续解出若干份 validate，各自放置不同的时间后配新 token 提交，看多久以后返回验证码失效。
+
+每次探测只知道"在这个年龄时还有效 / 已失效"，对它做保序回归得到生存曲线，
+写入寿命模型文件（live 默认为 lifetime_model.json，mock / cassette 默认为 lifetime_model.<target>.json）。
+运行时只采用 live 扫描得到的模型，按模型决定：
+- 重试时页面 token 可以复用多久（reserve.token_max_age）；
+- 验证码最多能在开放时间前多久开始预解（STRATEGY_SLIDER_LEAD_SECONDS 的上限）。
+
+    python -m utils.lifetime --target mock
+    python -m utils.lifetime --target live --username 138... --password ... --room 9928 --seat 060 \\
+        --times 09:30 22:00 --kinds submit_enc slide --record sweep.jsonl.gz
+    python -m utils.lifetime --target cassette:sweep.jsonl.gz --kinds submit_enc slide
+
+探测 live 站点时会真实提交预约，请选一个不重要的时间段和座位。
+"""
+
+import json
+import logging
+import os
+import time
+
+from utils import submit_result
+
+KINDS = ("submit_enc", "slide", "textclick")
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(__file__), "..", "lifetime_model.json")
+# 只有真实站点的扫描能说明线上的寿命；mock / cassette 的模型只用于开发，运行时不加载
+LIVE_SOURCE = "live"
+DEFAULT_DELAYS = (0, 5, 10, 20, 30, 45, 60, 75, 90)
+DEFAULT_RISK = 0.05
+MODEL_VERSION = 1
+
+# 探测结果里不能说明有效 / 失效的分类（另一种凭据失效、网络、限流）
+_INCONCLUSIVE = {
+    "submit_enc": {submit_result.CAPTCHA, submit_result.NETWORK, submit_result.THROTTLED},
+    "slide": {submit_result.TOKEN, submit_result.NETWORK, submit_result.THROTTLED},
+    "textclick": {submit_result.TOKEN, submit_result.NETWORK, submit_result.THROTTLED},
+}
+_EXPIRED = {
+    "submit_enc": submit_result.TOKEN,
+    "slide": submit_result.CAPTCHA,
+    "textclick": submit_result.CAPTCHA,
+}
+
+
+# ---------------- 生存曲线 ----------------
+
+def fit_survival(observations):
+    """[(年龄, 是否有效), ...] -> [(年龄, 生存率), ...]，年龄递增、生存率不增。
+
+    这类"只观察一次当前状态"的数据，生存函数的非参数极大似然估计
+    就是按年龄对有效比例做单调不增的保序回归（PAV）。
+    """
+    groups = {}
+    for age, alive in observations:
+        total, count = groups.get(age, (0.0, 0))
+        groups[age] = (total + bool(alive), count + 1)
+    blocks = []  # [有效数, 次数, [年龄...]]
+    for age in sorted(groups):
+        total, count = groups[age]
+        blocks.append([total, count, [age]])
+        while len(blocks) > 1 and blocks[-2][0] / blocks[-2][1] < blocks[-1][0] / blocks[-1][1]:
+            total, count, ages = blocks.pop()
+            blocks[-1][0] += total
+            blocks[-1][1] += count
+            blocks[-1][2].extend(ages)
+    return [(age, round(total / count, 4)) for total, count, ages in blocks for age in ages]
+
+
+def safe_age(curve, risk: float = DEFAULT_RISK) -> float:
+    """生存率不低于 1 - risk 的最大探测年龄；第一个探测点就不满足时为 0。"""
+    best = 0.0
+    for age, survival in curve:
+        if survival < 1 - risk:
+            break
+        best = age
+    return best
+
+
+class LifetimeModel:
+    """各类凭据的生存曲线；没有数据的类型 safe_age 返回 None，运行时保持原有行为。"""
+
+    def __init__(self, kinds=None, source: str = "", fitted_at: float | None = None):
+        self.kinds = kinds or {}
+        self.source = source
+        self.fitted_at = fitted_at
+        self.risk = DEFAULT_RISK
+        self.path = None
+
+    @classmethod
+    def fit(cls, observations, source: str = ""):
+        """observations: [(类型, 年龄秒, 是否有效), ...]"""
+        by_kind = {}
+        for kind, age, alive in observations:
+            by_kind.setdefault(kind, []).append((round(age, 2), alive))
+        kinds = {}
+        for kind, points in by_kind.items():
+            curve = fit_survival(points)
+            kinds[kind] = {
+                "samples": len(points),
+                "max_probed": max(age for age, _ in points),
+                # 最大探测年龄时仍全部有效：真实寿命可能更长，只是没有测到
+                "censored": curve[-1][1] == 1.0,
+                "curve": [list(p) for p in curve],
+            }
+        return cls(kinds, source, time.time())
+
+    @classmethod
+    def load(cls, path: str | None = None):
+        path = path or DEFAULT_MODEL_PATH
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != MODEL_VERSION:
+            raise ValueError(f"{path} is not a lifetime model file")
+        return cls(data.get("kinds", {}), data.get("source", ""), data.get("fitted_at"))
+
+    def save(self, path: str | None = None):
+        path = path or DEFAULT_MODEL_PATH
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": MODEL_VERSION, "source": self.source, "fitted_at": self.fitted_at, "kinds": self.kinds},
+                f, ensure_ascii=False, indent=2,
+            )
+            f.write("\n")
+        return path
+
+    def configure(self, path: str | None = None, risk: float = DEFAULT_RISK):
+        """运行时加载模型文件；文件不存在、格式不对或不是 live 扫描得到的模型时保持为空模型。"""
+        self.risk = risk
+        try:
+            loaded = LifetimeModel.load(path)
+        except (OSError, ValueError) as e:
+            logging.warning(f"[lifetime] Failed to load lifetime model: {e}")
+            loaded = LifetimeModel()
+        if loaded.kinds and loaded.source != LIVE_SOURCE:
+            logging.warning(f"[lifetime] Ignoring lifetime model fitted on {loaded.source or 'unknown'!r}, not {LIVE_SOURCE!r}")
+            loaded = LifetimeModel()
+        self.kinds, self.source, self.fitted_at = loaded.kinds, loaded.source, loaded.fitted_at
+        self.path = path or DEFAULT_MODEL_PATH
+        return self
+
+    def safe_age(self, kind: str, risk: float | None = None):
+        entry = self.kinds.get(kind)
+        if not entry:
+            return None
+        return safe_age([tuple(p) for p in entry["curve"]], self.risk if risk is None else risk)
+
+    def summary(self):
+        return {kind: {"samples": e["samples"], "safe_age": self.safe_age(kind), "censored": e["censored"]}
+                for kind, e in self.kinds.items()}
+
+
+LIFETIME = LifetimeModel()
+
+
+# ---------------- 探测 ----------------
+
+class Probe:
+    """一次扫描用到的已登录会话和提交参数。solve(kind) 返回一份 validate。"""
+
+    def __init__(self, session, page_url, times, roomid, seatid, solve):
+        self.session = session
+        self.page_url = page_url
+        self.times = times
+        self.roomid = roomid
+        self.seatid = seatid
+        self.solve = solve
+
+    def token(self):
+        return self.session._get_page_token(self.page_url, require_value=True)
+
+    def submit(self, token, value, captcha="") -> str:
+        try:
+            data = self.session.burst_submit_once(
+                times=self.times, roomid=self.roomid, seatid=self.seatid,
+                captcha=captcha, token=token, value=value,
+            )
+        except Exception as e:
+            logging.warning(f"[lifetime] Probe submit failed: {e}")
+            return submit_result.NETWORK
+        return submit_result.classify(data)
+
+
+def _sleep_until(deadline: float):
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        time.sleep(min(remaining, 0.1))
+
+
+def _observation(kind, age, category):
+    if category in _INCONCLUSIVE[kind]:
+        logging.info(f"[lifetime] {kind} age={age:.2f}s -> {category} (inconclusive)")
+        return None
+    alive = category != _EXPIRED[kind]
+    logging.info(f"[lifetime] {kind} age={age:.2f}s -> {category} ({'alive' if alive else 'expired'})")
+    return (kind, age, alive)
+
+
+def sweep_token(probe: Probe, delays, captcha_kind: str | None = None):
+    """同一个页面 token 在各个延迟点提交；需要验证码时每次配一份新解的 validate。"""
+    fetched_at = time.monotonic()
+    token, value = probe.token()
+    if not token:
+        logging.error("[lifetime] Failed to get page token, skip submit_enc sweep")
+        return []
+    observations = []
+    for delay in sorted(delays):
+        _sleep_until(fetched_at + delay)
+        captcha = probe.solve(captcha_kind) if captcha_kind else ""
+        age = time.monotonic() - fetched_at
+        observations.append(_observation("submit_enc", age, probe.submit(token, value, captcha)))
+    return [o for o in observations if o]
+
+
+def sweep_captcha(probe: Probe, kind: str, delays):
+    """先连续解出 len(delays) 份 validate，第 i 份放置 delays[i] 秒后配新 token 提交。"""
+    solved = []
+    for _ in delays:
+        validate = probe.solve(kind)
+        solved.append((time.monotonic(), validate))
+    observations = []
+    for delay, (solved_at, validate) in zip(sorted(delays), solved):
+        if not validate:
+            continue
+        _sleep_until(solved_at + delay)
+        token, value = probe.token()
+        if not token:
+            continue
+        age = time.monotonic() - solved_at
+        observations.append(_observation(kind, age, probe.submit(token, value, validate)))
+    return [o for o in observations if o]
+
+
+def profile(probe: Probe, kinds, delays, repeats: int = 1, token_captcha: str | None = None):
+    """按类型扫描 repeats 轮，返回全部观测。"""
+    observations = []
+    for round_no in range(1, repeats + 1):
+        for kind in kinds:
+            logging.info(f"[lifetime] Round {round_no}/{repeats}: sweep {kind} over {list(delays)}")
+            if kind == "submit_enc":
+                observations += sweep_token(probe, delays, token_captcha)
+            else:
+                observations += sweep_captcha(probe, kind, delays)
+    return observations
+
+
+def _direct_solve(session):
+    """模拟服务器不校验图片，直接请求校验接口拿 validate。"""
+    def solve(kind):
+        return session._submit_captcha(kind, "profile", [{"x": 0}] if kind == "slide" else [])
+    return solve
+
+
+def _open_target(args):
+    """返回 (已登录会话, 选座页面 URL, solve, 收尾函数)。"""
+    from utils.reserve import reserve
+
+    s = reserve(sleep_time=0.1, max_attempt=1, enable_slider="slide" in args.kinds,
+                enable_textclick="textclick" in args.kinds)
+    cleanup = []
+    if args.target == "mock":
+        from utils.mock_server import MockSeatServer
+
+        # 只扫 submit_enc 时不要求验证码，否则每次提交都会因缺少 validate 而无法判断
+        captcha_ttl = args.mock_captcha_ttl if {"slide", "textclick"} & set(args.kinds) else 0.0
+        server = MockSeatServer(token_ttl=args.mock_token_ttl, captcha_ttl=captcha_ttl).start()
+        cleanup.append(server.stop)
+        server.attach(s)
+        solve = _direct_solve(s)
+    else:
+        from utils.cassette import Cassette
+
+        if args.target.startswith("cassette:"):
+            Cassette(args.target.split(":", 1)[1], "replay", speed=0).attach(s)
+        elif args.record:
+            cassette = Cassette(args.record, "record")
+            cassette.attach(s)
+            cleanup.append(cassette.save)
+        solve = s.resolve_captcha
+
+    username = args.username or os.environ.get("CX_USERNAME", "profile")
+    password = args.password or os.environ.get("CX_PASSWORD", "profile")
+    s.get_login_status()
+    s.login(username, password)
+    s.requests.headers.update({"Host": "office.chaoxing.com"})
+    page_url = s.url.format(
+        roomId=args.room, day=str(s._reservation_day()),
+        seatPageId=args.seat_page_id or args.room, fidEnc=args.fid_enc,
+    )
+    return s, page_url, solve, cleanup
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m utils.lifetime")
+    parser.add_argument("--target", default="mock", help="mock | live | cassette:PATH")
+    parser.add_argument("--kinds", nargs="+", default=["submit_enc"], choices=KINDS)
+    parser.add_argument("--delays", nargs="+", type=float, default=list(DEFAULT_DELAYS))
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--risk", type=float, default=DEFAULT_RISK)
+    parser.add_argument("--out", help="lifetime model file to write (default: lifetime_model.json for live, "
+                        "lifetime_model.<target>.json otherwise)")
+    parser.add_argument("--username")
+    parser.add_argument("--password")
+    parser.add_argument("--room", default="9928")
+    parser.add_argument("--seat", default="060")
+    parser.add_argument("--times", nargs=2, default=["09:30", "22:00"])
+    parser.add_argument("--seat-page-id", default="")
+    parser.add_argument("--fid-enc", default="")
+    parser.add_argument("--record", metavar="PATH", help="record live traffic to a cassette for later replay")
+    parser.add_argument("--mock-token-ttl", type=float, default=30.0)
+    parser.add_argument("--mock-captcha-ttl", type=float, default=20.0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    s, page_url, solve, cleanup = _open_target(args)
+    captcha_kind = next((k for k in ("slide", "textclick") if k in args.kinds), None)
+    try:
+        probe = Probe(s, page_url, args.times, args.room, args.seat, solve)
+        observations = profile(probe, args.kinds, args.delays, args.repeats, captcha_kind)
+    finally:
+        for fn in cleanup:
+            fn()
+    model = LifetimeModel.fit(observations, source=args.target)
+    model.risk = args.risk
+    out = args.out
+    if out is None and args.target != LIVE_SOURCE:
+        out = os.path.join(os.path.dirname(DEFAULT_MODEL_PATH), f"lifetime_model.{args.target.split(':')[0]}.json")
+    path = model.save(out)
+    print(json.dumps(model.summary(), ensure_ascii=False, indent=2))
+    print(f"lifetime model written to {path}")
+    return model
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+异步日志管道
+
+热路径（submit / get_submit / 抢座前的自旋等待）里的 logging 调用只把 LogRecord 放进队列，
+格式化北京时间、写 stderr / 文件都交给后台 QueueListener 线程完成，
+日志不再占用"到点"和提交 POST 之间的时间。
+
+可选的 JSONL 文件输出每条记录一行：{"t": 时间戳, "l": 级别, "m": 消息}，
+比格式化文本更省事，也方便之后用脚本分析。
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+
+_LISTENER = None
+_LOGGER = None
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """默认的 QueueHandler.prepare 会在调用线程里完整格式化一遍消息，这里原样入队，
+    msg % args 也留给后台线程。本项目的日志都用 f-string 拼好（args 为空）；
+    传了可变 args 的调用，后台线程格式化时看到的是它们那时的值。"""
+
+    def prepare(self, record):
+        return record
+
+
+class JsonlHandler(logging.Handler):
+    """紧凑的 JSONL 日志输出。"""
+
+    def __init__(self, path: str):
+        super().__init__()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def emit(self, record):
+        try:
+            line = json.dumps(
+                {"t": round(record.created, 3), "l": record.levelname, "m": record.getMessage()},
+                ensure_ascii=False,
+                default=str,
+            )
+            self._file.write(line + "\n")
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        try:
+            self._file.close()
+        finally:
+            super().close()
+
+
+def start_queue_logging(jsonl_path: str | None = None, logger: logging.Logger | None = None):
+    """把 logger（默认 root）现有的 handler 挪到后台线程，logger 上只保留一个 QueueHandler。
+
+    重复调用是空操作；进程退出时自动停止后台线程并刷出剩余日志。
+    """
+    global _LISTENER, _LOGGER
+    if _LISTENER is not None:
+        return _LISTENER
+    logger = _LOGGER = logger or logging.getLogger()
+    handlers = list(logger.handlers)
+    if jsonl_path:
+        handlers.append(JsonlHandler(jsonl_path))
+    log_queue = queue.SimpleQueue()
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(_DeferredQueueHandler(log_queue))
+    _LISTENER = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _LISTENER.start()
+    atexit.register(stop_queue_logging)
+    return _LISTENER
+
+
+def stop_queue_logging():
+    """停止后台线程并把 handler 还给 start_queue_logging 时的 logger，JSONL 文件关闭。"""
+    global _LISTENER, _LOGGER
+    if _LISTENER is None:
+        return
+    listener, _LISTENER = _LISTENER, None
+    logger, _LOGGER = _LOGGER, None
+    listener.stop()
+    for handler in list(logger.handlers):
+        if isinstance(handler, _DeferredQueueHandler):
+            logger.removeHandler(handler)
+    for handler in listener.handlers:
+        if isinstance(handler, JsonlHandler):
+            handler.close()
+        else:
+            logger.addHandler(handler)
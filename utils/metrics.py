@@ -0,0 +1,324 @@
+"""
+运行指标记录与统计
+
+每次运行、每个配置记录：首次提交相对 target_dt 的时间、尝试次数、每次失败的分类、
+验证码求解耗时、提交 RTT 和最终结果，追加写入本地 SQLite 文件；
+窗口前的端点探测表（每个 host 的每个地址的握手 / 请求耗时、是否选中）和开放探测结果
+（探测到的开放时间相对名义开放时间的偏移）也随本次运行写入。
+
+命令行统计（按周 + 策略参数分组，输出成功率和延迟分位数）：
+    python -m utils.metrics report --weeks 4
+
+metrics.sqlite 不进仓库，必须放在跨运行保留的位置才能积累历史：GitHub Actions 的 runner
+用完即弃，.github/workflows/reserve.yml 每次运行前从 actions/cache 恢复、运行后存回
+（缓存 7 天不用会被清掉）；本机 / 常驻模式直接写仓库根目录或 config.json 的 metrics.path。
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+DEFAULT_METRICS_PATH = os.path.join(os.path.dirname(__file__), "..", "metrics.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started_at REAL NOT NULL,
+    target_ts REAL,
+    settings_key TEXT NOT NULL,
+    settings TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS config_runs (
+    run_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    roomid TEXT,
+    seats TEXT,
+    times TEXT,
+    first_submit_offset_ms REAL,
+    attempts INTEGER NOT NULL,
+    success INTEGER NOT NULL,
+    outcome TEXT,
+    failures TEXT,
+    captcha_ms TEXT,
+    rtt_ms TEXT,
+    PRIMARY KEY (run_id, idx)
+);
+CREATE TABLE IF NOT EXISTS endpoint_probes (
+    run_id TEXT NOT NULL,
+    host TEXT NOT NULL,
+    address TEXT NOT NULL,
+    family TEXT,
+    tcp_ms REAL,
+    tls_ms REAL,
+    http_ms REAL,
+    ok INTEGER NOT NULL,
+    pinned INTEGER NOT NULL,
+    error TEXT,
+    PRIMARY KEY (run_id, host, address)
+);
+CREATE TABLE IF NOT EXISTS open_detections (
+    run_id TEXT NOT NULL,
+    nominal_ts REAL NOT NULL,
+    opened_offset_ms REAL,
+    closed_offset_ms REAL,
+    probes INTEGER NOT NULL,
+    PRIMARY KEY (run_id, nominal_ts)
+);
+CREATE INDEX IF NOT EXISTS idx_runs_started ON runs (started_at);
+"""
+
+
+class _ConfigStats:
+    def __init__(self, user: dict | None = None):
+        user = user or {}
+        seats = user.get("seatid") or []
+        self.roomid = str(user.get("roomid", ""))
+        self.seats = [seats] if isinstance(seats, str) else list(seats)
+        self.times = list(user.get("times") or [])
+        self.first_submit_ts = None
+        self.attempts = 0
+        self.failures = {}
+        self.captcha_ms = []
+        self.rtt_ms = []
+        self.outcome = None
+
+
+class MetricsRecorder:
+    """进程内的指标收集器；未 start_run 时所有记录方法都是空操作。
+
+    sqlite3 只在写入 / 统计时才导入，不拖慢启动。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.path = DEFAULT_METRICS_PATH
+        self.run_id = None
+        self.started_at = None
+        self.target_ts = None
+        self.settings = {}
+        self._configs = {}
+        self._endpoints = []
+        self._open = []
+        self._lock = threading.Lock()
+
+    def start_run(self, users, settings: dict, target_ts: float | None, path: str | None = None):
+        self.enabled = True
+        self.path = path or DEFAULT_METRICS_PATH
+        self.run_id = uuid.uuid4().hex[:16]
+        self.started_at = time.time()
+        self.target_ts = target_ts
+        self.settings = settings
+        self._configs = {i: _ConfigStats(u) for i, u in enumerate(users)}
+        self._endpoints = []
+        self._open = []
+
+    def _stats(self, key):
+        if key not in self._configs:
+            self._configs[key] = _ConfigStats()
+        return self._configs[key]
+
+    def submit(self, key, category: str, rtt: float | None, sent_at: float):
+        if not self.enabled or key is None:
+            return
+        with self._lock:
+            stats = self._stats(key)
+            stats.attempts += 1
+            # "未开放"的提交（开放探测）不算首次提交
+            if category != "not_open" and (stats.first_submit_ts is None or sent_at < stats.first_submit_ts):
+                stats.first_submit_ts = sent_at
+            if rtt is not None:
+                stats.rtt_ms.append(round(rtt * 1000, 1))
+            if category != "success":
+                stats.failures[category] = stats.failures.get(category, 0) + 1
+
+    def captcha(self, key, seconds: float):
+        if not self.enabled or key is None:
+            return
+        with self._lock:
+            self._stats(key).captcha_ms.append(round(seconds * 1000, 1))
+
+    def outcome(self, key, outcome: str):
+        if not self.enabled or key is None:
+            return
+        with self._lock:
+            self._stats(key).outcome = outcome
+
+    def endpoints(self, rows):
+        """记录本次运行使用的端点探测表（utils.endpoints.EndpointTable.rows()）。"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._endpoints = list(rows)
+
+    def open_detected(self, nominal_ts: float, opened_ts: float | None, closed_ts: float | None, probes: int):
+        """记录一次开放探测（utils.open_detect）：探测到开放 / 最后一次未开放相对名义开放时间的偏移。"""
+        if not self.enabled:
+            return
+
+        def offset(ts):
+            return None if ts is None else round((ts - nominal_ts) * 1000, 1)
+
+        with self._lock:
+            self._open.append((nominal_ts, offset(opened_ts), offset(closed_ts), probes))
+
+    def finish(self, success_list=None):
+        """把本次运行写入 SQLite；写入失败只记日志，不影响预约流程。"""
+        if not self.enabled:
+            return
+        self.enabled = False
+        settings_json = json.dumps(self.settings, sort_keys=True, ensure_ascii=False)
+        settings_key = hashlib.md5(settings_json.encode("utf-8")).hexdigest()[:8]
+        rows = []
+        for idx, stats in sorted(self._configs.items()):
+            success = bool(success_list[idx]) if success_list and idx < len(success_list) else False
+            offset = None
+            if stats.first_submit_ts is not None and self.target_ts is not None:
+                offset = round((stats.first_submit_ts - self.target_ts) * 1000, 1)
+            rows.append((
+                self.run_id, idx, stats.roomid, json.dumps(stats.seats), json.dumps(stats.times),
+                offset, stats.attempts, int(success),
+                stats.outcome or ("success" if success else "failed"),
+                json.dumps(stats.failures, ensure_ascii=False),
+                json.dumps(stats.captcha_ms), json.dumps(stats.rtt_ms),
+            ))
+        import sqlite3
+
+        try:
+            with sqlite3.connect(self.path) as conn:
+                conn.executescript(_SCHEMA)
+                conn.execute(
+                    "INSERT INTO runs VALUES (?, ?, ?, ?, ?)",
+                    (self.run_id, self.started_at, self.target_ts, settings_key, settings_json),
+                )
+                conn.executemany(
+                    "INSERT INTO config_runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+                )
+                conn.executemany(
+                    "INSERT INTO endpoint_probes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (self.run_id, e["host"], e["address"], e["family"], e["tcp_ms"], e["tls_ms"],
+                         e["http_ms"], int(e["ok"]), int(e["pinned"]), e["error"])
+                        for e in self._endpoints
+                    ],
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO open_detections VALUES (?, ?, ?, ?, ?)",
+                    [(self.run_id, *row) for row in self._open],
+                )
+            logging.info(f"[metrics] Run {self.run_id} saved to {self.path} ({len(rows)} configs)")
+        except sqlite3.Error as e:
+            logging.warning(f"[metrics] Failed to save run metrics: {e}")
+
+
+# 全局指标收集器，reserve 在提交 / 验证码求解时写入
+METRICS = MetricsRecorder()
+
+
+def _percentile(values, pct):
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    rank = min(len(values) - 1, max(0, int(round(pct / 100 * (len(values) - 1)))))
+    return values[rank]
+
+
+def aggregate(path: str, weeks: int = 4, now: float | None = None):
+    """按 (ISO 周, 策略参数) 聚合，返回字典列表。"""
+    import sqlite3
+
+    now = time.time() if now is None else now
+    since = now - weeks * 7 * 86400
+    with sqlite3.connect(path) as conn:
+        conn.executescript(_SCHEMA)
+        rows = conn.execute(
+            "SELECT r.started_at, r.settings_key, r.settings, c.success, c.first_submit_offset_ms, "
+            "c.attempts, c.failures, c.captcha_ms, c.rtt_ms "
+            "FROM config_runs c JOIN runs r ON r.run_id = c.run_id WHERE r.started_at >= ?",
+            (since,),
+        ).fetchall()
+
+    groups = {}
+    for started_at, settings_key, settings, success, offset, attempts, failures, captcha_ms, rtt_ms in rows:
+        year, week, _ = datetime.date.fromtimestamp(started_at).isocalendar()
+        group = groups.setdefault((f"{year}-W{week:02d}", settings_key), {
+            "week": f"{year}-W{week:02d}",
+            "settings_key": settings_key,
+            "settings": json.loads(settings),
+            "configs": 0, "successes": 0, "attempts": 0,
+            "offsets": [], "rtts": [], "captchas": [], "failures": {},
+        })
+        group["configs"] += 1
+        group["successes"] += success
+        group["attempts"] += attempts
+        group["offsets"].append(offset)
+        group["rtts"].extend(json.loads(rtt_ms))
+        group["captchas"].extend(json.loads(captcha_ms))
+        for category, count in json.loads(failures).items():
+            group["failures"][category] = group["failures"].get(category, 0) + count
+
+    result = []
+    for key in sorted(groups):
+        g = groups[key]
+        result.append({
+            "week": g["week"],
+            "settings_key": g["settings_key"],
+            "settings": g["settings"],
+            "configs": g["configs"],
+            "success_rate": g["successes"] / g["configs"],
+            "attempts": g["attempts"],
+            "first_submit_p50_ms": _percentile(g["offsets"], 50),
+            "first_submit_p90_ms": _percentile(g["offsets"], 90),
+            "rtt_p50_ms": _percentile(g["rtts"], 50),
+            "rtt_p90_ms": _percentile(g["rtts"], 90),
+            "captcha_p50_ms": _percentile(g["captchas"], 50),
+            "failures": g["failures"],
+        })
+    return result
+
+
+def _fmt(value):
+    return "-" if value is None else f"{value:.0f}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m utils.metrics")
+    sub = parser.add_subparsers(dest="command", required=True)
+    report = sub.add_parser("report", help="aggregate success rate and latency percentiles")
+    report.add_argument("--db", default=DEFAULT_METRICS_PATH, help="metrics sqlite file")
+    report.add_argument("--weeks", type=int, default=4, help="how many weeks to include")
+    report.add_argument("--json", action="store_true", help="print raw JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        print(f"metrics file {args.db} not found")
+        return 1
+    result = aggregate(args.db, args.weeks)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return 0
+
+    print(f"{'week':<10}{'settings':<10}{'configs':>8}{'success':>9}{'attempts':>9}"
+          f"{'first p50/p90 ms':>18}{'rtt p50/p90 ms':>16}{'captcha p50':>12}  failures")
+    for row in result:
+        print(
+            f"{row['week']:<10}{row['settings_key']:<10}{row['configs']:>8}"
+            f"{row['success_rate'] * 100:>8.0f}%{row['attempts']:>9}"
+            f"{_fmt(row['first_submit_p50_ms']) + '/' + _fmt(row['first_submit_p90_ms']):>18}"
+            f"{_fmt(row['rtt_p50_ms']) + '/' + _fmt(row['rtt_p90_ms']):>16}"
+            f"{_fmt(row['captcha_p50_ms']):>12}  {row['failures']}"
+        )
+    print()
+    for key in sorted({row["settings_key"] for row in result}):
+        settings = next(r["settings"] for r in result if r["settings_key"] == key)
+        print(f"{key}: {json.dumps(settings, ensure_ascii=False)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
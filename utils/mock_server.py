@@ -0,0 +1,247 @@
+"""
+本地模拟选座服务器
+
+在 127.0.0.1 上模拟 passport2 登录、seat/select 页面（带 submit_enc）和 seat/submit 接口，
+用于离线基准测试和回归测试，不会访问真实站点。
+
+    with MockSeatServer(open_at=time.time() + 1, latency=0.02) as server:
+        s = reserve(...)
+        server.attach(s)
+        s.login("user", "pass")
+        ...
+"""
+
+import json
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from utils.encrypt import verify_param
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 响应头和响应体分两次写出，不关 Nagle 会和客户端的延迟 ACK 叠加出约 40ms 的假延迟
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):  # 不向 stderr 打印访问日志
+        pass
+
+    def _reply(self, status: int, body, content_type: str = "application/json; charset=utf-8", headers=None):
+        if not isinstance(body, (bytes, str)):
+            body = json.dumps(body, ensure_ascii=False)
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _form(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length).decode("utf-8") if length else ""
+        query = urlsplit(self.path).query
+        merged = {k: v[0] for k, v in parse_qs(query, keep_blank_values=True).items()}
+        merged.update({k: v[0] for k, v in parse_qs(raw, keep_blank_values=True).items()})
+        return merged
+
+    def _user(self):
+        """登录时下发的 uid cookie，用来区分不同账号的预约。"""
+        for part in (self.headers.get("Cookie") or "").split(";"):
+            name, _, value = part.strip().partition("=")
+            if name == "uid":
+                return value
+        return ""
+
+    def do_GET(self):
+        self.server.mock.handle(self, "GET")
+
+    def do_POST(self):
+        self.server.mock.handle(self, "POST")
+
+
+class MockSeatServer:
+    """模拟服务器。
+
+    参数:
+        open_at: 预约开放时间戳；之前提交返回"未开放"，None 表示一直开放
+        latency: 每个请求的服务端延迟（秒），或无参函数返回延迟（用于模拟抖动）
+        seats: 可预约的座位号集合，None 表示任意座位
+        throttle_per_second: 每秒超过该提交数时返回限流提示，0 表示不限流
+        token_ttl: submit_enc 的有效期（秒），0 表示不过期
+        ambiguous: 成功提交返回"代码:302"：None 不模拟，"booked" 实际已预约，"dropped" 实际未预约
+        captcha_ttl: 验证码 validate 的有效期（秒）；大于 0 时提交必须带本服务器签发、未用过且未过期的 validate
+
+    client_latency 按账号（登录下发的 uid cookie）额外加的单程延迟：{uid: 秒数或无参函数}，
+    用于模拟网络条件不同的多个客户端；submits 中每项为 {"at": 到达时间, "seat": 座位号, "user": uid}。
+    """
+
+    def __init__(self, open_at=None, latency=0.0, seats=None, throttle_per_second: int = 0,
+                 token_ttl: float = 0.0, ambiguous: str | None = None, captcha_ttl: float = 0.0):
+        self.open_at = open_at
+        self.latency = latency
+        self.seats = set(seats) if seats is not None else None
+        self.throttle_per_second = throttle_per_second
+        self.token_ttl = token_ttl
+        self.ambiguous = ambiguous
+        self.captcha_ttl = captcha_ttl
+        self.client_latency = {}
+        self.validates = {}
+        self.tokens = {}
+        self.bookings = {}
+        self.submits = []
+        self._window = []
+        self._lock = threading.Lock()
+        self._httpd = None
+
+    # ---------------- 生命周期 ----------------
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.mock = self
+        threading.Thread(target=self._httpd.serve_forever, daemon=True, name="mock-seat").start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def attach(self, session):
+        """把 reserve 实例的所有接口地址改为指向本服务器。"""
+        base = self.base_url
+        session.login_page = f"{base}/mlogin?loginType=1&newversion=true&fid="
+        session.login_url = f"{base}/fanyalogin"
+        session.url = (
+            f"{base}/front/third/apps/seat/select?"
+            "id={roomId}&day={day}&backLevel=2&seatId={seatPageId}&fidEnc={fidEnc}"
+        )
+        session.submit_url = f"{base}/data/apps/seat/submit"
+        session.seat_url = f"{base}/data/apps/seat/getusedtimes"
+        session.room_list_url = (
+            f"{base}/data/apps/seat/room/list?"
+            "cpage={cpage}&pageSize={pageSize}&firstLevelName=&secondLevelName=&thirdLevelName=&deptIdEnc={deptIdEnc}"
+        )
+        session.seat_layout_url = f"{base}/data/apps/seat/seatgrid/roominfo?id={{roomId}}"
+        session.reserve_list_url = f"{base}/data/apps/seat/reservelist?indexId=0&pageSize=100&type=-1"
+        session.captcha_check_url = f"{base}/captcha/check/verification/result"
+        return session
+
+    # ---------------- 请求处理 ----------------
+
+    def _delay(self, user: str = ""):
+        latency = self.latency() if callable(self.latency) else self.latency
+        extra = self.client_latency.get(user, 0.0)
+        latency += extra() if callable(extra) else extra
+        if latency > 0:
+            time.sleep(latency)
+
+    def handle(self, handler, method):
+        self._delay(handler._user())
+        path = urlsplit(handler.path).path
+        if path.endswith("/mlogin"):
+            handler._reply(200, "<html>login</html>", "text/html; charset=utf-8")
+        elif path.endswith("/fanyalogin"):
+            uid = secrets.token_hex(4)
+            cookie = f"uid={uid}; Path=/"
+            # reserve 会带上 passport2/office.chaoxing.com 的 Host 头，cookie 按该域名保存；
+            # 和真实站点一样下发到 .chaoxing.com，之后 office 的请求才会带上
+            if (handler.headers.get("Host") or "").endswith("chaoxing.com"):
+                cookie += "; Domain=.chaoxing.com"
+            handler._reply(200, {"status": True, "msg2": ""}, headers={"Set-Cookie": cookie})
+        elif path.endswith("/seat/select"):
+            token = secrets.token_hex(16)
+            with self._lock:
+                self.tokens[token] = time.time()
+            html = f'<html><body><input type="hidden" id="submit_enc" value="{token}"/></body></html>'
+            handler._reply(200, html, "text/html; charset=utf-8")
+        elif path.endswith("/seat/submit"):
+            handler._reply(200, self._submit(handler._form(), handler._user()))
+        elif path.endswith("/captcha/check/verification/result"):
+            # 不校验滑动距离 / 点选坐标，直接签发一个 validate
+            validate = f"validate_mock_{secrets.token_hex(16)}"
+            with self._lock:
+                self.validates[validate] = time.time()
+            callback = parse_qs(urlsplit(handler.path).query).get("callback", ["cb"])[0]
+            extra = json.dumps({"validate": validate})
+            body = f"{callback}({json.dumps({'error': 0, 'result': True, 'extraData': extra})})"
+            handler._reply(200, body, "application/javascript; charset=utf-8")
+        elif path.endswith("/seat/reservelist"):
+            handler._reply(200, {"success": True, "data": {"reserveList": self.reservations(handler._user())}})
+        else:
+            handler._reply(404, {"success": False, "msg": "not found"})
+
+    def _token_valid(self, form) -> bool:
+        params = {k: v for k, v in form.items() if k != "enc"}
+        now = time.time()
+        with self._lock:
+            tokens = list(self.tokens.items())
+        # 客户端几乎总是用最新拿到的 token，从新往旧找
+        for token, issued_at in reversed(tokens):
+            if self.token_ttl and now - issued_at > self.token_ttl:
+                continue
+            if verify_param(params, token) == form.get("enc"):
+                return True
+        return False
+
+    def _captcha_valid(self, validate: str) -> bool:
+        """validate 只能用一次，并且要在 captcha_ttl 秒内使用。"""
+        with self._lock:
+            issued_at = self.validates.pop(validate, None)
+        return issued_at is not None and time.time() - issued_at <= self.captcha_ttl
+
+    def reservations(self, user: str):
+        """某个账号的预约记录，格式与 seat/reservelist 一致。"""
+        with self._lock:
+            slots = [slot for slot, owner in self.bookings.items() if owner == user]
+        return [
+            {"roomId": room, "today": day, "startTime": start, "endTime": end, "seatNum": seat, "status": 0}
+            for room, day, start, end, seat in slots
+        ]
+
+    def _submit(self, form, user: str = ""):
+        now = time.time()
+        seat = form.get("seatNum", "")
+        slot = (form.get("roomId"), form.get("day"), form.get("startTime"), form.get("endTime"), seat)
+        with self._lock:
+            self.submits.append({"at": now, "seat": seat, "user": user})
+            if self.throttle_per_second:
+                self._window = [t for t in self._window if now - t < 1.0]
+                self._window.append(now)
+                if len(self._window) > self.throttle_per_second:
+                    return {"success": False, "msg": "操作过于频繁，请稍后再试"}
+        if not self._token_valid(form):
+            return {"success": False, "msg": "非法请求，请刷新后重试"}
+        if self.captcha_ttl and not self._captcha_valid(form.get("captcha", "")):
+            return {"success": False, "msg": "验证码校验未通过"}
+        if self.open_at is not None and now < self.open_at:
+            return {"success": False, "msg": "预约时间未开放"}
+        if self.seats is not None and seat not in self.seats:
+            return {"success": False, "msg": "座位不可用"}
+        with self._lock:
+            if slot in self.bookings:
+                return {"success": False, "msg": "该座位已被预约"}
+            if self.ambiguous != "dropped":
+                self.bookings[slot] = user
+        if self.ambiguous:
+            return {"success": False, "msg": "您在页面停留过久，本次操作安全验证已超时。请刷新后再提交预约(代码:302)"}
+        return {"success": True, "msg": "预约成功"}
@@ -0,0 +1,155 @@
+"""
+放座开放时间探测
+
+原来的首抢固定在 target_dt + FIRST_SUBMIT_OFFSET_MS 取 token 提交；服务器实际开放得早或晚都会白等 / 白交。
+这里在目标时间前 lead 开始探测，越接近目标时间探测越密（间隔为距目标时间的一半，夹在
+[min_interval, max_interval] 之间），目标时间之后按 min_interval 继续探测到 target_dt + late，
+总请求数不超过 budget：
+- 探测返回"未开放"（submit_result.NOT_OPEN）：还没开放，继续；
+- 返回成功 / 已被预约 / 已有预约 / 代码:302：服务器已经在处理预约，判定为开放；
+- 其他结果（验证码、token、网络错误等）说明不了是否开放，连续 MAX_INCONCLUSIVE 次后放弃探测。
+
+同一个窗口的所有配置共用一次探测：第一个调用 wait() 的线程负责探测，其余线程等它的结果；
+探测到开放时立即返回，没探测到（放弃 / 预算用完）时开放时间为 None，调用方退回固定的首抢时间。
+探测到的开放时间与名义开放时间的差写日志和运行指标。
+"""
+
+import logging
+import threading
+import time
+
+from utils import submit_result
+from utils.metrics import METRICS
+
+# 这些结果只有在服务器已经开放预约后才会出现
+OPEN_CATEGORIES = (
+    submit_result.SUCCESS,
+    submit_result.AMBIGUOUS,
+    submit_result.SEAT_TAKEN,
+    submit_result.ALREADY_RESERVED,
+)
+MAX_INCONCLUSIVE = 3
+
+
+def probe_times(nominal: float, lead: float, max_interval: float, min_interval: float, budget: int, late: float):
+    """探测时间表（时间戳列表）：从 nominal - lead 开始，间隔逐渐缩短，最多 budget 次，不晚于 nominal + late。"""
+    times = []
+    t = nominal - lead
+    while len(times) < budget and t <= nominal + late:
+        times.append(t)
+        t += min(max_interval, max(min_interval, (nominal - t) / 2))
+    return times
+
+
+class OpenDetector:
+    """一个窗口内共享的开放探测；arm() 为新窗口重置状态，未 arm 时 wait() 直接返回。"""
+
+    def __init__(self):
+        self.enabled = False
+        self.lead = 1.5
+        self.max_interval = 0.3
+        self.min_interval = 0.03
+        self.budget = 25
+        self.late = 3.0
+        self.nominal = None
+        self.opened_at = None
+        self.closed_at = None
+        self.probes = 0
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._polling = False
+
+    def configure(self, enabled: bool = True, lead_ms: float = 1500, max_interval_ms: float = 300,
+                  min_interval_ms: float = 30, budget: int = 25, late_ms: float = 3000):
+        self.enabled = enabled
+        self.lead = lead_ms / 1000
+        self.max_interval = max_interval_ms / 1000
+        self.min_interval = min_interval_ms / 1000
+        self.budget = int(budget)
+        self.late = late_ms / 1000
+        return self
+
+    @property
+    def armed(self) -> bool:
+        return self.enabled and self.nominal is not None
+
+    def arm(self, nominal: float):
+        """为名义开放时间戳 nominal 的窗口重置探测状态。"""
+        with self._lock:
+            self.nominal = nominal
+            self.opened_at = self.closed_at = None
+            self.probes = 0
+            self._done = threading.Event()
+            self._polling = False
+        return self
+
+    def disarm(self):
+        self.nominal = None
+
+    def schedule(self):
+        return probe_times(self.nominal, self.lead, self.max_interval, self.min_interval, self.budget, self.late)
+
+    def wait(self, probe):
+        """等到探测出开放（返回 (开放时间戳, 本线程最后一次探测的结果分类)）或放弃（开放时间戳为 None）。
+
+        probe() 发一次探测请求并返回 submit_result 的分类；只有负责探测的线程会调用它，
+        其余线程返回的分类为 None。
+        """
+        if not self.armed:
+            return None, None
+        with self._lock:
+            poller = not self._polling
+            self._polling = True
+            done = self._done
+        if not poller:
+            done.wait(self.late + self.lead + 5)
+            return self.opened_at, None
+        try:
+            category = self._poll(probe)
+            return self.opened_at, category
+        finally:
+            done.set()
+            self._report()
+
+    def _poll(self, probe):
+        category = None
+        inconclusive = 0
+        now = time.time()
+        # 探测线程到得晚时，已经错过的时间点不再补发
+        for at in [t for t in self.schedule() if t >= now]:
+            while (remaining := at - time.time()) > 0:
+                time.sleep(min(remaining, 0.005))
+            sent = time.time()
+            category = probe()
+            self.probes += 1
+            # 服务器大约在请求往返的中点处理探测
+            seen = (sent + time.time()) / 2
+            if category == submit_result.NOT_OPEN:
+                self.closed_at = seen
+                inconclusive = 0
+            elif category in OPEN_CATEGORIES:
+                self.opened_at = seen
+                return category
+            else:
+                inconclusive += 1
+                if inconclusive >= MAX_INCONCLUSIVE:
+                    logging.warning(
+                        f"[open] {inconclusive} inconclusive probes in a row (last: {category}), fall back to fixed schedule"
+                    )
+                    return category
+        return category
+
+    def _report(self):
+        if self.opened_at is not None:
+            bound = f", last closed probe {(self.closed_at - self.nominal) * 1000:+.0f}ms" if self.closed_at else ""
+            logging.info(
+                f"[open] Detected booking open at {(self.opened_at - self.nominal) * 1000:+.0f}ms vs nominal "
+                f"after {self.probes} probes{bound}"
+            )
+        else:
+            logging.info(f"[open] Booking open not observed after {self.probes} probes, use fixed first submit time")
+        METRICS.open_detected(self.nominal, self.opened_at, self.closed_at, self.probes)
+
+
+# 全局探测器：main 按 config.json 的 open_detect 配置，每个窗口的策略首抢前 arm
+OPEN_DETECT = OpenDetector()
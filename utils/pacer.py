@@ -0,0 +1,109 @@
+"""
+自适应重试节奏（pacer）
+
+替代 submit() 里固定的 sleep_time：
+- 开放后的第一秒（burst 窗口）内不等待，全速提交；
+- 收到限流类提示时按倍数退避，之后逐步恢复到基础间隔；
+- 提交 RTT 明显高于历史最小值时（服务器排队），额外等待多出来的那部分；
+- 所有账号共享一个按 host 计数的令牌桶，避免多个账号一起把服务器打到限流。
+"""
+
+import threading
+import time
+from urllib.parse import urlsplit
+
+from utils import submit_result
+
+
+class HostBudget:
+    """按 host 计数的全局令牌桶：每秒补充 rate 个令牌，最多攒 burst 个。"""
+
+    def __init__(self, rate: float = 20.0, burst: float = 10.0):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def configure(self, rate: float, burst: float):
+        with self._lock:
+            self.rate = rate
+            self.burst = burst
+            self._buckets.clear()
+
+    def acquire(self, url_or_host: str) -> float:
+        """阻塞直到拿到一个令牌，返回等待的秒数；rate<=0 表示不限速。"""
+        if self.rate <= 0:
+            return 0.0
+        host = urlsplit(url_or_host).hostname or url_or_host
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, last = self._buckets.get(host, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - last) * self.rate)
+                if tokens >= 1:
+                    self._buckets[host] = (tokens - 1, now)
+                    return waited
+                self._buckets[host] = (tokens, now)
+                need = (1 - tokens) / self.rate
+            time.sleep(need)
+            waited += need
+
+
+# 全部配置 / 账号共享的 host 预算
+HOST_BUDGET = HostBudget()
+
+
+class AdaptivePacer:
+    """根据提交结果和 RTT 决定下一次提交前等待多久。"""
+
+    def __init__(
+        self,
+        base_interval: float = 0.1,
+        open_at: float | None = None,
+        burst_seconds: float = 1.0,
+        backoff: float = 2.0,
+        max_interval: float = 3.0,
+        recover: float = 0.7,
+    ):
+        self.base_interval = base_interval
+        self.open_at = open_at
+        self.burst_seconds = burst_seconds
+        self.backoff = backoff
+        self.max_interval = max_interval
+        self.recover = recover
+        self.interval = base_interval
+        self.min_rtt = None
+        self.last_rtt = None
+        self.throttled_count = 0
+
+    def in_burst(self, now: float | None = None) -> bool:
+        if self.open_at is None:
+            return False
+        now = time.time() if now is None else now
+        return self.open_at <= now < self.open_at + self.burst_seconds
+
+    def on_response(self, category: str, rtt: float | None = None):
+        if rtt is not None:
+            self.last_rtt = rtt
+            self.min_rtt = rtt if self.min_rtt is None else min(self.min_rtt, rtt)
+        if category == submit_result.THROTTLED:
+            self.throttled_count += 1
+            self.interval = min(self.max_interval, max(self.interval, self.base_interval) * self.backoff)
+        else:
+            self.interval = max(self.base_interval, self.interval * self.recover)
+
+    def next_delay(self, now: float | None = None) -> float:
+        # 被限流时即使在 burst 窗口内也要退避
+        if self.in_burst(now) and self.interval <= self.base_interval:
+            return 0.0
+        delay = self.interval
+        if self.min_rtt is not None and self.last_rtt is not None and self.last_rtt > 2 * self.min_rtt:
+            delay += self.last_rtt - self.min_rtt
+        return min(delay, self.max_interval)
+
+    def wait(self):
+        delay = self.next_delay()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
@@ -0,0 +1,254 @@
+"""
+按阶段标记的采样分析器（main.py --profile）
+
+后台线程每 interval 秒用 sys._current_frames() 取一次所有线程的调用栈，按线程当前所处的阶段
+（login / warm-up / captcha / fire / retry，未标记的为 other）累计成 collapsed stack。
+Python 只在主线程执行信号处理函数，而登录、验证码和提交都跑在线程池里，所以不用 SIGPROF 定时器；
+改为读取每个线程自己的 CPU 时钟（time.pthread_getcpuclockid），两次采样之间没有消耗 CPU 的线程
+（sleep、等锁、等网络）不计入，结果和按 CPU 时间触发的信号采样一致，只统计 CPU 热点。
+没有线程 CPU 时钟的平台退化为按挂钟采样。
+
+stop() 后 write(directory) 为每个阶段写出：
+- <phase>.folded: collapsed stack（"frame;frame;... 样本数"，可直接交给 flamegraph.pl / speedscope）；
+- <phase>.html: 自包含的火焰图（纵向调用层级，宽度为样本占比，悬停显示样本数）。
+"""
+
+import collections
+import logging
+import os
+import sys
+import threading
+import time
+
+OTHER = "other"
+# 栈太深时只保留最内层的若干帧
+MAX_DEPTH = 96
+
+
+def _frame_name(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _cpu_clock(ident: int):
+    try:
+        return time.pthread_getcpuclockid(ident)
+    except (AttributeError, OSError):
+        return None
+
+
+class SamplingProfiler:
+    """进程内的采样分析器；未 start 时 phase() / tag() 都是空操作。"""
+
+    def __init__(self):
+        self.enabled = False
+        self.interval = 0.005
+        self.samples = collections.defaultdict(collections.Counter)
+        self.ticks = 0
+        self._phases = {}
+        self._clocks = {}
+        self._cpu = {}
+        self._names = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, interval: float = 0.005):
+        if self.enabled:
+            return self
+        self.enabled = True
+        self.interval = interval
+        self.samples = collections.defaultdict(collections.Counter)
+        self.ticks = 0
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if not self.enabled:
+            return self
+        self.enabled = False
+        self._stop.set()
+        self._thread.join()
+        return self
+
+    def tag(self, name: str):
+        """把当前线程标记为阶段 name，直到下一次 tag / phase 结束；返回之前的阶段。"""
+        ident = threading.get_ident()
+        previous = self._phases.get(ident)
+        if self.enabled:
+            self._phases[ident] = name
+        return previous
+
+    def phase(self, name: str):
+        """with PROFILER.phase("captcha"): ...，退出时恢复外层阶段。"""
+        return _Phase(self, name)
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.sample(skip=own)
+
+    def sample(self, skip: int | None = None):
+        """对所有线程采样一次（后台线程按 interval 调用）。"""
+        self.ticks += 1
+        frames = sys._current_frames()
+        for ident, frame in frames.items():
+            if ident == skip:
+                continue
+            if not self._busy(ident):
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_DEPTH:
+                code = frame.f_code
+                name = self._names.get(code)
+                if name is None:
+                    name = self._names[code] = _frame_name(code)
+                stack.append(name)
+                frame = frame.f_back
+            stack.reverse()
+            self.samples[self._phases.get(ident, OTHER)][";".join(stack)] += 1
+        # 已退出的线程不再保留 CPU 时钟
+        for ident in [i for i in self._cpu if i not in frames]:
+            self._cpu.pop(ident, None)
+            self._clocks.pop(ident, None)
+
+    def _busy(self, ident: int) -> bool:
+        """两次采样之间该线程是否消耗过 CPU；没有线程 CPU 时钟时总是 True（按挂钟采样）。"""
+        if ident not in self._clocks:
+            self._clocks[ident] = _cpu_clock(ident)
+        clock = self._clocks[ident]
+        if clock is None:
+            return True
+        try:
+            cpu = time.clock_gettime(clock)
+        except OSError:
+            return False
+        previous = self._cpu.get(ident)
+        self._cpu[ident] = cpu
+        return previous is not None and cpu > previous
+
+    def summary(self, top: int = 5) -> str:
+        lines = [f"[profile] {self.ticks} ticks at {self.interval * 1000:.1f}ms"]
+        for phase, stacks in sorted(self.samples.items(), key=lambda kv: -sum(kv[1].values())):
+            leaves = collections.Counter()
+            for stack, count in stacks.items():
+                leaves[stack.rsplit(";", 1)[-1]] += count
+            total = sum(stacks.values())
+            lines.append(f"[profile] {phase}: {total} samples (~{total * self.interval * 1000:.0f}ms CPU)")
+            for name, count in leaves.most_common(top):
+                lines.append(f"[profile]   {count * 100 / total:5.1f}%  {name}")
+        return "\n".join(lines)
+
+    def write(self, directory: str):
+        """写出每个阶段的 .folded 和 .html，返回写出的文件路径列表。"""
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for phase, stacks in self.samples.items():
+            folded = os.path.join(directory, f"{phase}.folded")
+            with open(folded, "w", encoding="utf-8") as f:
+                for stack, count in sorted(stacks.items()):
+                    f.write(f"{stack} {count}\n")
+            page = os.path.join(directory, f"{phase}.html")
+            with open(page, "w", encoding="utf-8") as f:
+                f.write(flamegraph_html(stacks, f"{phase} ({sum(stacks.values())} samples)"))
+            paths += [folded, page]
+        # 所有阶段合在一个文件里，阶段名作为最外层帧
+        combined = os.path.join(directory, "all.folded")
+        with open(combined, "w", encoding="utf-8") as f:
+            for phase, stacks in sorted(self.samples.items()):
+                for stack, count in sorted(stacks.items()):
+                    f.write(f"{phase};{stack} {count}\n")
+        return paths + [combined]
+
+
+class _Phase:
+    def __init__(self, profiler, name: str):
+        self.profiler = profiler
+        self.name = name
+        self.previous = None
+
+    def __enter__(self):
+        self.previous = self.profiler.tag(self.name)
+        return self
+
+    def __exit__(self, *exc):
+        phases = self.profiler._phases
+        ident = threading.get_ident()
+        if self.previous is None:
+            phases.pop(ident, None)
+        else:
+            phases[ident] = self.previous
+        return False
+
+
+def _tree(stacks):
+    root = {"name": "all", "count": 0, "children": {}}
+    for stack, count in stacks.items():
+        root["count"] += count
+        node = root
+        for name in stack.split(";"):
+            node = node["children"].setdefault(name, {"name": name, "count": 0, "children": {}})
+            node["count"] += count
+    return root
+
+
+def _color(name: str) -> str:
+    # 同名帧颜色固定，暖色系
+    h = sum(map(ord, name)) % 55
+    return f"hsl({h}, 80%, {58 + h % 12}%)"
+
+
+def flamegraph_html(stacks, title: str) -> str:
+    """把 collapsed stack 渲染成不依赖外部脚本的 HTML 火焰图（根在最上）。"""
+    # 只有写报告时才用到；模块在每次启动时都会导入（阶段标记），html.entities 不小
+    import html
+
+    root = _tree(stacks)
+    total = root["count"] or 1
+    rows = []
+    depth_max = 0
+
+    def emit(node, depth, left):
+        nonlocal depth_max
+        width = node["count"] * 100 / total
+        if width < 0.05:
+            return
+        depth_max = max(depth_max, depth)
+        label = html.escape(node["name"])
+        rows.append(
+            f'<div class="f" style="top:{depth * 18}px;left:{left:.4f}%;width:{width:.4f}%;'
+            f'background:{_color(node["name"])}" title="{label} — {node["count"]} samples '
+            f'({node["count"] * 100 / total:.1f}%)">{label}</div>'
+        )
+        offset = left
+        for child in sorted(node["children"].values(), key=lambda c: c["name"]):
+            emit(child, depth + 1, offset)
+            offset += child["count"] * 100 / total
+
+    emit(root, 0, 0.0)
+    return (
+        "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>"
+        + html.escape(title)
+        + "</title><style>"
+        "body{font:12px monospace;margin:12px}"
+        "#g{position:relative;height:" + str((depth_max + 1) * 18) + "px}"
+        ".f{position:absolute;height:17px;overflow:hidden;white-space:nowrap;box-sizing:border-box;"
+        "border-right:1px solid #fff;padding-left:2px;line-height:17px;cursor:default}"
+        ".f:hover{filter:brightness(0.85)}"
+        "</style></head><body><h3>" + html.escape(title) + "</h3><div id=\"g\">\n"
+        + "\n".join(rows)
+        + "\n</div></body></html>\n"
+    )
+
+
+# 全局分析器：main.py --profile 时启动，reserve / main 在各阶段打标记
+PROFILER = SamplingProfiler()
+
+
+def write_report(directory: str):
+    """停止采样，写出各阶段文件并把摘要写日志（--profile 在退出时调用）。"""
+    PROFILER.stop()
+    paths = PROFILER.write(directory)
+    logging.info(PROFILER.summary())
+    logging.info(f"[profile] Wrote {len(paths)} files to {directory}")
+    return paths
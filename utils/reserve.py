@@ -1,4 +1,15 @@
 from utils import AES_Encrypt, enc, generate_captcha_key, verify_param
+from utils.hedge import RTT
+from utils.pacer import HOST_BUDGET, AdaptivePacer
+from utils.metrics import METRICS
+from utils.verify import VERIFIER
+from utils import submit_result, textclick
+from utils.slide import SLIDE
+from utils.profiler import PROFILER
+from collections import deque
+from types import MappingProxyType
+from typing import NamedTuple
+import copy
 import json
 import requests
 import re
@@ -6,6 +17,8 @@ import time
 import logging
 import datetime
 import os
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
 from urllib3.exceptions import InsecureRequestWarning
 
 # Load environment variables from .env file
@@ -55,7 +68,153 @@ def get_date(day_offset: int = 0):
     return offset_day.strftime("%Y-%m-%d")
 
 
+# token 在隐藏 input 中，属性顺序和引号类型可能变化，这里做更宽松的匹配
+# 例如：<input type="hidden" id="submit_enc" value="..."/>
+_SUBMIT_ENC_RE = re.compile(
+    r'(?:id|name)\s*=\s*["\']submit_enc["\'][^>]*?value\s*=\s*["\'](.*?)["\']'
+)
+
+
+def extract_submit_enc(html: str) -> str:
+    """从 seatengine/select 页面取 submit_enc，取不到时返回空字符串。"""
+    match = _SUBMIT_ENC_RE.search(html)
+    return match.group(1) if match else ""
+
+
+def unwrap_jsonp(text: str):
+    """去掉 jQuery 回调包装 "cb({...})" 后解析 JSON；不是 JSONP 时按普通 JSON 解析。"""
+    text = text.strip()
+    start = text.find("(")
+    if start > 0 and text.endswith(")") and text[:start].replace("_", "").isalnum():
+        text = text[start + 1 : -1]
+    return json.loads(text)
+
+
+def parse_target_chars(target_text: str):
+    """选字验证码目标文字 '"朝" "阳" "系"' -> ['朝', '阳', '系']；未闭合的引号忽略。"""
+    parts = target_text.split('"')
+    # 奇数下标是引号内的内容；引号个数为奇数时最后一段没有闭合
+    return parts[1 : len(parts) - 1 : 2] if len(parts) % 2 == 0 else parts[1::2]
+
+
+# 各接口地址（mock_server.attach / cassette 会在实例上覆盖）
+LOGIN_PAGE_URL = "https://passport2.chaoxing.com/mlogin?loginType=1&newversion=true&fid="
+# 使用 seatengine 选座页面来获取 submit_enc，与前端行为保持一致
+# 使用命名占位符，包含 roomId/day/seatPageId/fidEnc 四个参数
+# 结构与浏览器中实际 URL 对齐：
+# /front/third/apps/seatengine/select?id=864&day=YYYY-MM-DD&backLevel=2&seatId=602&fidEnc=...
+SEAT_PAGE_URL = (
+    "https://office.chaoxing.com/front/third/apps/seat/select?"
+    "id={roomId}&day={day}&backLevel=2&seatId={seatPageId}&fidEnc={fidEnc}"
+)
+# 使用新版 seatengine 提交接口，与前端保持一致
+SUBMIT_URL = "https://office.chaoxing.com/data/apps/seat/submit"
+SEAT_URL = "https://office.chaoxing.com/data/apps/seat/getusedtimes"
+LOGIN_URL = "https://passport2.chaoxing.com/fanyalogin"
+ROOM_LIST_URL = (
+    "https://office.chaoxing.com/data/apps/seat/room/list?"
+    "cpage={cpage}&pageSize={pageSize}&firstLevelName=&secondLevelName=&thirdLevelName=&deptIdEnc={deptIdEnc}"
+)
+SEAT_LAYOUT_URL = "https://office.chaoxing.com/data/apps/seat/seatgrid/roominfo?id={roomId}"
+# 当前账号的预约记录，用于确认模糊提交结果
+RESERVE_LIST_URL = "https://office.chaoxing.com/data/apps/seat/reservelist?indexId=0&pageSize=100&type=-1"
+CAPTCHA_CHECK_URL = "https://captcha.chaoxing.com/captcha/check/verification/result"
+
+# 所有账号共用的只读请求头模板；会话自己的 headers 在 get_login_status 时从 LOGIN_HEADERS 复制一份
+HEADERS = MappingProxyType({
+    "Referer": "https://office.chaoxing.com/",
+    "Host": "captcha.chaoxing.com",
+    "Pragma": "no-cache",
+    "Sec-Ch-Ua": '"Google Chrome";v="125", "Chromium";v="125", "Not.A/Brand";v="24"',
+    "Sec-Ch-Ua-Mobile": "?0",
+    "Sec-Ch-Ua-Platform": '"Linux"',
+    "Sec-Fetch-Dest": "document",
+    "Sec-Fetch-Mode": "navigate",
+    "Sec-Fetch-Site": "none",
+    "Sec-Fetch-User": "?1",
+    "Upgrade-Insecure-Requests": "1",
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36",
+})
+LOGIN_HEADERS = MappingProxyType({
+    "Accept": "application/json, text/javascript, */*; q=0.01",
+    "accept-encoding": "gzip, deflate, br, zstd",
+    "cache-control": "no-cache",
+    "Connection": "keep-alive",
+    "Accept-Language": "zh-CN,zh;q=0.9,en-US;q=0.8,en;q=0.7",
+    "User-Agent": "Mozilla/5.0 (iPhone; CPU iPhone OS 10_3_1 like Mac OS X) AppleWebKit/603.1.3 (KHTML, like Gecko) Version/10.0 Mobile/14E304 Safari/602.1 wechatdevtools/1.05.2109131 MicroMessenger/8.0.5 Language/zh_CN webview/16364215743155638",
+    "X-Requested-With": "XMLHttpRequest",
+    "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
+    "Host": "passport2.chaoxing.com",
+})
+
+# 每个账号保留的最近提交记录条数
+SUBMIT_LOG_SIZE = 64
+
+
+class SubmitRecord(NamedTuple):
+    """一次提交的结构化记录。"""
+
+    at: float
+    start: str
+    end: str
+    seat: str
+    category: str | None
+    rtt: float | None
+    success: bool
+    msg: str
+
+
+class _SharedAdapter(HTTPAdapter):
+    """所有账号共用的连接池；单个会话 close() 时不关闭，避免断掉其他账号的连接。"""
+
+    def close(self):
+        pass
+
+
+# 连接池按 host 复用，cookie 仍在各自的 Session 里；并发请求各自取一条连接，池满时临时新建
+_SHARED_ADAPTER = _SharedAdapter(pool_connections=16, pool_maxsize=64)
+
+
+def pooled_session() -> requests.Session:
+    """新建一个 requests.Session，http / https 都走共享连接池。"""
+    session = requests.Session()
+    session.mount("http://", _SHARED_ADAPTER)
+    session.mount("https://", _SHARED_ADAPTER)
+    return session
+
+
+class _NoCoordinator:
+    """未配置协调服务时的空操作客户端，接口与 utils.coordinator.Coordinator 相同（不导入该模块）。"""
+
+    enabled = False
+
+    def publish(self, kind, config, roomid, day, times, seat):
+        pass
+
+    def won_elsewhere(self, config) -> bool:
+        return False
+
+    def seat_taken(self, roomid, day, times, seat) -> bool:
+        return False
+
+
+NO_COORDINATOR = _NoCoordinator()
+
+
 class reserve:
+    # 账号数量可能上百，实例不带 __dict__；请求头模板是类属性，所有实例共用
+    __slots__ = (
+        "login_page", "url", "submit_url", "seat_url", "login_url", "room_list_url",
+        "seat_layout_url", "reserve_list_url", "captcha_check_url",
+        "token", "success_times", "submit_msg", "requests",
+        "sleep_time", "max_attempt", "initial_max_attempt", "enable_slider", "enable_textclick",
+        "reserve_next_day", "open_at", "last_category", "last_rtt", "seats_taken", "exhausted",
+        "metrics_key", "username", "textclick_corpus_id", "token_max_age", "_page_token", "cassette",
+        "coordinator",
+    )
+    headers = HEADERS
+    login_headers = LOGIN_HEADERS
+
     def __init__(
         self,
         sleep_time=0.2,
@@ -63,58 +222,50 @@ class reserve:
         enable_slider=False,
         enable_textclick=False,
         reserve_next_day=False,
+        open_at=None,
     ):
-        self.login_page = (
-            "https://passport2.chaoxing.com/mlogin?loginType=1&newversion=true&fid="
-        )
-        # 使用 seatengine 选座页面来获取 submit_enc，与前端行为保持一致
-        # 使用命名占位符，包含 roomId/day/seatPageId/fidEnc 四个参数
-        # 结构与浏览器中实际 URL 对齐：
-        # /front/third/apps/seatengine/select?id=864&day=YYYY-MM-DD&backLevel=2&seatId=602&fidEnc=...
-        self.url = (
-            "https://office.chaoxing.com/front/third/apps/seat/select?"
-            "id={roomId}&day={day}&backLevel=2&seatId={seatPageId}&fidEnc={fidEnc}"
-        )
-        # 使用新版 seatengine 提交接口，与前端保持一致
-        self.submit_url = "https://office.chaoxing.com/data/apps/seat/submit"
-        self.seat_url = "https://office.chaoxing.com/data/apps/seat/getusedtimes"
-        self.login_url = "https://passport2.chaoxing.com/fanyalogin"
+        self.login_page = LOGIN_PAGE_URL
+        self.url = SEAT_PAGE_URL
+        self.submit_url = SUBMIT_URL
+        self.seat_url = SEAT_URL
+        self.login_url = LOGIN_URL
+        self.room_list_url = ROOM_LIST_URL
+        self.seat_layout_url = SEAT_LAYOUT_URL
+        self.reserve_list_url = RESERVE_LIST_URL
+        self.captcha_check_url = CAPTCHA_CHECK_URL
         self.token = ""
         self.success_times = 0
-        self.fail_dict = []
-        self.submit_msg = []
-        self.requests = requests.session()
-        self.headers = {
-            "Referer": "https://office.chaoxing.com/",
-            "Host": "captcha.chaoxing.com",
-            "Pragma": "no-cache",
-            "Sec-Ch-Ua": '"Google Chrome";v="125", "Chromium";v="125", "Not.A/Brand";v="24"',
-            "Sec-Ch-Ua-Mobile": "?0",
-            "Sec-Ch-Ua-Platform": '"Linux"',
-            "Sec-Fetch-Dest": "document",
-            "Sec-Fetch-Mode": "navigate",
-            "Sec-Fetch-Site": "none",
-            "Sec-Fetch-User": "?1",
-            "Upgrade-Insecure-Requests": "1",
-            "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36",
-        }
-        self.login_headers = {
-            "Accept": "application/json, text/javascript, */*; q=0.01",
-            "accept-encoding": "gzip, deflate, br, zstd",
-            "cache-control": "no-cache",
-            "Connection": "keep-alive",
-            "Accept-Language": "zh-CN,zh;q=0.9,en-US;q=0.8,en;q=0.7",
-            "User-Agent": "Mozilla/5.0 (iPhone; CPU iPhone OS 10_3_1 like Mac OS X) AppleWebKit/603.1.3 (KHTML, like Gecko) Version/10.0 Mobile/14E304 Safari/602.1 wechatdevtools/1.05.2109131 MicroMessenger/8.0.5 Language/zh_CN webview/16364215743155638",
-            "X-Requested-With": "XMLHttpRequest",
-            "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
-            "Host": "passport2.chaoxing.com",
-        }
+        # 最近 SUBMIT_LOG_SIZE 次提交的结构化记录（SubmitRecord），不再无限追加字符串
+        self.submit_msg = deque(maxlen=SUBMIT_LOG_SIZE)
+        self.requests = pooled_session()
 
         self.sleep_time = sleep_time
         self.max_attempt = max_attempt
+        self.initial_max_attempt = max_attempt
         self.enable_slider = enable_slider
         self.enable_textclick = enable_textclick
         self.reserve_next_day = reserve_next_day
+        # 预约开放时间（时间戳），用于 pacer 在开放后第一秒内全速提交
+        self.open_at = open_at
+        # 最近一次提交的结果分类 / RTT，以及已确认被占用的座位
+        self.last_category = None
+        self.last_rtt = None
+        self.seats_taken = set()
+        # 为 True 表示该配置继续重试已无意义（全部候选座位已被占用或已有预约）
+        self.exhausted = False
+        # 指标记录用的配置编号（main 中设置为配置在 users 中的下标）
+        self.metrics_key = None
+        # 登录账号（明文），预约校验按账号缓存查询结果
+        self.username = None
+        # 最近一次选字识别在语料里的编号，提交后写回校验结果
+        self.textclick_corpus_id = None
+        # 页面 token 可复用的最长时间（秒，来自 token 寿命模型），0 表示每次提交前都重新获取
+        self.token_max_age = 0.0
+        self._page_token = None
+        # 录制 / 回放时由 Cassette.attach 设置
+        self.cassette = None
+        # 多节点协同时 main 换成 utils.coordinator.COORDINATOR，发布 / 查询各节点的结果
+        self.coordinator = NO_COORDINATOR
         requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
 
     # login and page token
@@ -131,22 +282,19 @@ class reserve:
             method: "GET" 或 "POST"，允许按前端实现切换请求方式
             data: 当使用 POST 时提交的表单数据
         """
+        HOST_BUDGET.acquire(url)
+        start = time.perf_counter()
         if method.upper() == "POST":
             response = self.requests.post(url=url, data=data or {}, verify=False)
         else:
             response = self.requests.get(url=url, verify=False)
+        RTT.record("page", time.perf_counter() - start)
 
         # 统一按 UTF-8 解码，并忽略非法字符，避免 charset 识别错误导致正则匹配失败
         html = response.content.decode("utf-8", errors="ignore")
 
-        # token 在隐藏 input 中，属性顺序和引号类型可能变化，这里做更宽松的匹配
-        # 例如：<input type="hidden" id="submit_enc" value="..."/>
-        # 注意：这里需要匹配 id/name 后面的等号和可选空格
-        token_matches = re.findall(
-            r'(?:id|name)\s*=\s*["\']submit_enc["\'][^>]*?value\s*=\s*["\'](.*?)["\']',
-            html,
-        )
-        if not token_matches:
+        token = extract_submit_enc(html)
+        if not token:
             # 取不到 token 时：
             # 1. 控制台打印部分页面内容
             # 2. 将完整 HTML 保存到 html_debug 目录，方便你用浏览器打开对比前端结构
@@ -164,18 +312,69 @@ class reserve:
                 logging.warning(f"Failed to save debug HTML for seatengine page: {e}")
             return "", ""
 
-        token = token_matches[0]
         # 现在页面没有单独的 algorithm 字段，直接复用 submit_enc
         algorithm_value = token if require_value else ""
         return token, algorithm_value
 
-    def get_login_status(self):
-        self.requests.headers = self.login_headers
-        self.requests.get(url=self.login_page, verify=False)
+    def _reusable_page_token(self, page_url):
+        """token_max_age 内复用上一次取到的 token，省掉一次页面请求；上次提交报 token 失效时重新获取。"""
+        cached = self._page_token
+        if (
+            self.token_max_age > 0
+            and cached is not None
+            and cached[0] == page_url
+            and time.monotonic() - cached[3] < self.token_max_age
+            and self.last_category != submit_result.TOKEN
+        ):
+            return cached[1], cached[2]
+        # 寿命从发出请求算起，偏保守
+        fetched_at = time.monotonic()
+        token, value = self._get_page_token(page_url, require_value=True, method="GET")
+        self._page_token = (page_url, token, value, fetched_at) if token else None
+        return token, value
+
+    def reset_window(self, open_at=None):
+        """常驻模式下复用会话进入下一个预约窗口前，清空上一个窗口的提交状态。"""
+        self.open_at = open_at
+        self.last_category = None
+        self._page_token = None
+        self.last_rtt = None
+        self.seats_taken = set()
+        self.exhausted = False
+        self.max_attempt = self.initial_max_attempt
+
+    def fork(self):
+        """复制出一个共享登录状态、但使用独立 Session 的实例，供对冲请求并发使用。
+
+        连接池仍是共享的（并发请求各自占一条连接）；submit_msg 与原实例共享同一个记录队列。
+        """
+        clone = copy.copy(self)
+        clone.requests = pooled_session()
+        clone.requests.headers = self.requests.headers.copy()
+        clone.requests.cookies.update(self.requests.cookies)
+        # 录制 / 回放时对冲副本也走同一个 cassette
+        if self.cassette is not None:
+            self.cassette.attach(clone)
+        return clone
 
-    def login(self, username, password):
-        username = AES_Encrypt(username)
-        password = AES_Encrypt(password)
+    def get_login_status(self):
+        # 会话自己的请求头副本（后面会改 Host），模板保持不变
+        self.requests.headers = CaseInsensitiveDict(LOGIN_HEADERS)
+        with PROFILER.phase("login"):
+            self.requests.get(url=self.login_page, verify=False)
+
+    def login(self, username, password, encrypted=None):
+        """encrypted: 运行计划里预先算好的 (用户名密文, 密码密文)，为空时在这里加密。"""
+        with PROFILER.phase("login"):
+            return self._login(username, password, encrypted)
+
+    def _login(self, username, password, encrypted=None):
+        self.username = username
+        if encrypted:
+            username, password = encrypted
+        else:
+            username = AES_Encrypt(username)
+            password = AES_Encrypt(password)
         parm = {
             "fid": -1,
             "uname": username,
@@ -195,11 +394,36 @@ class reserve:
             return (False, obj["msg2"])
 
     # extra: get roomid
+    def room_list_page(self, encode, cpage: int = 1, page_size: int = 100):
+        """获取 room/list 的某一页，返回 data 字段（包含 seatRoomList 及分页信息）。"""
+        url = self.room_list_url.format(cpage=cpage, pageSize=page_size, deptIdEnc=encode)
+        json_data = self.requests.get(url=url, verify=False).content.decode("utf-8")
+        return json.loads(json_data).get("data") or {}
+
+    def seat_layout(self, roomid):
+        """获取房间的座位布局，返回座位号列表；接口异常时返回 None。"""
+        try:
+            response = self.requests.get(
+                url=self.seat_layout_url.format(roomId=roomid), verify=False
+            )
+            data = json.loads(response.content.decode("utf-8")).get("data") or {}
+        except Exception as e:
+            logging.warning(f"Failed to get seat layout of room {roomid}: {e}")
+            return None
+        seat_list = data.get("seatList")
+        if seat_list is None:
+            seat_list = (data.get("seatRoom") or {}).get("seatList") or []
+        return [str(seat.get("seatNum")) for seat in seat_list if seat.get("seatNum")]
+
+    def reservation_list(self):
+        """获取当前账号的预约记录（seat/reservelist），返回原始记录列表。"""
+        HOST_BUDGET.acquire(self.reserve_list_url)
+        response = self.requests.get(url=self.reserve_list_url, verify=False, timeout=5)
+        data = json.loads(response.content.decode("utf-8")).get("data") or {}
+        return data.get("reserveList") or []
+
     def roomid(self, encode):
-        url = f"https://office.chaoxing.com/data/apps/seat/room/list?cpage=1&pageSize=100&firstLevelName=&secondLevelName=&thirdLevelName=&deptIdEnc={encode}"
-        json_data = self.requests.get(url=url).content.decode("utf-8")
-        ori_data = json.loads(json_data)
-        for i in ori_data["data"]["seatRoomList"]:
+        for i in self.room_list_page(encode).get("seatRoomList", []):
             info = f'{i["firstLevelName"]}-{i["secondLevelName"]}-{i["thirdLevelName"]} id为：{i["id"]}'
             print(info)
 
@@ -211,13 +435,17 @@ class reserve:
         参数:
             captcha_type: "slide"（滑块）或 "textclick"（选字）
         """
-        if captcha_type == "slide":
-            return self._resolve_slide_captcha()
-        elif captcha_type == "textclick":
-            return self._resolve_textclick_captcha()
-        else:
-            logging.error(f"Unknown captcha type: {captcha_type}")
-            return ""
+        start = time.perf_counter()
+        with PROFILER.phase("captcha"):
+            if captcha_type == "slide":
+                validate = self._resolve_slide_captcha()
+            elif captcha_type == "textclick":
+                validate = self._resolve_textclick_captcha()
+            else:
+                logging.error(f"Unknown captcha type: {captcha_type}")
+                return ""
+        METRICS.captcha(self.metrics_key, time.perf_counter() - start)
+        return validate
 
     def _resolve_slide_captcha(self):
         """滑块验证码求解。"""
@@ -247,7 +475,9 @@ class reserve:
         
         # 尝试控法提交，目前不能100%保证页序正确
         # 所以放记了目前的应对数序验证，直接提交
-        return self._submit_captcha("textclick", captcha_token, positions)
+        validate = self._submit_captcha("textclick", captcha_token, positions)
+        textclick.mark(self.textclick_corpus_id, bool(validate))
+        return validate
 
     def _submit_captcha(self, captcha_type, captcha_token, click_array):
         """统一的验证码提交逻辑。
@@ -270,14 +500,11 @@ class reserve:
         }
         logging.debug(f"Submit captcha params: {params}")
         response = self.requests.get(
-            f"https://captcha.chaoxing.com/captcha/check/verification/result",
+            self.captcha_check_url,
             params=params,
             headers=self.headers,
         )
-        text = response.text.replace(
-            "jQuery33109180509737430778_1716381333117(", ""
-        ).replace(")", "")
-        data = json.loads(text)
+        data = unwrap_jsonp(response.text)
         logging.info(f"Successfully resolve the captcha token: {data}")
         try:
             validate_val = json.loads(data["extraData"])["validate"]
@@ -305,12 +532,7 @@ class reserve:
             "b": "a",
         }
         response = self.requests.get(url=url, params=params, headers=self.headers)
-        content = response.text
-
-        data = content.replace(
-            "jQuery33107685004390294206_1716461324846(", ""
-        ).replace(")", "")
-        data = json.loads(data)
+        data = unwrap_jsonp(response.text)
         captcha_token = data["token"]
         vo = data.get("imageVerificationVo", {})
         
@@ -413,52 +635,20 @@ class reserve:
             
             # 解析目标文字格式: " "" 业" """ "" 为单个字节）
             # 例子: '" \u5730" "\u5927" "\u4efb"' -> ['\u5730', '\u5927', '\u4efb']
-            target_chars = []
-            i = 0
-            while i < len(target_text):
-                if target_text[i] == '"':
-                    # 找下一个双引号
-                    j = i + 1
-                    while j < len(target_text) and target_text[j] != '"':
-                        j += 1
-                    if j < len(target_text):
-                        target_chars.append(target_text[i+1:j])
-                        i = j + 1
-                    else:
-                        i += 1
-                else:
-                    i += 1
+            target_chars = parse_target_chars(target_text)
             
             logging.info(f"Parsed target characters: {target_chars}")
             
-            # 从图灵云的识别结果中找到目标字符的坐标
-            result_positions = []
-            used_indices = set()  # 记录已使用的索引，避免重复匹配同一个字符
-            
-            for target_char in target_chars:
-                # 在识别的文字中找该字符（跳过已使用的索引）
-                found = False
-                for idx, recognized_char in enumerate(recognized_text):
-                    if recognized_char == target_char and idx < len(coordinates) and idx not in used_indices:
-                        result_positions.append(coordinates[idx])
-                        used_indices.add(idx)
-                        logging.info(f"Found target '{target_char}' at position {idx}: {coordinates[idx]}")
-                        found = True
-                        break
-                
-                if not found:
-                    # 如果有任何一个目标字符找不到，直接丢弃本次识别结果，返回 None
-                    logging.warning(f"Target character '{target_char}' not found in recognized text '{recognized_text}'")
-                    logging.warning(f"Discarding this captcha recognition, will retry with new captcha")
-                    return None
-            
-            # 确保找到了所有目标字符
-            if len(result_positions) == len(target_chars):
-                logging.info(f"Final positions for target {target_chars}: {result_positions}")
-                return result_positions
-            else:
-                logging.error(f"Could not find all target characters. Found {len(result_positions)}/{len(target_chars)}")
+            # 目标字 -> OCR 字形的最优分配（候选字 + 置信度 + 形近字），只有分不出来时才换一张
+            glyphs = textclick.glyphs_from_ocr(ocr_result)
+            result_positions, confidence = textclick.match(target_chars, glyphs)
+            self.textclick_corpus_id = textclick.record(target_chars, ocr_result, result_positions, confidence)
+            if result_positions is None:
+                logging.warning(f"Targets {target_chars} cannot be assigned to recognized text '{recognized_text}'")
+                logging.warning(f"Discarding this captcha recognition, will retry with new captcha")
                 return None
+            logging.info(f"Final positions for target {target_chars}: {result_positions} (confidence {confidence})")
+            return result_positions
             
         except Exception as e:
             logging.error(f"FateADM recognition failed: {e}")
@@ -484,33 +674,16 @@ class reserve:
             "b": "a",
         }
         response = self.requests.get(url=url, params=params, headers=self.headers)
-        content = response.text
-
-        data = content.replace(
-            "jQuery33107685004390294206_1716461324846(", ")"
-        ).replace(")", "")
-        data = json.loads(data)
+        data = unwrap_jsonp(response.text)
         captcha_token = data["token"]
         bg = data["imageVerificationVo"]["shadeImage"]
         tp = data["imageVerificationVo"]["cutoutImage"]
         return captcha_token, bg, tp
 
     def x_distance(self, bg, tp):
-        import numpy as np
-        import cv2
-        import os
+        """下载背景图和滑块图，返回缺口的 x（引擎见 utils.slide，按 slider.engine 配置选择）。"""
         import time as _time
 
-        def cut_slide(slide):
-            slider_array = np.frombuffer(slide, np.uint8)
-            slider_image = cv2.imdecode(slider_array, cv2.IMREAD_UNCHANGED)
-            slider_part = slider_image[:, :, :3]
-            mask = slider_image[:, :, 3]
-            mask[mask != 0] = 255
-            x, y, w, h = cv2.boundingRect(mask)
-            cropped_image = slider_part[y : y + h, x : x + w]
-            return cropped_image
-
         c_captcha_headers = {
             "Referer": "https://office.chaoxing.com/",
             "Host": "captcha-b.chaoxing.com",
@@ -544,18 +717,20 @@ class reserve:
         except Exception as e:
             logging.warning(f"Failed to save captcha images: {e}")
 
-        bg_img = cv2.imdecode(np.frombuffer(bg_bytes, np.uint8), cv2.IMREAD_COLOR)
-        tp_img = cut_slide(tp_bytes)
-        bg_edge = cv2.Canny(bg_img, 100, 200)
-        tp_edge = cv2.Canny(tp_img, 100, 200)
-        bg_pic = cv2.cvtColor(bg_edge, cv2.COLOR_GRAY2RGB)
-        tp_pic = cv2.cvtColor(tp_edge, cv2.COLOR_GRAY2RGB)
-        res = cv2.matchTemplate(bg_pic, tp_pic, cv2.TM_CCOEFF_NORMED)
-        _, _, _, max_loc = cv2.minMaxLoc(res)
-        tl = max_loc
-        return tl[0]
-
-    def submit(self, times, roomid, seatid, action, endtime_hms: str | None = None, fidEnc: str | None = None, seat_page_id: str | None = None):
+        return SLIDE.locate(bg_bytes, tp_bytes)
+
+    def submit(
+        self,
+        times,
+        roomid,
+        seatid,
+        action,
+        endtime_hms: str | None = None,
+        fidEnc: str | None = None,
+        seat_page_id: str | None = None,
+        page_url: str | None = None,
+        day: str | None = None,
+    ):
         """提交预约。
 
         关键点：为了模拟手动“刷新页面再提交”，这里每次尝试前都会重新访问
@@ -569,20 +744,40 @@ class reserve:
             endtime_hms: 结束时间（北京时间 HH:MM:SS），用于 GitHub Actions 提前停止
             fidEnc: 对应前端 URL 中的 fidEnc 参数（例如 "dac916902610d220"）
             seat_page_id: 对应前端 URL 中的 seatId 参数（例如 "3308"）
+            page_url: 运行计划中预先拼好的选座页面 URL，给出时不再每次格式化
+            day: 运行计划中预先计算的预约日期（YYYY-MM-DD）
         """
         # 计算与 get_submit 相同的预约日期，保证页面 token 与提交使用的是同一天
-        beijing_today = (datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=8)).date()
-        delta_day = 1 if self.reserve_next_day else 0
-        day = beijing_today + datetime.timedelta(days=delta_day)
+        if day is None:
+            day = str(self._reservation_day())
+        if page_url is None:
+            page_url = self.url.format(
+                roomId=roomid,
+                day=day,
+                seatPageId=seat_page_id or "",
+                fidEnc=fidEnc or "",
+            )
         
         # 每次调用 submit 时重置 max_attempt，确保每个配置都有充足的重试机会
         original_max_attempt = self.max_attempt
+        pacer = AdaptivePacer(base_interval=self.sleep_time, open_at=self.open_at)
 
         for seat in seatid:
+            if seat in self.seats_taken:
+                continue
             # 为每个座位重置尝试次数
             self.max_attempt = original_max_attempt
             suc = False
             while ~suc and self.max_attempt > 0:
+                # 多节点协同：别的节点已经约到该配置 / 该座位，不再提交
+                if self.coordinator.won_elsewhere(self.metrics_key):
+                    logging.info(f"[submit] Config #{self.metrics_key} already booked by another node")
+                    METRICS.outcome(self.metrics_key, "won_elsewhere")
+                    return True
+                if self.coordinator.seat_taken(roomid, day, times, seat):
+                    logging.info(f"[submit] Seat {seat} already booked via another node, move to next candidate seat")
+                    self.seats_taken.add(seat)
+                    break
                 # 如果配置了结束时间，并且在 GitHub Actions 模式下，达到或超过结束时间就立刻停止循环
                 if endtime_hms and action:
                     beijing_now = datetime.datetime.utcnow() + datetime.timedelta(hours=8)
@@ -594,19 +789,9 @@ class reserve:
                         return suc
 
                 # 使用 seatengine/select 页面获取 submit_enc，相当于手动刷新选座页
-                page_url = self.url.format(
-                    roomId=roomid,
-                    day=str(day),
-                    seatPageId=seat_page_id or "",
-                    fidEnc=fidEnc or "",
-                )
                 # seatengine/select 页面在前端是通过 GET 打开的，这里也使用 GET，
                 # 否则可能拿到的是错误页或不包含 submit_enc 的内容。
-                token, value = self._get_page_token(
-                    page_url,
-                    require_value=True,
-                    method="GET",
-                )
+                token, value = self._reusable_page_token(page_url)
                 logging.info(f"Get token from {page_url}: {token}")
                 # 如果没有拿到 token，通常说明当前会话已失效或页面结构有变，
                 # 不再继续本轮提交，交给外层重新登录/重试。
@@ -633,21 +818,49 @@ class reserve:
                     captcha=captcha,
                     action=action,
                     value=value,
+                    day=day,
                 )
                 if suc:
                     return suc
-                time.sleep(self.sleep_time)
+                pacer.on_response(self.last_category, self.last_rtt)
+                # 终止类结果：同一座位不再重试。账号已有预约时整个配置停止，座位被占时换下一个候选座位
+                if submit_result.is_terminal(self.last_category):
+                    if self.last_category == submit_result.ALREADY_RESERVED:
+                        logging.info("[submit] Account already has a reservation in this time range, stop retrying")
+                        self.exhausted = True
+                        METRICS.outcome(self.metrics_key, submit_result.ALREADY_RESERVED)
+                        return suc
+                    logging.info(f"[submit] Seat {seat} confirmed taken, move to next candidate seat")
+                    self.seats_taken.add(seat)
+                    break
+                pacer.wait()
                 self.max_attempt -= 1
+        if seatid and all(seat in self.seats_taken for seat in seatid):
+            logging.info(f"[submit] All candidate seats {list(seatid)} are taken, stop retrying this config")
+            self.exhausted = True
+            METRICS.outcome(self.metrics_key, submit_result.SEAT_TAKEN)
         return suc
 
-    def get_submit(
-        self, url, times, token, roomid, seatid, captcha="", action=False, value=""
-    ):
-        # 统一以北京时间（UTC+8）的"今天"为基准，不再区分本地 / GitHub Actions，
-        # 是否预约明天仅由 self.reserve_next_day 决定。
+    def _log_submit(self, sent_at, times, seatid, data, category, rtt=None):
+        """把一次提交结果追加到有界的记录队列（超出 SUBMIT_LOG_SIZE 时丢弃最旧的）。"""
+        self.submit_msg.append(SubmitRecord(
+            sent_at, times[0], times[1], str(seatid), category, rtt,
+            bool(data.get("success", False)), str(data.get("msg") or ""),
+        ))
+
+    def _reservation_day(self) -> datetime.date:
+        """统一以北京时间（UTC+8）的"今天"为基准，不再区分本地 / GitHub Actions，
+        是否预约明天仅由 self.reserve_next_day 决定。"""
         beijing_today = (datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=8)).date()
         delta_day = 1 if self.reserve_next_day else 0
-        day = beijing_today + datetime.timedelta(days=delta_day)
+        return beijing_today + datetime.timedelta(days=delta_day)
+
+    def get_submit(
+        self, url, times, token, roomid, seatid, captcha="", action=False, value="", day=None
+    ):
+        # day 由运行计划预先算好时直接使用，否则按当前北京时间计算
+        if day is None:
+            day = self._reservation_day()
         # 与前端保持一致：提交 roomId/startTime/endTime/day/seatNum/captcha/wyToken，再计算 enc
         # 按前端逻辑：wyToken 仅在开启网易风控时由 wyRiskObj.getToken() 生成；
         # 常规情况下为空字符串，这里保持一致，不再把 submit_enc 当作 wyToken 传给后端。
@@ -666,23 +879,48 @@ class reserve:
         logging.info(f"submit enc: {parm['enc']}")
 
         # 按前端行为采用表单提交（POST body），并关闭证书验证以避免告警
+        HOST_BUDGET.acquire(url)
+        sent_at = time.time()
+        start = time.perf_counter()
         html = self.requests.post(url=url, data=parm, verify=False).content.decode(
             "utf-8"
         )
+        self.last_rtt = time.perf_counter() - start
+        RTT.record("submit", self.last_rtt)
         data = json.loads(html)
-        self.submit_msg.append(times[0] + "~" + times[1] + ":  " + str(data))
+        self.last_category = submit_result.classify(data)
+        METRICS.submit(self.metrics_key, self.last_category, self.last_rtt, sent_at)
+        self._log_submit(sent_at, times, seatid, data, self.last_category, self.last_rtt)
         logging.info(data)
 
-        # 特殊处理：服务器返回 302 错误码（"您在页面停留过久，本次操作安全验证已超时。请刷新后再提交预约(代码:302)"）
-        # 实际抢座过程中，这类返回往往已经完成了预约，只是前端要求用户刷新页面。
-        msg = str(data.get("msg", ""))
-        if not data.get("success") and "代码:302" in msg:
-            logging.warning(
-                "Server returned timeout code 302, treat this as success according to script preference."
-            )
-            return True
+        # 模糊 / 终止类结果：查询账号的预约记录确认座位是不是已经是自己的。
+        # 302（"您在页面停留过久……请刷新后再提交预约(代码:302)"）往往已经完成了预约；
+        # "已有预约" / "已被预约" 也可能是自己上一次（或对冲请求）刚约到的
+        if self.last_category in (submit_result.AMBIGUOUS, submit_result.ALREADY_RESERVED, submit_result.SEAT_TAKEN):
+            seats = None if self.last_category == submit_result.ALREADY_RESERVED else [seatid]
+            confirmed = VERIFIER.confirm(self, str(day), roomid, times, seats, since=sent_at)
+            if confirmed:
+                self.last_category = submit_result.SUCCESS
+                METRICS.outcome(self.metrics_key, "verified")
+                self.coordinator.publish("won", self.metrics_key, roomid, day, times, seatid)
+                return True
+            if self.last_category == submit_result.SEAT_TAKEN:
+                self.coordinator.publish("taken", None, roomid, day, times, seatid)
+            if self.last_category == submit_result.AMBIGUOUS:
+                if confirmed is None:
+                    # 无法校验时沿用原来的偏好：按成功处理
+                    logging.warning(
+                        "Server returned timeout code 302, treat this as success according to script preference."
+                    )
+                    self.coordinator.publish("won", self.metrics_key, roomid, day, times, seatid)
+                    return True
+                logging.warning("Server returned timeout code 302 but no booking found, keep retrying")
+                return False
 
-        return data.get("success", False)
+        if data.get("success", False):
+            self.coordinator.publish("won", self.metrics_key, roomid, day, times, seatid)
+            return True
+        return False
 
     def burst_submit_once(self, times, roomid, seatid, captcha, token, value):
         """单次提交，返回完整响应 dict，用于 1.8 秒高频窗口内的逻辑判断。
@@ -690,9 +928,7 @@ class reserve:
         注意：这里沿用新的 enc 生成方式，token 仅作为前端算法值 value 的来源，
         不再直接作为提交字段发送给后端。
         """
-        beijing_today = (datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=8)).date()
-        delta_day = 1 if self.reserve_next_day else 0
-        day = beijing_today + datetime.timedelta(days=delta_day)
+        day = self._reservation_day()
         parm = {
             "roomId": roomid,
             "startTime": times[0],
@@ -708,6 +944,6 @@ class reserve:
             "utf-8"
         )
         data = json.loads(html)
-        self.submit_msg.append(times[0] + "~" + times[1] + ":  " + str(data))
+        self._log_submit(time.time(), times, seatid, data, submit_result.classify(data))
         logging.info(data)
         return data
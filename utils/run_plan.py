@@ -0,0 +1,218 @@
+"""
+运行计划（run plan）
+
+启动时把 config.json 的 reserve 列表和环境变量里的账号编译成一份不可变的运行计划：
+- 每个配置的账号密码（按 USERNAMES / PASSWORDS 的索引规则确定一次）；
+- 预约日期、选座页面 URL、座位候选元组；
+- 当天是否需要执行，以及登录 / 滑块预热 / 第一次提交 / 结束的时间点。
+
+主循环、策略首抢和常驻模式只遍历这份计划，不再每轮重新解析 daysofweek、
+拆分账号字符串、归一化 seatid 或格式化 URL。配置有问题时 compile_plan 一次性
+抛出 PlanError 列出全部问题，在窗口开始前就失败。
+"""
+
+import datetime
+from typing import NamedTuple
+
+from utils import encrypt_credentials, get_user_credentials
+
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+DEFAULT_PAGE_URL = (
+    "https://office.chaoxing.com/front/third/apps/seat/select?"
+    "id={roomId}&day={day}&backLevel=2&seatId={seatPageId}&fidEnc={fidEnc}"
+)
+
+
+class PlanError(ValueError):
+    """配置或账号无法编译成运行计划；problems 为逐条的问题描述。"""
+
+    def __init__(self, problems):
+        self.problems = list(problems)
+        super().__init__("; ".join(self.problems))
+
+
+class ConfigPlan(NamedTuple):
+    index: int
+    username: str
+    password: str
+    times: tuple
+    roomid: str
+    seats: tuple
+    seat_page_id: str
+    fid_enc: str
+    daysofweek: frozenset
+    day: str
+    page_url: str
+    # 今天是否执行；不执行时 skip_reason 说明原因（日志用）
+    active: bool
+    skip_reason: str
+    # 登录用的 (用户名密文, 密码密文)，编译计划时预先算好；不执行的配置为空
+    encrypted: tuple = ()
+
+    def as_user(self) -> dict:
+        """还原成 config.json 中 reserve 配置的字段（指标记录等沿用旧格式的地方使用）。"""
+        return {
+            "username": self.username,
+            "times": list(self.times),
+            "roomid": self.roomid,
+            "seatid": list(self.seats),
+            "seatPageId": self.seat_page_id,
+            "fidEnc": self.fid_enc,
+            "daysofweek": sorted(self.daysofweek),
+        }
+
+
+class RunPlan(NamedTuple):
+    configs: tuple
+    weekday: str
+    day: str
+    target_dt: datetime.datetime
+    login_at: datetime.datetime
+    slider_at: datetime.datetime
+    first_submit_at: datetime.datetime
+    end_hms: str
+
+    def active(self):
+        return [c for c in self.configs if c.active]
+
+    @property
+    def active_count(self) -> int:
+        return sum(c.active for c in self.configs)
+
+
+def _check_hm(value) -> bool:
+    if not isinstance(value, str) or len(value) != 5 or value[2] != ":":
+        return False
+    hh, mm = value[:2], value[3:]
+    return hh.isdigit() and mm.isdigit() and int(hh) < 24 and int(mm) < 60
+
+
+def validate_config(index: int, user) -> list:
+    """单个 reserve 配置的结构校验，返回问题描述列表。"""
+    prefix = f"config #{index}"
+    if not isinstance(user, dict):
+        return [f"{prefix}: must be an object"]
+    problems = []
+    times = user.get("times")
+    if not isinstance(times, (list, tuple)) or len(times) != 2 or not all(_check_hm(t) for t in times):
+        problems.append(f"{prefix}: times must be [\"HH:MM\", \"HH:MM\"], got {times!r}")
+    elif times[0] >= times[1]:
+        problems.append(f"{prefix}: start time {times[0]} is not before end time {times[1]}")
+    if not str(user.get("roomid") or "").strip():
+        problems.append(f"{prefix}: roomid is empty")
+    seatid = user.get("seatid")
+    if isinstance(seatid, str):
+        seatid = [seatid]
+    if not isinstance(seatid, (list, tuple)) or not seatid or not all(str(s).strip() for s in seatid):
+        problems.append(f"{prefix}: seatid must be a seat number or a non-empty list, got {user.get('seatid')!r}")
+    days = user.get("daysofweek")
+    if not isinstance(days, (list, tuple)) or not days:
+        problems.append(f"{prefix}: daysofweek must be a non-empty list")
+    else:
+        unknown = [d for d in days if d not in WEEKDAYS]
+        if unknown:
+            problems.append(f"{prefix}: unknown daysofweek {unknown}")
+    return problems
+
+
+def resolve_credentials(users, action: bool, usernames=None, passwords=None):
+    """为每个配置确定 (username, password)；无法确定时为 None。
+
+    本地模式用 config.json 里的账号；action 模式用环境变量：只有一个账号时所有配置共用，
+    否则按配置下标取对应账号。环境变量缺失或数量不一致时抛出 PlanError。
+    """
+    if not action:
+        return [(u.get("username", ""), u.get("password", "")) for u in users]
+    if usernames is None and passwords is None:
+        usernames, passwords = get_user_credentials(action)
+    if not usernames or not passwords:
+        raise PlanError(["USERNAMES or PASSWORDS not configured correctly in env"])
+    usernames_list, passwords_list = usernames.split(","), passwords.split(",")
+    if len(usernames_list) != len(passwords_list):
+        raise PlanError(["USERNAMES and PASSWORDS count mismatch"])
+    if len(usernames_list) == 1:
+        return [(usernames_list[0], passwords_list[0])] * len(users)
+    return [
+        (usernames_list[i], passwords_list[i]) if i < len(usernames_list) else None
+        for i in range(len(users))
+    ]
+
+
+def compile_plan(
+    users,
+    action: bool,
+    target_dt: datetime.datetime,
+    end_hms: str,
+    reserve_next_day: bool = True,
+    login_lead_seconds: float = 0,
+    slider_lead_seconds: float = 0,
+    first_submit_offset_ms: float = 0,
+    weekday: str | None = None,
+    credentials=None,
+    page_url: str = DEFAULT_PAGE_URL,
+    indices=None,
+) -> RunPlan:
+    """把 reserve 配置编译成 RunPlan；weekday 默认取 target_dt 所在的星期。
+
+    indices: 多窗口调度时该窗口包含的配置下标，其余配置标记为不执行
+    """
+    if not isinstance(users, list):
+        raise PlanError(["reserve must be a list of configs"])
+    problems = []
+    for index, user in enumerate(users):
+        problems.extend(validate_config(index, user))
+    if problems:
+        raise PlanError(problems)
+    if credentials is None:
+        credentials = resolve_credentials(users, action)
+
+    weekday = weekday or target_dt.strftime("%A")
+    day = str(target_dt.date() + datetime.timedelta(days=1 if reserve_next_day else 0))
+    configs = []
+    for index, user in enumerate(users):
+        seatid = user["seatid"]
+        seats = tuple(str(s) for s in ([seatid] if isinstance(seatid, str) else seatid))
+        roomid = str(user["roomid"])
+        seat_page_id = str(user.get("seatPageId") or "")
+        fid_enc = str(user.get("fidEnc") or "")
+        daysofweek = frozenset(user["daysofweek"])
+        credential = credentials[index] if index < len(credentials) else None
+        if indices is not None and index not in indices:
+            skip_reason = "not in this window"
+        elif weekday not in daysofweek:
+            skip_reason = "today not set to reserve"
+        elif credential is None:
+            skip_reason = "no credentials"
+        else:
+            skip_reason = ""
+        username, password = credential or ("", "")
+        configs.append(ConfigPlan(
+            index=index,
+            username=username,
+            password=password,
+            times=tuple(user["times"]),
+            roomid=roomid,
+            seats=seats,
+            seat_page_id=seat_page_id,
+            fid_enc=fid_enc,
+            daysofweek=daysofweek,
+            day=day,
+            page_url=page_url.format(roomId=roomid, day=day, seatPageId=seat_page_id, fidEnc=fid_enc),
+            active=not skip_reason,
+            skip_reason=skip_reason,
+        ))
+    # 今天执行的配置整份名单一次性预加密，不执行的配置不加密
+    encrypted = encrypt_credentials([(c.username, c.password) if c.active else None for c in configs])
+    configs = [c._replace(encrypted=pair) if pair else c for c, pair in zip(configs, encrypted)]
+
+    return RunPlan(
+        configs=tuple(configs),
+        weekday=weekday,
+        day=day,
+        target_dt=target_dt,
+        login_at=target_dt - datetime.timedelta(seconds=login_lead_seconds),
+        slider_at=target_dt - datetime.timedelta(seconds=slider_lead_seconds),
+        first_submit_at=target_dt + datetime.timedelta(milliseconds=first_submit_offset_ms),
+        end_hms=end_hms,
+    )
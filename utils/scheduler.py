@@ -0,0 +1,97 @@
+"""
+多窗口调度
+
+一所学校一天可能有多个放座时间，或者不同房间在不同时间开放。每个窗口有自己的开放时间、
+提前量和配置子集（编译成各自的 RunPlan），一个进程按时间顺序依次执行：
+
+- 每个窗口在 login_at - prepare_margin 时由后台线程预热（登录会话、预先建连），
+  和上一个窗口的重试尾巴重叠进行；
+- 窗口按顺序执行，上一个窗口的重试最晚持续到下一个窗口的 slider_at，
+  保证下一个窗口的验证码预热和第一次提交准时开始。
+"""
+
+import datetime
+import logging
+import threading
+import time
+
+
+def _sleep_until(dt: datetime.datetime):
+    while True:
+        remaining = (dt - datetime.datetime.now(dt.tzinfo)).total_seconds()
+        if remaining <= 0:
+            return
+        time.sleep(min(remaining, 0.5))
+
+
+class WindowScheduler:
+    """参数:
+        windows: [(name, plan), ...]，plan 为 utils.run_plan.RunPlan
+        prepare: prepare(name, plan)，在后台线程中预热该窗口
+        run: run(name, plan) -> 结果，在调用线程中执行该窗口
+        prepare_margin: 比窗口的 login_at 提前多少秒开始预热
+    """
+
+    def __init__(self, windows, prepare, run, prepare_margin: float = 30.0):
+        self.windows = sorted(windows, key=lambda w: w[1].target_dt)
+        self.prepare = prepare
+        self.run_window = run
+        self.prepare_margin = prepare_margin
+        self.windows = self._bounded(self.windows)
+
+    @staticmethod
+    def _bounded(windows):
+        """上一个窗口的结束时间不晚于下一个窗口的 slider_at。"""
+        result = []
+        for i, (name, plan) in enumerate(windows):
+            if i + 1 < len(windows):
+                cut = windows[i + 1][1].slider_at.strftime("%H:%M:%S")
+                if cut < plan.end_hms:
+                    logging.warning(
+                        f"[scheduler] Window {name} ends {plan.end_hms}, after next window's "
+                        f"captcha warm-up {cut}; cut its retries at {cut}"
+                    )
+                    plan = plan._replace(end_hms=cut)
+            result.append((name, plan))
+        return result
+
+    def _prepare_later(self, name, plan):
+        def _target():
+            _sleep_until(plan.login_at - datetime.timedelta(seconds=self.prepare_margin))
+            try:
+                self.prepare(name, plan)
+            except Exception as e:
+                # 预热失败时窗口内按原流程登录
+                logging.warning(f"[scheduler] Preparing window {name} failed: {e}")
+
+        thread = threading.Thread(target=_target, daemon=True, name=f"prepare-{name}")
+        thread.start()
+        return thread
+
+    def run(self):
+        """按时间顺序执行全部窗口，返回 {name: run 的结果}。"""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        pending = []
+        for name, plan in self.windows:
+            end_dt = datetime.datetime.combine(
+                plan.target_dt.date(),
+                datetime.time.fromisoformat(plan.end_hms),
+                plan.target_dt.tzinfo,
+            )
+            if end_dt <= now:
+                logging.info(f"[scheduler] Window {name} already closed at {end_dt}, skip")
+                continue
+            pending.append((name, plan))
+
+        logging.info(
+            "[scheduler] Windows: "
+            + ", ".join(f"{name}@{plan.target_dt.strftime('%H:%M:%S')}" for name, plan in pending)
+        )
+        preparing = [self._prepare_later(name, plan) for name, plan in pending]
+        results = {}
+        for (name, plan), thread in zip(pending, preparing):
+            # 预热线程到点才开始，这里等它完成再进入窗口，避免两个线程同时登录同一个会话
+            thread.join()
+            logging.info(f"[scheduler] Run window {name}, target {plan.target_dt}, end {plan.end_hms}")
+            results[name] = self.run_window(name, plan)
+        return results
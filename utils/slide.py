@@ -0,0 +1,185 @@
+"""
+滑块验证码缺口定位
+
+两个引擎，输入都是下载到的背景图（JPEG）和滑块图（带透明通道的 PNG），返回滑块左上角在背景图中的 x：
+- cv2: 原实现，imdecode + Canny + matchTemplate(TM_CCOEFF_NORMED)；
+- numpy: 只依赖 NumPy 和 Pillow（解码 PNG / JPEG）。滑块图与背景图等高时，滑块所在的行就是缺口所在的行，
+  只在这条行带（上下各留 BAND_MARGIN 行）里搜索；对梯度幅值图做 FFT 归一化互相关，公式与 TM_CCOEFF_NORMED 相同。
+
+engine 为 auto 时装了 OpenCV 就用 cv2，否则用 numpy。slim 安装（requirements-slim.txt）不装 opencv-python，
+也不需要 apt 安装 libgl1 / libglib2.0。两个引擎在同一批语料上的准确率和耗时：
+
+    python -m benchmarks.bench_slider
+"""
+
+import io
+import logging
+
+ENGINES = ("auto", "numpy", "cv2")
+# 行带上下各多搜索几行，容忍滑块图与背景图的行偏移
+BAND_MARGIN = 2
+
+
+def _has_cv2() -> bool:
+    try:
+        import cv2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def decode(data: bytes, mode: str = "RGB"):
+    """Pillow 解码为 uint8 数组；mode 为 RGB 或 RGBA。"""
+    import numpy as np
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        return np.asarray(image.convert(mode))
+
+
+def cut_slide(rgba):
+    """按透明通道裁出滑块（与 cv2.boundingRect 一致），返回 (RGB 图, 裁剪框上沿所在行)。"""
+    import numpy as np
+
+    alpha = rgba[:, :, 3]
+    rows = np.flatnonzero(alpha.any(axis=1))
+    cols = np.flatnonzero(alpha.any(axis=0))
+    if rows.size == 0:
+        return rgba[:, :, :3], 0
+    top, bottom, left, right = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+    return rgba[top:bottom, left:right, :3], int(top)
+
+
+def gradient(image):
+    """各通道 Sobel 梯度幅值取最大值（与 Canny 对彩色图的处理一致），float32。Sobel 按可分离卷积计算。"""
+    import numpy as np
+
+    # 通道放在第一维，各通道之间取最大值是逐元素运算
+    channels = np.ascontiguousarray(image.transpose(2, 0, 1), dtype=np.float32)
+    p = np.pad(channels, ((0, 0), (1, 1), (1, 1)), mode="edge")
+    smooth_v = p[:, :-2] + 2 * p[:, 1:-1] + p[:, 2:]
+    gx = smooth_v[:, :, 2:] - smooth_v[:, :, :-2]
+    smooth_h = p[:, :, :-2] + 2 * p[:, :, 1:-1] + p[:, :, 2:]
+    gy = smooth_h[:, 2:] - smooth_h[:, :-2]
+    return np.sqrt(np.max(gx * gx + gy * gy, axis=0))
+
+
+def ncc(image, template):
+    """TM_CCOEFF_NORMED 的 FFT 实现，返回 (H - h + 1, W - w + 1) 的得分图。"""
+    import numpy as np
+
+    image = image.astype(np.float64)
+    template = template.astype(np.float64)
+    H, W = image.shape
+    h, w = template.shape
+    t = template - template.mean()
+    t_norm = np.sqrt((t * t).sum())
+    # 互相关：只取不回绕的有效区域，FFT 尺寸取图像大小即可
+    corr = np.fft.irfft2(np.fft.rfft2(image) * np.conj(np.fft.rfft2(t, (H, W))), (H, W))[: H - h + 1, : W - w + 1]
+
+    def window_sum(a):
+        s = np.zeros((H + 1, W + 1))
+        s[1:, 1:] = a.cumsum(0).cumsum(1)
+        return s[h:, w:] - s[:-h, w:] - s[h:, :-w] + s[:-h, :-w]
+
+    n = h * w
+    sums = window_sum(image)
+    variance = window_sum(image * image) - sums * sums / n
+    denom = np.sqrt(np.clip(variance, 0, None)) * t_norm
+    return np.where(denom > 1e-6 * max(t_norm, 1.0), corr / np.where(denom > 0, denom, 1), 0.0)
+
+
+def locate_numpy(bg_bytes: bytes, tp_bytes: bytes):
+    """返回 (x, 得分)。"""
+    import numpy as np
+
+    bg = decode(bg_bytes, "RGB")
+    tp_rgba = decode(tp_bytes, "RGBA")
+    piece, top = cut_slide(tp_rgba)
+    h, w = piece.shape[:2]
+    tp_edge = gradient(piece)
+    if tp_rgba.shape[0] == bg.shape[0]:
+        # 只算行带（多带一行上下文，保证带边缘的梯度和整图计算时一致）
+        start, end = max(0, top - BAND_MARGIN), min(bg.shape[0], top + h + BAND_MARGIN)
+        lo, hi = max(0, start - 1), min(bg.shape[0], end + 1)
+        bg_edge = gradient(bg[lo:hi])[start - lo : end - lo]
+    else:
+        bg_edge = gradient(bg)
+    if bg_edge.shape[0] < h or bg_edge.shape[1] < w:
+        return 0, 0.0
+    scores = ncc(bg_edge, tp_edge)
+    y, x = np.unravel_index(int(np.argmax(scores)), scores.shape)
+    return int(x), float(scores[y, x])
+
+
+def locate_cv2(bg_bytes: bytes, tp_bytes: bytes):
+    """原实现，返回 (x, 得分)。"""
+    import numpy as np
+    import cv2
+
+    slider_image = cv2.imdecode(np.frombuffer(tp_bytes, np.uint8), cv2.IMREAD_UNCHANGED)
+    slider_part = slider_image[:, :, :3]
+    mask = slider_image[:, :, 3]
+    mask[mask != 0] = 255
+    x, y, w, h = cv2.boundingRect(mask)
+    tp_img = slider_part[y : y + h, x : x + w]
+    bg_img = cv2.imdecode(np.frombuffer(bg_bytes, np.uint8), cv2.IMREAD_COLOR)
+    bg_pic = cv2.cvtColor(cv2.Canny(bg_img, 100, 200), cv2.COLOR_GRAY2RGB)
+    tp_pic = cv2.cvtColor(cv2.Canny(tp_img, 100, 200), cv2.COLOR_GRAY2RGB)
+    res = cv2.matchTemplate(bg_pic, tp_pic, cv2.TM_CCOEFF_NORMED)
+    _, score, _, max_loc = cv2.minMaxLoc(res)
+    return max_loc[0], float(score)
+
+
+_LOCATORS = {"numpy": locate_numpy, "cv2": locate_cv2}
+
+
+class SlideSolver:
+    """按配置选择引擎定位缺口；warm() 在窗口前导入依赖并跑一遍假图片。"""
+
+    def __init__(self, engine: str = "auto"):
+        self.engine = engine
+        self.warm_engine = None
+
+    def configure(self, engine: str = "auto"):
+        if engine not in ENGINES:
+            raise ValueError(f"unknown slide engine {engine!r}, expected one of {ENGINES}")
+        self.engine = engine
+        return self
+
+    def resolved_engine(self) -> str:
+        if self.engine != "auto":
+            return self.engine
+        return "cv2" if _has_cv2() else "numpy"
+
+    def locate(self, bg_bytes: bytes, tp_bytes: bytes) -> int:
+        engine = self.resolved_engine()
+        x, score = _LOCATORS[engine](bg_bytes, tp_bytes)
+        logging.info(f"[slide] {engine} engine: x={x}, score={score:.3f}")
+        return x
+
+    def warm(self) -> str:
+        """导入所选引擎的依赖，并用一对合成图片跑一遍定位；重复调用是空操作。"""
+        engine = self.resolved_engine()
+        if self.warm_engine == engine:
+            return engine
+        import numpy as np
+        from PIL import Image
+
+        bg = np.zeros((160, 320, 3), np.uint8)
+        bg[40:90, 120:170] = 255
+        tp = np.zeros((160, 320, 4), np.uint8)
+        tp[30:100, 10:80, :3] = bg[30:100, 110:180]
+        tp[30:100, 10:80, 3] = 255
+        images = []
+        for array, fmt in ((bg, "JPEG"), (tp, "PNG")):
+            buffer = io.BytesIO()
+            Image.fromarray(array).save(buffer, fmt)
+            images.append(buffer.getvalue())
+        _LOCATORS[engine](*images)
+        self.warm_engine = engine
+        return engine
+
+
+# 全局求解器：main 按 config.json 的 slider.engine 设置
+SLIDE = SlideSolver()
@@ -0,0 +1,104 @@
+"""
+时段拆分 / 合并优化
+
+config.json 里常把一天按服务器单次预约的最长时长手工拆成几段（07:00-13:00、13:00-19:00、
+19:00-21:30），每段都要单独走一遍登录 / token / 验证码 / 提交。这里在窗口开始前：
+
+- 把同一账号、同一房间、同一组候选座位的时段合并（重叠或首尾相接）；
+- 再按最长时长拆成最少的几段，边界按粒度对齐；
+- 段数变少时多出来的配置标记为不执行，段数变多（原来的配置超过最长时长）时追加新配置。
+
+优化后的每一段都是计划里的一个独立配置，由主流程并行提交。
+"""
+
+from itertools import groupby
+
+
+def _minutes(hm: str) -> int:
+    h, m = hm.split(":")
+    return int(h) * 60 + int(m)
+
+
+def _hm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def merge_ranges(ranges):
+    """合并重叠或首尾相接的 (start, end) 分钟区间。"""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [tuple(r) for r in merged]
+
+
+def split_range(start: int, end: int, max_minutes: int, granularity: int = 0):
+    """把 [start, end) 拆成最少的、每段不超过 max_minutes 的区间；max_minutes<=0 表示不限。"""
+    if max_minutes <= 0 or end - start <= max_minutes:
+        return [(start, end)]
+    step = max_minutes
+    if granularity > 0 and max_minutes >= granularity:
+        step = max_minutes - max_minutes % granularity
+    return [(s, min(s + step, end)) for s in range(start, end, step)]
+
+
+def plan_slots(times_list, max_minutes: int, granularity: int = 0):
+    """[["07:00", "13:00"], ...] -> 覆盖相同时间所需的最少提交时段列表。"""
+    ranges = merge_ranges((_minutes(a), _minutes(b)) for a, b in times_list)
+    chunks = []
+    for start, end in ranges:
+        chunks.extend(split_range(start, end, max_minutes, granularity))
+    return [(_hm(a), _hm(b)) for a, b in chunks]
+
+
+def _group_key(cfg):
+    return (cfg.username, cfg.roomid, cfg.seats, cfg.seat_page_id, cfg.fid_enc, cfg.day)
+
+
+def optimize_slots(plan, max_minutes: int, granularity: int = 0):
+    """返回时段优化后的 RunPlan 和日志用的变更说明列表。配置下标保持不变，新增的段追加在末尾。"""
+    configs = list(plan.configs)
+    changes = []
+    active = sorted(plan.active(), key=_group_key)
+    for key, members in groupby(active, key=_group_key):
+        members = sorted(members, key=lambda c: _minutes(c.times[0]))
+        before = [tuple(c.times) for c in members]
+        after = plan_slots(before, max_minutes, granularity)
+        if after == before:
+            continue
+        for j, times in enumerate(after):
+            if j < len(members):
+                configs[members[j].index] = members[j]._replace(times=times)
+            else:
+                configs.append(members[0]._replace(index=len(configs), times=times))
+        for member in members[len(after):]:
+            configs[member.index] = member._replace(
+                active=False, skip_reason=f"merged into #{members[0].index}"
+            )
+        changes.append(
+            f"{key[0] or 'config'} room {key[1]} seats {list(key[2])}: "
+            f"{[f'{a}-{b}' for a, b in before]} -> {[f'{a}-{b}' for a, b in after]} "
+            f"({len(before)} -> {len(after)} submits)"
+        )
+    return plan._replace(configs=tuple(configs)), changes
+
+
+def share_extra_indices(plans, base: int):
+    """多窗口：每个窗口的计划都从 base（原配置数）开始给拆出的段编号，不同窗口的段会撞号。
+
+    重新编号为跨窗口唯一的下标，并让所有计划长度相同（位置 == 下标）：
+    其他窗口拆出的段在本计划里占位，不执行。返回新的计划列表。
+    """
+    extras = [(k, cfg) for k, plan in enumerate(plans) for cfg in plan.configs[base:]]
+    result = []
+    for k, plan in enumerate(plans):
+        configs = list(plan.configs[:base])
+        for owner, cfg in extras:
+            cfg = cfg._replace(index=len(configs))
+            if owner != k:
+                cfg = cfg._replace(active=False, skip_reason="split piece of another window")
+            configs.append(cfg)
+        result.append(plan._replace(configs=tuple(configs)))
+    return result
@@ -0,0 +1,98 @@
+"""
+启动阶段分析与预热
+
+- import_profile(): 用 `python -X importtime` 重新导入入口模块，解析出耗时最多的模块；
+- StartupProfile: 记录启动各阶段（导入 / 读配置 / 校验 / 预热）的耗时；
+- warm_captcha_engine(): 在窗口开始前导入滑块引擎的依赖（numpy / Pillow，cv2 引擎时还有 OpenCV）
+  并跑一次假图片，让首个验证码不再在窗口内付出导入和初始化时间。
+"""
+
+import logging
+import subprocess
+import sys
+import time
+
+
+def import_profile(module: str = "main", top: int = 15, cwd: str | None = None):
+    """返回 [(模块名, 自身耗时 us, 累计耗时 us), ...]，按累计耗时降序取前 top 个。"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=cwd,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue
+        rows.append((parts[2].strip(), self_us, cumulative_us))
+    rows.sort(key=lambda r: r[2], reverse=True)
+    return rows[:top]
+
+
+class StartupProfile:
+    """按顺序记录启动阶段耗时：with profile.phase("name"): ..."""
+
+    def __init__(self, origin: float | None = None):
+        self.origin = time.perf_counter() if origin is None else origin
+        self.phases = []
+
+    def mark(self, name: str, seconds: float):
+        self.phases.append((name, seconds))
+
+    def phase(self, name: str):
+        profile = self
+
+        class _Phase:
+            def __enter__(self):
+                self.start = time.perf_counter()
+                return self
+
+            def __exit__(self, *exc):
+                profile.mark(name, time.perf_counter() - self.start)
+                return False
+
+        return _Phase()
+
+    def report(self, imports=None):
+        lines = ["[startup] phase timings:"]
+        for name, seconds in self.phases:
+            lines.append(f"[startup]   {name:<24}{seconds * 1000:>9.1f} ms")
+        lines.append(f"[startup]   {'total since start':<24}{(time.perf_counter() - self.origin) * 1000:>9.1f} ms")
+        if imports:
+            lines.append("[startup] slowest imports (-X importtime, cumulative):")
+            for name, self_us, cumulative_us in imports:
+                lines.append(f"[startup]   {name:<40}{cumulative_us / 1000:>9.1f} ms (self {self_us / 1000:.1f} ms)")
+        return "\n".join(lines)
+
+
+_CAPTCHA_ENGINE_WARM = False
+
+
+def warm_captcha_engine() -> float:
+    """导入所选滑块引擎的依赖并用假图片跑一遍定位，返回耗时（秒）。
+
+    重复调用是空操作；依赖未安装时只记录警告，留给真正求解时报错。
+    """
+    global _CAPTCHA_ENGINE_WARM
+    if _CAPTCHA_ENGINE_WARM:
+        return 0.0
+    from utils.slide import SLIDE
+
+    start = time.perf_counter()
+    try:
+        engine = SLIDE.warm()
+    except ImportError as e:
+        logging.warning(f"[startup] Captcha engine not available for warm-up: {e}")
+        return time.perf_counter() - start
+    _CAPTCHA_ENGINE_WARM = True
+    elapsed = time.perf_counter() - start
+    logging.info(f"[startup] Captcha engine ({engine}) warmed up in {elapsed * 1000:.1f}ms")
+    return elapsed
@@ -0,0 +1,46 @@
+"""
+提交响应分类
+
+把 seat/submit 返回的 {"success": ..., "msg": ...} 归类为少数几种结果，
+供重试节奏控制、统计和成功校验等逻辑统一使用。
+"""
+
+SUCCESS = "success"
+AMBIGUOUS = "ambiguous"  # 代码:302，页面停留过久，可能已经预约成功
+SEAT_TAKEN = "seat_taken"
+ALREADY_RESERVED = "already_reserved"
+THROTTLED = "throttled"
+NOT_OPEN = "not_open"
+CAPTCHA = "captcha"
+TOKEN = "token"
+NETWORK = "network"
+OTHER = "other"
+
+# 按顺序匹配，先匹配到的分类生效
+_MSG_PATTERNS = (
+    (AMBIGUOUS, ("代码:302",)),
+    (THROTTLED, ("频繁", "过快", "稍后再试", "繁忙", "人数过多", "限流")),
+    (CAPTCHA, ("验证码",)),
+    (ALREADY_RESERVED, ("已有预约", "已经预约", "您已预约", "重复预约")),
+    (SEAT_TAKEN, ("已被预约", "已被占用", "已被他人", "座位不可用", "已被选")),
+    (NOT_OPEN, ("未开放", "未开始", "不在预约时间", "尚未开放", "还未到")),
+    (TOKEN, ("非法请求", "参数错误", "请刷新", "enc")),
+)
+
+
+def classify(data) -> str:
+    """返回提交响应的分类；data 为 None 表示请求本身失败（网络异常 / 非 JSON）。"""
+    if data is None:
+        return NETWORK
+    if data.get("success"):
+        return SUCCESS
+    msg = str(data.get("msg", ""))
+    for category, keywords in _MSG_PATTERNS:
+        if any(k in msg for k in keywords):
+            return category
+    return OTHER
+
+
+def is_terminal(category: str) -> bool:
+    """该分类出现后，同一座位继续重试也没有意义。"""
+    return category in (SUCCESS, SEAT_TAKEN, ALREADY_RESERVED)
@@ -0,0 +1,228 @@
+"""
+选字验证码：目标文字 -> OCR 字形的最优匹配
+
+旧逻辑按目标字顺序贪心地取第一个未用过、且完全相同的 OCR 字；任何一个字没认准就整张作废，
+重新取图 + 打码 + 校验一轮要一秒以上。这里改为：
+
+- OCR 每个字形可以带多个候选字和置信度（平台不返回时退化为单候选、置信度 1）；
+- 目标字与候选字不完全相同时，按形近字表给一个折扣分（己/已/巳、未/末……）；
+- 在所有"目标字 -> 不同字形"的分配里取总分最高的一组（目标字最多 4~5 个，直接枚举排列即可得到最优解）；
+- 允许至多一个目标字靠排除法落到剩下的字形上（OCR 把它认成了完全无关的字），只有仍然分不出来时才放弃。
+
+语料：config.json 的 textclick.corpus 打开时，每次识别把目标文字、OCR 结果和提交后的校验结果
+追加到 captcha_debug/textclick_corpus.jsonl（文件超过上限后不再追加），
+
+    python -m utils.textclick captcha_debug/textclick_corpus.jsonl
+
+在有校验结果的条目上对比贪心和最优匹配的首次命中率：只有和通过校验的答案一致才算对，
+校验未通过的条目对两者都算失败。
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+import uuid
+from itertools import permutations
+
+# 形近字组：同组内任意两个字互相视为形近
+SIMILAR_GROUPS = [
+    "己已巳", "未末", "日曰", "人入八", "土士", "干千于", "大太犬", "天夫", "王玉主",
+    "木本术", "田由甲申", "刀力", "贝见", "问间", "拔拨", "戊戌戍戎", "候侯", "析折",
+    "免兔", "鸟乌", "壁璧", "辨辩辫", "准淮", "汩汨", "体休", "晴睛", "陈阵", "买卖",
+    "今令", "白自", "口日", "目且", "午牛", "矢失", "办为", "冶治", "徒徙", "茶荼",
+    "季李", "帅师", "洒酒", "延廷", "孑子孓", "崇祟", "赢嬴羸", "眯咪", "亨享", "折拆",
+]
+SIMILAR_SCORE = 0.6
+# 排除法分配（目标字与字形毫无相似）的得分，远低于任何正常匹配
+GUESS_SCORE = 0.05
+MIN_CONFIDENCE = 0.05
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "..", "captcha_debug", "textclick_corpus.jsonl")
+CORPUS_MAX_BYTES = 5 * 1024 * 1024
+
+_CORPUS_LOCK = threading.Lock()
+# 语料默认不记录；main.py 按 config.json 的 textclick 配置调用 configure_corpus()
+_corpus = {"enabled": False, "path": CORPUS_PATH, "max_bytes": CORPUS_MAX_BYTES}
+
+_SIMILAR = {}
+for _group in SIMILAR_GROUPS:
+    for _char in _group:
+        _SIMILAR.setdefault(_char, set()).update(c for c in _group if c != _char)
+
+
+def similarity(a: str, b: str) -> float:
+    if a == b:
+        return 1.0
+    return SIMILAR_SCORE if b in _SIMILAR.get(a, ()) else 0.0
+
+
+def glyphs_from_ocr(ocr_result):
+    """OCR 结果 -> [{"x", "y", "candidates": [(字, 置信度), ...]}, ...]。
+
+    兼容旧格式 {"text": "朝阳系", "coordinates": [...]}（每个字单候选、置信度 1）。
+    """
+    if not ocr_result:
+        return []
+    if ocr_result.get("glyphs"):
+        return [
+            {"x": g["x"], "y": g["y"], "candidates": [(c, float(p)) for c, p in g["candidates"]]}
+            for g in ocr_result["glyphs"]
+        ]
+    text = ocr_result.get("text") or ""
+    coordinates = ocr_result.get("coordinates") or []
+    return [
+        {"x": xy["x"], "y": xy["y"], "candidates": [(char, 1.0)]}
+        for char, xy in zip(text, coordinates)
+    ]
+
+
+def pair_score(target: str, glyph) -> float:
+    return max((p * similarity(target, c) for c, p in glyph["candidates"]), default=0.0)
+
+
+def match(target_chars, glyphs, max_guesses: int = 1):
+    """返回 (坐标列表, 置信度)，无解时返回 (None, 0.0)。
+
+    置信度是各目标字得分的几何平均；排除法分配的字按 GUESS_SCORE 计。
+    """
+    n = len(target_chars)
+    if n == 0 or len(glyphs) < n:
+        return None, 0.0
+    scores = [[pair_score(t, g) for g in glyphs] for t in target_chars]
+    # 排除法只有在字形和目标字一样多时才可信：有多余字形时不知道该落到哪一个上
+    if len(glyphs) > n:
+        max_guesses = 0
+    best, best_total = None, -math.inf
+    for chosen in permutations(range(len(glyphs)), n):
+        total, guesses = 0.0, 0
+        for i, j in enumerate(chosen):
+            s = scores[i][j]
+            if s < MIN_CONFIDENCE:
+                guesses += 1
+                s = GUESS_SCORE
+            total += math.log(s)
+        if guesses > max_guesses:
+            continue
+        if total > best_total:
+            best, best_total = chosen, total
+    if best is None:
+        return None, 0.0
+    positions = [{"x": glyphs[j]["x"], "y": glyphs[j]["y"]} for j in best]
+    return positions, round(math.exp(best_total / n), 4)
+
+
+def greedy_match(target_chars, glyphs):
+    """旧版逐字贪心匹配（只看首选候选、完全相同），仅用于对比。"""
+    used, positions = set(), []
+    for target in target_chars:
+        for j, g in enumerate(glyphs):
+            if j not in used and g["candidates"] and g["candidates"][0][0] == target:
+                used.add(j)
+                positions.append({"x": g["x"], "y": g["y"]})
+                break
+        else:
+            return None
+    return positions
+
+
+# ---------------- 语料 ----------------
+
+def configure_corpus(enabled: bool, path: str | None = None, max_bytes: int = CORPUS_MAX_BYTES):
+    """打开 / 关闭语料记录；max_bytes 为语料文件的大小上限，超过后不再追加。"""
+    _corpus.update(enabled=enabled, path=path or CORPUS_PATH, max_bytes=max_bytes)
+
+
+def _append(item, path: str):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with _CORPUS_LOCK, open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+    except OSError as e:
+        logging.debug(f"Failed to append textclick corpus: {e}")
+
+
+def _corpus_full(path: str) -> bool:
+    try:
+        return os.path.getsize(path) >= _corpus["max_bytes"]
+    except OSError:
+        return False
+
+
+def record(target_chars, ocr_result, positions, confidence, path: str | None = None):
+    """追加一条语料，返回语料编号（提交后用 mark() 补上校验结果）；未打开或文件已满时返回 None。"""
+    path = path or _corpus["path"]
+    if not _corpus["enabled"] or _corpus_full(path):
+        return None
+    corpus_id = uuid.uuid4().hex[:12]
+    _append({
+        "id": corpus_id,
+        "target": list(target_chars),
+        "glyphs": [
+            {"x": g["x"], "y": g["y"], "candidates": [list(c) for c in g["candidates"]]}
+            for g in glyphs_from_ocr(ocr_result)
+        ],
+        "positions": positions,
+        "confidence": confidence,
+    }, path)
+    return corpus_id
+
+
+def mark(corpus_id, validated: bool, path: str | None = None):
+    """追加一行校验结果；多个配置并行识别时也不会改到别人的记录。
+    只补记 record() 写过的条目，文件已满后也照常写，校验结果不会丢。"""
+    if corpus_id:
+        _append({"id": corpus_id, "validated": bool(validated)}, path or _corpus["path"])
+
+
+def solve_rate(items):
+    """在有校验结果的条目上统计贪心 / 最优匹配的首次命中率。
+
+    校验通过的条目里记录的坐标就是正确答案，匹配结果和它一致才算对；校验未通过的条目不知道
+    正确答案，两种匹配都算失败。没有校验结果的条目（没提交或提交前出错）不计入。
+    记录的坐标是识别当时 match() 的输出，assignment_correct 衡量的是现在的匹配（形近字表、
+    排除法规则改动后）能否复现通过校验的答案；answered 只说明给出了答案，不代表答对。
+    """
+    report = {"captchas": len(items), "validated": 0, "rejected": 0,
+              "greedy_answered": 0, "assignment_answered": 0, "greedy_correct": 0, "assignment_correct": 0}
+    for item in items:
+        if item.get("validated") is None:
+            continue
+        glyphs = glyphs_from_ocr(item)
+        greedy = greedy_match(item["target"], glyphs)
+        assigned, _ = match(item["target"], glyphs)
+        report["greedy_answered"] += greedy is not None
+        report["assignment_answered"] += assigned is not None
+        if item["validated"] and item.get("positions"):
+            report["validated"] += 1
+            report["greedy_correct"] += greedy == item["positions"]
+            report["assignment_correct"] += assigned == item["positions"]
+        else:
+            report["rejected"] += 1
+    n = max(report["validated"] + report["rejected"], 1)
+    report["greedy_accuracy"] = round(report["greedy_correct"] / n, 4)
+    report["assignment_accuracy"] = round(report["assignment_correct"] / n, 4)
+    return report
+
+
+def load_corpus(path: str | None = None):
+    """读取语料并把校验结果行合并到对应的识别记录上。"""
+    items, by_id = [], {}
+    with open(path or _corpus["path"], encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if "target" in item:
+                items.append(item)
+                by_id[item.get("id")] = item
+            elif item.get("id") in by_id:
+                by_id[item["id"]]["validated"] = item.get("validated")
+    return items
+
+
+if __name__ == "__main__":
+    import sys
+
+    corpus = sys.argv[1] if len(sys.argv) > 1 else CORPUS_PATH
+    print(json.dumps(solve_rate(load_corpus(corpus)), ensure_ascii=False, indent=2))
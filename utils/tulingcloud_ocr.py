@@ -9,6 +9,27 @@ import logging
 from typing import Optional
 
 
+def _glyph_candidates(item: dict, char: str) -> list:
+    """单个字形的候选字列表 [(字, 置信度), ...]，按置信度从高到低。
+
+    模型返回候选 / 置信度字段时使用（"候选"/"candidates" 为 [{"文字", "置信度"}] 或 [[字, 置信度]]），
+    否则只有识别出的字本身，置信度按 1 计。
+    """
+    confidence = item.get("置信度", item.get("confidence", item.get("score", 1.0)))
+    candidates = {char: float(confidence)}
+    for extra in item.get("候选") or item.get("candidates") or []:
+        if isinstance(extra, dict):
+            c = extra.get("文字") or extra.get("text", "")
+            p = extra.get("置信度", extra.get("confidence", 0.0))
+        else:
+            c, p = extra[0], extra[1]
+        if c and float(p) > candidates.get(c, 0.0):
+            candidates[c] = float(p)
+    # 部分模型按百分制返回置信度
+    scale = 100.0 if max(candidates.values()) > 1 else 1.0
+    return sorted(((c, p / scale) for c, p in candidates.items()), key=lambda kv: -kv[1])
+
+
 class TulingCloudOCR:
     """图灵云打码平台API调用类"""
     
@@ -35,8 +56,9 @@ class TulingCloudOCR:
             img_data: 图片二进制数据
             
         返回:
-            识别结果字典，包含 'text' 和可能的 'coordinates'，失败返回None
-            示例: {"text": "朝阳系", "coordinates": [{"x": 100, "y": 200}, ...]}
+            识别结果字典，包含 'text'、'coordinates' 和每个字形的候选 'glyphs'，失败返回None
+            示例: {"text": "朝阳系", "coordinates": [{"x": 100, "y": 200}, ...],
+                   "glyphs": [{"x": 100, "y": 200, "candidates": [("朝", 0.93), ("潮", 0.04)]}, ...]}
         """
         try:
             import requests
@@ -83,6 +105,7 @@ class TulingCloudOCR:
                     # 我们要找序列顺序的条目
                     coordinates = []
                     recognized_chars = []
+                    glyphs = []
                     
                     # 按顺序排序（"顺序1", "顺序2", "顺序3", "顺序4"等）
                     for i in range(1, len(response_data) + 1):
@@ -96,6 +119,7 @@ class TulingCloudOCR:
                             if char:
                                 recognized_chars.append(char)
                                 coordinates.append({"x": int(x), "y": int(y)})
+                                glyphs.append({"x": int(x), "y": int(y), "candidates": _glyph_candidates(item, char)})
                                 logging.debug(f"Parsed '{char}' at ({x}, {y})")
                     
                     if recognized_chars and coordinates:
@@ -104,7 +128,8 @@ class TulingCloudOCR:
                         logging.info(f"Coordinates: {coordinates}")
                         return {
                             "text": recognized_text,
-                            "coordinates": coordinates
+                            "coordinates": coordinates,
+                            "glyphs": glyphs,
                         }
                     else:
                         logging.warning("TulingCloud returned empty result")
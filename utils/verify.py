@@ -0,0 +1,138 @@
+"""
+预约结果校验
+
+提交返回"代码:302"（页面停留过久）、"已有预约"、"已被预约"这类结果时，本身无法判断
+座位到底是不是自己的。这里用 seat/reservelist 一次性查询账号当前的全部预约记录，
+按 (账号, 日期) 缓存，多个配置共用同一账号时只查一次：
+
+- confirm(): 在某次提交之后查询（或复用该提交之后的缓存），判断目标预约是否已经存在；
+- booked(): 不发请求，只看缓存里是否已经确认过该预约，主循环据此停止重试。
+"""
+
+import datetime
+import logging
+import threading
+import time
+
+# 记录的状态文字包含这些词时，不算有效预约
+_INACTIVE_WORDS = ("取消", "违约", "失效")
+_BEIJING = datetime.timezone(datetime.timedelta(hours=8))
+
+
+def _is_timestamp(value) -> bool:
+    return isinstance(value, (int, float)) or (isinstance(value, str) and value.isdigit() and len(value) > 8)
+
+
+def _hm(value):
+    """把 "07:00" / "2026-10-20 07:00" / 毫秒时间戳 统一为 "HH:MM"。"""
+    if value is None:
+        return ""
+    if _is_timestamp(value):
+        return datetime.datetime.fromtimestamp(float(value) / 1000, _BEIJING).strftime("%H:%M")
+    value = str(value).strip()
+    if " " in value:
+        value = value.rsplit(" ", 1)[1]
+    return value[:5]
+
+
+def _day(row):
+    day = row.get("today") or row.get("day")
+    if day:
+        return str(day)[:10]
+    start = row.get("startTime")
+    if _is_timestamp(start):
+        return datetime.datetime.fromtimestamp(float(start) / 1000, _BEIJING).strftime("%Y-%m-%d")
+    if isinstance(start, str) and " " in start:
+        return start.split(" ", 1)[0]
+    return ""
+
+
+def normalize(row: dict) -> dict | None:
+    """把 reservelist 的一条记录归一化为 {roomid, seat, day, start, end}；已取消的记录返回 None。"""
+    status_text = " ".join(str(row.get(k, "")) for k in ("statusName", "statusText", "statusDesc"))
+    if any(word in status_text for word in _INACTIVE_WORDS):
+        return None
+    return {
+        "roomid": str(row.get("roomId") or row.get("roomid") or ""),
+        "seat": str(row.get("seatNum") or ""),
+        "day": _day(row),
+        "start": _hm(row.get("startTime")),
+        "end": _hm(row.get("endTime")),
+    }
+
+
+def find_booking(bookings, day: str, roomid, times, seats=None):
+    """在归一化后的记录中查找目标预约；seats 为 None 时同房间同时段的任意座位都算。"""
+    for booking in bookings:
+        if booking["day"] != day or booking["roomid"] != str(roomid):
+            continue
+        if (booking["start"], booking["end"]) != (times[0], times[1]):
+            continue
+        if seats is None or booking["seat"] in seats:
+            return booking
+    return None
+
+
+class ReservationVerifier:
+    """按 (账号, 日期) 缓存账号的预约记录。未启用时 confirm 返回 None，调用方按原逻辑处理。"""
+
+    def __init__(self):
+        self.enabled = False
+        self._cache = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def configure(self, enabled: bool):
+        self.enabled = enabled
+        with self._lock:
+            self._cache.clear()
+
+    @staticmethod
+    def _account(session):
+        return getattr(session, "username", None) or id(session)
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def bookings(self, session, day: str, since: float = 0.0):
+        """返回账号在 day 的有效预约（归一化后）；缓存晚于 since 时直接复用，查询失败返回 None。"""
+        key = (self._account(session), day)
+        # 同一账号的并发查询合并成一次
+        with self._key_lock(key):
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] >= since:
+                return cached[1]
+            fetched_at = time.time()
+            try:
+                rows = session.reservation_list()
+            except Exception as e:
+                logging.warning(f"[verify] Failed to query reservations: {e}")
+                return None
+            bookings = [b for b in (normalize(r) for r in rows) if b is not None and b["day"] == day]
+            self._cache[key] = (fetched_at, bookings)
+            return bookings
+
+    def confirm(self, session, day: str, roomid, times, seats=None, since: float = 0.0):
+        """目标预约已存在返回 True，不存在返回 False，未启用或查询失败返回 None。"""
+        if not self.enabled:
+            return None
+        bookings = self.bookings(session, day, since)
+        if bookings is None:
+            return None
+        booking = find_booking(bookings, day, roomid, times, seats)
+        if booking:
+            logging.info(f"[verify] Confirmed booking {booking}")
+        return booking is not None
+
+    def booked(self, account, day: str, roomid, times, seats=None) -> bool:
+        """只查缓存：该账号的目标预约是否已经确认存在。"""
+        key = (account, day)
+        # 与 bookings() 写缓存时持有同一把锁，并行配置同时查询时读到的是完整的一次查询结果
+        with self._key_lock(key):
+            cached = self._cache.get(key)
+        return bool(cached and find_booking(cached[1], day, roomid, times, seats))
+
+
+# 全局校验器，reserve 在模糊 / 终止类提交结果后调用
+VERIFIER = ReservationVerifier()